@@ -1,47 +1,111 @@
 from __future__ import annotations
 
+import time
 from contextlib import contextmanager
+from functools import wraps
+from threading import Lock
 from typing import Optional, Callable, Iterator
 
-from flask import g
+from flask import Flask, g, request
 from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy.pool import StaticPool
 
+from app.core.pool import engine_options, install_pool_events
+from app.core.replicas import (
+    AUTOCOMMIT,
+    REPLICA_ALLOWED,
+    WROTE,
+    ReplicaSet,
+    RoutingSession,
+)
 from app.core.settings import settings
 
 
-engine_kwargs = {
-    "pool_pre_ping": True,
-    "future": True,
-}
-
-if settings.url.startswith("sqlite"):
-    engine_kwargs.update(
-        {
-            "connect_args": {"check_same_thread": False},
-            "poolclass": StaticPool,
-        }
-    )
-else:
-    engine_kwargs.update(
-        {
-            "pool_size": settings.db_pool_size,
-            "max_overflow": settings.db_max_overflow,
-            "pool_timeout": settings.db_pool_timeout,
-            "pool_recycle": settings.db_pool_recycle,
-            "pool_use_lifo": True,
-        }
-    )
+engine_kwargs = engine_options(settings.url)
 
 engine = create_engine(settings.url, **engine_kwargs)
-
-SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, future=True)
+install_pool_events(engine, settings.db_pre_ping_idle_seconds)
+
+replicas = ReplicaSet(
+    [create_engine(url, **engine_options(url)) for url in settings.replica_urls_list()],
+    max_lag_seconds=settings.replica_max_lag_seconds,
+    check_interval_seconds=settings.replica_check_interval_seconds,
+)
+for _replica in replicas.replicas:
+    install_pool_events(_replica.engine, settings.db_pre_ping_idle_seconds)
+
+SessionLocal = sessionmaker(
+    bind=engine,
+    class_=RoutingSession,
+    autocommit=False,
+    autoflush=False,
+    # Objects stay readable after commit, so serialising a response does not
+    # check a connection out again just to reload them.
+    expire_on_commit=False,
+    future=True,
+    replicas=replicas,
+)
+
+# Set on responses to requests that wrote; while it is in the future the
+# caller's reads stay on the primary, so they see their own writes.
+PRIMARY_UNTIL_COOKIE = "rota_primary_until"
 
 _session_factory: Callable[[], Session] = SessionLocal
 _session_override: Optional[Session] = None
 
 
+class PoolWaitMonitor:
+    """Moving average of how long requests wait to get a pooled connection.
+
+    Each sample moves the average by ``alpha``; between samples it halves every
+    ``half_life`` seconds, so it recovers once requests stop queueing (or stop
+    arriving because they are being shed).
+    """
+
+    def __init__(self, half_life: float = 5.0, alpha: float = 0.2) -> None:
+        self.half_life = half_life
+        self.alpha = alpha
+        self._value = 0.0
+        self._updated = time.monotonic()
+        self._lock = Lock()
+
+    def _decayed(self, now: float) -> float:
+        elapsed = max(0.0, now - self._updated)
+        return self._value * 0.5 ** (elapsed / self.half_life)
+
+    def record(self, seconds: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._value = self.alpha * seconds + (1 - self.alpha) * self._decayed(now)
+            self._updated = now
+
+    def reset(self) -> None:
+        with self._lock:
+            self._value = 0.0
+            self._updated = time.monotonic()
+
+    @property
+    def wait_ms(self) -> float:
+        with self._lock:
+            return self._decayed(time.monotonic()) * 1000
+
+
+pool_wait = PoolWaitMonitor(half_life=settings.load_shed_half_life_seconds)
+
+
+def _checkout(session: Session) -> None:
+    """Take the connection up front so the pool wait can be measured."""
+
+    started = time.perf_counter()
+    try:
+        session.connection()
+    except PoolTimeoutError:
+        pool_wait.record(float(settings.db_pool_timeout))
+        raise
+    pool_wait.record(time.perf_counter() - started)
+
+
 def set_session_factory(factory: Callable[[], Session]) -> None:
     """Allow replacing the session factory (useful for tests)."""
 
@@ -77,9 +141,85 @@ def get_db() -> Session:
 
     if "db_session" not in g:
         g.db_session = _new_session()
+        g.db_session.info[REPLICA_ALLOWED] = _replicas_allowed()
+        if settings.load_shed_pool_wait_ms is not None:
+            _checkout(g.db_session)
     return g.db_session
 
 
+def _replicas_allowed() -> bool:
+    if not replicas:
+        return False
+    try:
+        primary_until = float(request.cookies.get(PRIMARY_UNTIL_COOKIE, 0))
+    except ValueError:
+        return True
+    return primary_until <= time.time()
+
+
+def init_read_your_writes(app: Flask) -> None:
+    """Keep a client on the primary for a while after its requests write."""
+
+    if not replicas:
+        return
+
+    @app.after_request
+    def _stick_to_primary(response):
+        db: Optional[Session] = g.get("db_session")
+        if db is not None and db.info.get(WROTE):
+            window = settings.read_your_writes_seconds
+            response.set_cookie(
+                PRIMARY_UNTIL_COOKIE,
+                f"{time.time() + window:.0f}",
+                max_age=int(window),
+                httponly=True,
+                secure=settings.is_production,
+                samesite="None" if settings.is_production else "Lax",
+            )
+        return response
+
+
+def release_db() -> None:
+    """Return the request's connection to the pool before the request ends.
+
+    Call it once the route's database work is done (and committed) and it
+    still has slow work left, such as sending e-mail. Loaded objects keep their
+    values; a later ``get_db()`` transparently checks out a new connection.
+    """
+
+    if _session_override is not None:
+        return
+
+    db: Optional[Session] = g.get("db_session")
+    if db is not None:
+        db.close()
+
+
+def read_only_session(view):
+    """Run a read-only view on an autocommit session released when it returns.
+
+    Only for views that do not write and whose response is fully built when
+    they return (no ``stream_with_context`` reading from the session).
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        db = get_db()
+        if db is _session_override:
+            return view(*args, **kwargs)
+        if db.in_transaction():
+            # Reads made by before_request hooks (e.g. loading the user);
+            # commit rather than roll back so loaded objects are not expired.
+            db.commit()
+        db.info[AUTOCOMMIT] = True
+        try:
+            return view(*args, **kwargs)
+        finally:
+            release_db()
+
+    return wrapper
+
+
 def close_db(_=None) -> None:
     if _session_override is not None:
         return
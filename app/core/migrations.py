@@ -0,0 +1,245 @@
+"""Minimal versioned SQL migration runner.
+
+Migrations live in ``app/migrations`` as ``NNNN_description.sql`` and are
+applied in version order. Applied versions are tracked in ``schema_migrations``
+together with a checksum of the file. A file whose first line is
+``-- migrate:no-transaction`` runs statement by statement in autocommit mode,
+which ``CREATE INDEX CONCURRENTLY`` requires.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[1] / "migrations"
+NO_TRANSACTION_DIRECTIVE = "-- migrate:no-transaction"
+
+_FILENAME = re.compile(r"^(\d{4,})_([\w-]+)\.sql$")
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: str
+    name: str
+    path: Path
+    sql: str
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(self.sql.encode("utf-8")).hexdigest()
+
+    @property
+    def transactional(self) -> bool:
+        first_line = self.sql.lstrip().splitlines()[0] if self.sql.strip() else ""
+        return first_line.strip().lower() != NO_TRANSACTION_DIRECTIVE
+
+
+@dataclass
+class MigrationStatus:
+    migration: Migration
+    applied_at: Optional[datetime]
+    checksum_mismatch: bool = False
+
+    @property
+    def applied(self) -> bool:
+        return self.applied_at is not None
+
+
+def discover(directory: Path = MIGRATIONS_DIR) -> list[Migration]:
+    migrations: list[Migration] = []
+    seen: set[str] = set()
+    for path in sorted(directory.glob("*.sql")):
+        match = _FILENAME.match(path.name)
+        if not match:
+            continue
+        version, name = match.groups()
+        if version in seen:
+            raise ValueError(f"Versão de migração duplicada: {version}")
+        seen.add(version)
+        migrations.append(
+            Migration(
+                version=version,
+                name=name,
+                path=path,
+                sql=path.read_text(encoding="utf-8"),
+            )
+        )
+    return migrations
+
+
+def split_statements(sql: str) -> list[str]:
+    """Split on ``;`` outside quotes, dollar-quoted bodies and comments.
+
+    ``--`` line comments and (nested) ``/* */`` block comments are dropped.
+    """
+    statements: list[str] = []
+    buffer: list[str] = []
+    i = 0
+    length = len(sql)
+    dollar_tag: Optional[str] = None
+    in_quote = False
+    while i < length:
+        char = sql[i]
+        if dollar_tag is not None:
+            if sql.startswith(dollar_tag, i):
+                buffer.append(dollar_tag)
+                i += len(dollar_tag)
+                dollar_tag = None
+                continue
+        elif in_quote:
+            if char == "'":
+                in_quote = False
+        elif char == "'":
+            in_quote = True
+        elif char == "-" and sql.startswith("--", i):
+            end = sql.find("\n", i)
+            end = length if end == -1 else end
+            i = end
+            continue
+        elif char == "/" and sql.startswith("/*", i):
+            # Block comments nest in Postgres; an unterminated one runs to the end.
+            depth = 0
+            while i < length:
+                if sql.startswith("/*", i):
+                    depth += 1
+                    i += 2
+                elif sql.startswith("*/", i):
+                    depth -= 1
+                    i += 2
+                    if depth == 0:
+                        break
+                else:
+                    i += 1
+            if buffer and not buffer[-1].isspace():
+                buffer.append(" ")
+            continue
+        elif char == "$":
+            match = re.match(r"\$[A-Za-z_]*\$", sql[i:])
+            if match:
+                dollar_tag = match.group(0)
+                buffer.append(dollar_tag)
+                i += len(dollar_tag)
+                continue
+        elif char == ";":
+            statement = "".join(buffer).strip()
+            if statement:
+                statements.append(statement)
+            buffer = []
+            i += 1
+            continue
+        buffer.append(char)
+        i += 1
+    tail = "".join(buffer).strip()
+    if tail:
+        statements.append(tail)
+    return statements
+
+
+def ensure_migrations_table(conn: Connection) -> None:
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version    VARCHAR(32) PRIMARY KEY,
+                name       VARCHAR(255) NOT NULL,
+                checksum   VARCHAR(64) NOT NULL,
+                applied_at TIMESTAMP NOT NULL
+            )
+            """
+        )
+    )
+
+
+def _applied(conn: Connection) -> dict[str, tuple[str, datetime]]:
+    rows = conn.execute(
+        text("SELECT version, checksum, applied_at FROM schema_migrations")
+    ).all()
+    return {row.version: (row.checksum, row.applied_at) for row in rows}
+
+
+def status(engine: Engine, directory: Path = MIGRATIONS_DIR) -> list[MigrationStatus]:
+    with engine.begin() as conn:
+        ensure_migrations_table(conn)
+        applied = _applied(conn)
+    result: list[MigrationStatus] = []
+    for migration in discover(directory):
+        record = applied.get(migration.version)
+        result.append(
+            MigrationStatus(
+                migration=migration,
+                applied_at=record[1] if record else None,
+                checksum_mismatch=bool(record and record[0] != migration.checksum),
+            )
+        )
+    return result
+
+
+def _record(conn: Connection, migration: Migration) -> None:
+    conn.execute(
+        text(
+            "INSERT INTO schema_migrations (version, name, checksum, applied_at)"
+            " VALUES (:version, :name, :checksum, :applied_at)"
+        ),
+        {
+            "version": migration.version,
+            "name": migration.name,
+            "checksum": migration.checksum,
+            "applied_at": datetime.now(timezone.utc).replace(tzinfo=None),
+        },
+    )
+
+
+def apply_migration(engine: Engine, migration: Migration) -> None:
+    statements = split_statements(migration.sql)
+    if migration.transactional:
+        with engine.begin() as conn:
+            for statement in statements:
+                conn.exec_driver_sql(statement)
+            _record(conn, migration)
+        return
+
+    # Each statement commits on its own; a failure leaves earlier ones applied,
+    # so no-transaction migrations must be written to be re-runnable.
+    with engine.connect() as conn:
+        autocommit = conn.execution_options(isolation_level="AUTOCOMMIT")
+        for statement in statements:
+            autocommit.exec_driver_sql(statement)
+    with engine.begin() as conn:
+        _record(conn, migration)
+
+
+def migrate(
+    engine: Engine,
+    *,
+    directory: Path = MIGRATIONS_DIR,
+    target: Optional[str] = None,
+    dry_run: bool = False,
+    log=print,
+) -> list[Migration]:
+    """Apply pending migrations up to ``target`` (inclusive) and return them."""
+
+    pending = [
+        item.migration
+        for item in status(engine, directory)
+        if not item.applied and (target is None or item.migration.version <= target)
+    ]
+    for migration in pending:
+        mode = "" if migration.transactional else " (sem transação)"
+        log(
+            f"{'[dry-run] ' if dry_run else ''}{migration.version} {migration.name}{mode}"
+        )
+        if not dry_run:
+            apply_migration(engine, migration)
+    return pending
+
+
+def pending_versions(statuses: Iterable[MigrationStatus]) -> list[str]:
+    return [item.migration.version for item in statuses if not item.applied]
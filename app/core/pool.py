@@ -0,0 +1,135 @@
+"""Connection pool options, liveness checks and counters.
+
+``DB_POOL_MODE=queue`` (default) keeps a ``QueuePool`` per process.
+``DB_POOL_MODE=transaction`` is for running behind a transaction-mode pooler
+such as PgBouncer: the pooler owns the server connections, so every checkout
+opens a client connection to it (``NullPool``) and psycopg's automatic
+prepared statements are turned off, because consecutive transactions may run
+on different server connections.
+
+Instead of ``pool_pre_ping`` on every checkout, a pooled connection is pinged
+only when it sat idle for ``DB_PRE_PING_IDLE_SECONDS``. A connection that fails
+in use is invalidated by SQLAlchemy's disconnect handling, which also discards
+every pooled connection opened before it.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import DisconnectionError
+from sqlalchemy.pool import NullPool, QueuePool, StaticPool
+
+from app.core.settings import settings
+
+_IDLE_SINCE = "rota_idle_since"
+_stats_lock = threading.Lock()
+
+
+def engine_options(url: str) -> dict[str, Any]:
+    """``create_engine`` keyword arguments for ``url`` under ``DB_POOL_MODE``."""
+
+    if url.startswith("sqlite"):
+        return {
+            "future": True,
+            "connect_args": {"check_same_thread": False},
+            "poolclass": StaticPool,
+        }
+    if settings.db_pool_mode == "transaction":
+        options: dict[str, Any] = {"future": True, "poolclass": NullPool}
+        if make_url(url).get_driver_name() == "psycopg":
+            options["connect_args"] = {"prepare_threshold": None}
+        return options
+    return {
+        "future": True,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_use_lifo": True,
+    }
+
+
+@dataclass
+class PoolStats:
+    connects: int = 0
+    checkouts: int = 0
+    checkins: int = 0
+    pings: int = 0
+    ping_failures: int = 0
+    invalidations: int = 0
+
+    def incr(self, name: str) -> None:
+        with _stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+_stats: WeakKeyDictionary[Engine, PoolStats] = WeakKeyDictionary()
+
+
+def install_pool_events(engine: Engine, idle_seconds: float) -> PoolStats:
+    """Count pool activity on ``engine`` and ping connections idle too long."""
+
+    if engine in _stats:
+        return _stats[engine]
+    stats = _stats[engine] = PoolStats()
+    ping = isinstance(engine.pool, QueuePool)
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, record):
+        stats.incr("connects")
+        record.info[_IDLE_SINCE] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, record, proxy):
+        idle_since = record.info.get(_IDLE_SINCE)
+        if ping and idle_since is not None:
+            if time.monotonic() - idle_since >= idle_seconds:
+                stats.incr("pings")
+                try:
+                    engine.dialect.do_ping(dbapi_connection)
+                except Exception as exc:  # noqa: BLE001 - any failure reconnects
+                    stats.incr("ping_failures")
+                    # The pool discards this connection and retries with a new one.
+                    raise DisconnectionError("Conexão ociosa não respondeu") from exc
+        stats.incr("checkouts")
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, record):
+        stats.incr("checkins")
+        record.info[_IDLE_SINCE] = time.monotonic()
+
+    @event.listens_for(engine, "invalidate")
+    def _invalidate(dbapi_connection, record, exception):
+        stats.incr("invalidations")
+
+    return stats
+
+
+def pool_status(engine: Engine) -> dict[str, Any]:
+    """Current state of ``engine``'s pool plus the counters since startup."""
+
+    pool = engine.pool
+    stats = _stats.get(engine) or PoolStats()
+    status: dict[str, Any] = {
+        "pool": type(pool).__name__,
+        "in_use": stats.checkouts - stats.checkins,
+        **stats.as_dict(),
+    }
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    return status
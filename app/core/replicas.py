@@ -0,0 +1,181 @@
+"""Optional read replicas behind the regular request session.
+
+``RoutingSession`` sends a statement to a replica only when three things hold:
+the code running it is marked read-only (``@replica_read`` on a repository
+method, or ``use_replica``), the session allows replicas (request sessions do
+unless the caller wrote recently, see ``READ_YOUR_WRITES_SECONDS``), and the
+session has not written anything yet. Everything else, including every session
+created by scripts and jobs, goes to the primary. Sessions flagged with
+``AUTOCOMMIT`` (see ``read_only_session`` in ``app.core.db``) run on an
+autocommit variant of whichever engine is chosen, so plain reads never leave a
+connection idle in a transaction.
+
+``ReplicaSet`` picks replicas round-robin, skipping those that failed their
+last health check or lag more than ``REPLICA_MAX_LAG_SECONDS``; with none
+available the read falls back to the primary. Checks run inline, at most once
+per ``REPLICA_CHECK_INTERVAL_SECONDS`` per replica.
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache, wraps
+from typing import Iterator, Optional, Sequence
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+LOGGER = logging.getLogger(__name__)
+
+# session.info keys
+READ_ONLY_DEPTH = "rota_read_only"
+REPLICA_ALLOWED = "rota_replica_allowed"
+WROTE = "rota_wrote"
+AUTOCOMMIT = "rota_autocommit"
+
+# Seconds the replica is behind, or 0 when it has replayed all it received.
+_PG_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+    "END"
+)
+
+
+@dataclass
+class Replica:
+    engine: Engine
+    healthy: bool = True
+    lag_seconds: float = 0.0
+    checked_at: float = float("-inf")
+    checking: bool = False
+
+
+class ReplicaSet:
+    def __init__(
+        self,
+        engines: Sequence[Engine],
+        *,
+        max_lag_seconds: float = 5.0,
+        check_interval_seconds: float = 10.0,
+    ) -> None:
+        self.replicas = [Replica(engine) for engine in engines]
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self._cycle = itertools.cycle(range(len(self.replicas)))
+        self._lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def measure_lag(self, replica: Replica) -> float:
+        with replica.engine.connect() as conn:
+            if conn.dialect.name != "postgresql":
+                conn.execute(text("SELECT 1"))
+                return 0.0
+            return float(conn.execute(_PG_LAG_SQL).scalar() or 0.0)
+
+    def check(self, replica: Replica) -> None:
+        try:
+            lag = self.measure_lag(replica)
+        except Exception as exc:  # noqa: BLE001 - any failure marks it down
+            if replica.healthy:
+                LOGGER.warning("Réplica indisponível; lendo do primário", exc_info=exc)
+            replica.healthy = False
+        else:
+            if not replica.healthy:
+                LOGGER.info("Réplica voltou a responder")
+            replica.healthy = True
+            replica.lag_seconds = lag
+        finally:
+            replica.checked_at = time.monotonic()
+            replica.checking = False
+
+    def _usable(self, replica: Replica) -> bool:
+        now = time.monotonic()
+        due = now - replica.checked_at >= self.check_interval_seconds
+        if due and not replica.checking:
+            with self._lock:
+                # Only one thread refreshes; the others use the last result.
+                run = not replica.checking
+                replica.checking = True
+            if run:
+                self.check(replica)
+        return replica.healthy and replica.lag_seconds <= self.max_lag_seconds
+
+    def pick(self) -> Optional[Engine]:
+        """Next usable replica in round-robin order, or None for the primary."""
+        for _ in range(len(self.replicas)):
+            with self._lock:
+                replica = self.replicas[next(self._cycle)]
+            if self._usable(replica):
+                return replica.engine
+        return None
+
+
+class RoutingSession(Session):
+    def __init__(self, *args, replicas: Optional[ReplicaSet] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (
+            self.replicas
+            and self.info.get(READ_ONLY_DEPTH)
+            and self.info.get(REPLICA_ALLOWED)
+            and not self.info.get(WROTE)
+            and not (self.new or self.dirty or self.deleted)
+        ):
+            replica = self.replicas.pick()
+            if replica is not None:
+                return self._with_options(replica)
+        return self._with_options(super().get_bind(mapper=mapper, clause=clause, **kw))
+
+    def _with_options(self, bind):
+        if self.info.get(AUTOCOMMIT) and isinstance(bind, Engine):
+            return _autocommit_engine(bind)
+        return bind
+
+
+@lru_cache(maxsize=None)
+def _autocommit_engine(engine: Engine) -> Engine:
+    # Shares the pool of ``engine``; the isolation level is reset on checkin.
+    return engine.execution_options(isolation_level="AUTOCOMMIT")
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flush(session: Session, flush_context) -> None:
+    session.info[WROTE] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_write(state) -> None:
+    if not state.is_select and not state.session.info.get(READ_ONLY_DEPTH):
+        state.session.info[WROTE] = True
+
+
+@contextmanager
+def use_replica(session: Session) -> Iterator[Session]:
+    """Allow the statements run inside the block to read from a replica."""
+
+    session.info[READ_ONLY_DEPTH] = session.info.get(READ_ONLY_DEPTH, 0) + 1
+    try:
+        yield session
+    finally:
+        session.info[READ_ONLY_DEPTH] -= 1
+
+
+def replica_read(method):
+    """Mark a repository method (``self.db``) as safe to serve from a replica."""
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with use_replica(self.db):
+            return method(self, *args, **kwargs)
+
+    return wrapper
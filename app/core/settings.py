@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Iterable, List
+from typing import Iterable, List, Literal
 
 from pydantic import Field, field_validator, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -24,6 +24,22 @@ class Settings(BaseSettings):
     db_max_overflow: int = Field(default=0, env="DB_MAX_OVERFLOW", ge=0, le=32)
     db_pool_timeout: int = Field(default=20, env="DB_POOL_TIMEOUT", ge=1)
     db_pool_recycle: int = Field(default=1800, env="DB_POOL_RECYCLE", ge=30)
+    db_pool_mode: Literal["queue", "transaction"] = Field(
+        default="queue", env="DB_POOL_MODE"
+    )
+    db_pre_ping_idle_seconds: float = Field(
+        default=30.0, env="DB_PRE_PING_IDLE_SECONDS", ge=0.0
+    )
+    database_replica_urls: str | None = Field(default=None, env="DATABASE_REPLICA_URLS")
+    replica_max_lag_seconds: float = Field(
+        default=5.0, env="REPLICA_MAX_LAG_SECONDS", ge=0.0
+    )
+    replica_check_interval_seconds: float = Field(
+        default=10.0, env="REPLICA_CHECK_INTERVAL_SECONDS", gt=0.0
+    )
+    read_your_writes_seconds: float = Field(
+        default=10.0, env="READ_YOUR_WRITES_SECONDS", ge=1.0
+    )
 
     API_ORIGIN: str = Field(default="https://localhost:5173", env="API_ORIGIN")
     JWT_SECRET: str = Field(env="JWT_SECRET")
@@ -62,6 +78,96 @@ class Settings(BaseSettings):
     auth_rate_limit_max_attempts: int = Field(
         default=10, env="AUTH_RATE_LIMIT_MAX_ATTEMPTS", ge=1
     )
+    auth_rate_limit_max_keys: int = Field(
+        default=100_000, env="AUTH_RATE_LIMIT_MAX_KEYS", ge=1
+    )
+    auth_rate_limit_ip_max_attempts: int = Field(
+        default=300, env="AUTH_RATE_LIMIT_IP_MAX_ATTEMPTS", ge=0
+    )
+    auth_rate_limit_global_max_attempts: int = Field(
+        default=0, env="AUTH_RATE_LIMIT_GLOBAL_MAX_ATTEMPTS", ge=0
+    )
+    rate_limit_redis_timeout_ms: int = Field(
+        default=50, env="RATE_LIMIT_REDIS_TIMEOUT_MS", ge=1
+    )
+    rate_limit_breaker_failures: int = Field(
+        default=3, env="RATE_LIMIT_BREAKER_FAILURES", ge=1
+    )
+    rate_limit_breaker_reset_seconds: float = Field(
+        default=30.0, env="RATE_LIMIT_BREAKER_RESET_SECONDS", gt=0.0
+    )
+    api_rate_limit_window_seconds: int = Field(
+        default=60, env="API_RATE_LIMIT_WINDOW_SECONDS", ge=1
+    )
+    api_rate_limit_write_max_attempts: int = Field(
+        default=60, env="API_RATE_LIMIT_WRITE_MAX_ATTEMPTS", ge=0
+    )
+    api_rate_limit_read_max_attempts: int = Field(
+        default=600, env="API_RATE_LIMIT_READ_MAX_ATTEMPTS", ge=0
+    )
+    api_rate_limit_ip_max_attempts: int = Field(
+        default=0, env="API_RATE_LIMIT_IP_MAX_ATTEMPTS", ge=0
+    )
+    load_shed_pool_wait_ms: float | None = Field(
+        default=None, env="LOAD_SHED_POOL_WAIT_MS", gt=0.0
+    )
+    load_shed_half_life_seconds: float = Field(
+        default=5.0, env="LOAD_SHED_HALF_LIFE_SECONDS", gt=0.0
+    )
+
+    profiler_enabled: bool = Field(default=False, env="PROFILER_ENABLED")
+    profiler_sample_rate: float = Field(
+        default=0.0, env="PROFILER_SAMPLE_RATE", ge=0.0, le=1.0
+    )
+    profiler_interval_ms: float = Field(default=5.0, env="PROFILER_INTERVAL_MS", gt=0.0)
+    profiler_max_per_endpoint: int = Field(
+        default=20, env="PROFILER_MAX_PER_ENDPOINT", ge=1
+    )
+
+    slow_query_threshold_ms: float | None = Field(
+        default=None, env="SLOW_QUERY_THRESHOLD_MS", ge=0.0
+    )
+    slow_query_log_path: str = Field(
+        default="logs/slow_queries.jsonl", env="SLOW_QUERY_LOG_PATH"
+    )
+    slow_query_log_max_bytes: int = Field(
+        default=10 * 1024 * 1024, env="SLOW_QUERY_LOG_MAX_BYTES", ge=1024
+    )
+    slow_query_log_backup_count: int = Field(
+        default=5, env="SLOW_QUERY_LOG_BACKUP_COUNT", ge=0
+    )
+    slow_query_explain: bool = Field(default=True, env="SLOW_QUERY_EXPLAIN")
+    slow_query_explain_cooldown_seconds: int = Field(
+        default=300, env="SLOW_QUERY_EXPLAIN_COOLDOWN_SECONDS", ge=0
+    )
+
+    form_cache_size: int = Field(default=512, env="FORM_CACHE_SIZE", ge=0)
+    form_submission_queue_enabled: bool = Field(
+        default=False, env="FORM_SUBMISSION_QUEUE_ENABLED"
+    )
+    form_submission_queue_batch_size: int = Field(
+        default=50, env="FORM_SUBMISSION_QUEUE_BATCH_SIZE", ge=1
+    )
+    form_submission_queue_idle_ms: int = Field(
+        default=200, env="FORM_SUBMISSION_QUEUE_IDLE_MS", ge=10
+    )
+    job_workers: int = Field(default=2, env="JOB_WORKERS", ge=1, le=32)
+    job_chunk_size: int = Field(default=5000, env="JOB_CHUNK_SIZE", ge=1)
+    job_db_load_budget: float = Field(default=1.0, env="JOB_DB_LOAD_BUDGET", gt=0.0)
+    qr_cache_size: int = Field(default=256, env="QR_CACHE_SIZE", ge=0)
+    qr_cache_dir: str | None = Field(default="cache/qr", env="QR_CACHE_DIR")
+    qr_cache_ttl_seconds: int = Field(
+        default=90 * 24 * 3600, env="QR_CACHE_TTL_SECONDS", ge=60
+    )
+    qr_pregenerate: bool = Field(default=True, env="QR_PREGENERATE")
+    certificate_cache_size: int = Field(default=64, env="CERTIFICATE_CACHE_SIZE", ge=0)
+    certificate_cache_dir: str | None = Field(
+        default="cache/certificates", env="CERTIFICATE_CACHE_DIR"
+    )
+    certificate_prerender: bool = Field(default=True, env="CERTIFICATE_PRERENDER")
+    render_cache_max_files: int = Field(
+        default=10000, env="RENDER_CACHE_MAX_FILES", ge=1
+    )
 
     smtp_host: str | None = Field(default=None, env="SMTP_HOST")
     smtp_port: int = Field(default=587, env="SMTP_PORT")
@@ -161,6 +267,9 @@ class Settings(BaseSettings):
             return self.cors_expose_headers
         return _split_csv(self.cors_expose_headers or "")
 
+    def replica_urls_list(self) -> list[str]:
+        return _split_csv(self.database_replica_urls or "")
+
     def cors_allow_headers_string(self) -> str:
         return ",".join(self.cors_allow_headers_list())
 
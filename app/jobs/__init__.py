@@ -0,0 +1,9 @@
+from app.jobs.runner import (  # noqa: F401
+    JOBS,
+    JobReport,
+    JobRunner,
+    MaintenanceJob,
+    get_job,
+    register_job,
+)
+from app.jobs import tasks  # noqa: F401  # registers the built-in jobs
@@ -0,0 +1,290 @@
+"""Chunked maintenance jobs over id ranges, optionally in a process pool.
+
+A job names the table it walks (``bounds``) and processes one half-open id
+range ``[start, end)`` per call (``process``), committing its own work. The
+runner splits the id space into ranges aligned to multiples of
+``chunk_size``, skips the ranges already recorded in
+``maintenance_job_chunks`` for the run key, and records each finished range
+there, so an interrupted run resumes where it stopped. Ranges are matched by
+their start: when the table grew (or the chunk size changed) a recorded range
+that no longer covers its whole chunk runs again and its row is updated.
+Because a range is recorded after its work is committed, a crash in between
+repeats it: ``process`` must be idempotent.
+
+With ``workers > 1`` ranges run in a spawned process pool, each worker with its
+own single-connection engine (built like the app's, see ``DB_POOL_MODE``).
+``db_load_budget`` caps the summed chunk time per wall-clock second across
+workers (1.0 ~ one busy connection), pacing submissions so a job can run next
+to live traffic.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterator, Optional
+
+from sqlalchemy import create_engine, delete, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.pool import engine_options, install_pool_events
+from app.core.settings import settings
+from app.models.maintenance_job_chunks import (
+    MaintenanceJobChunk as MaintenanceJobChunkORM,
+)
+
+LOGGER = logging.getLogger(__name__)
+
+
+class MaintenanceJob:
+    """Base class for jobs; subclasses set ``name`` and implement both hooks."""
+
+    name: str = ""
+    description: str = ""
+
+    def bounds(self, db: Session, options: dict[str, Any]) -> Optional[tuple[int, int]]:
+        """Return the inclusive ``(min_id, max_id)`` to walk, or None if empty."""
+        raise NotImplementedError
+
+    def process(
+        self, db: Session, start: int, end: int, options: dict[str, Any]
+    ) -> dict[str, int]:
+        """Handle ids in ``[start, end)``, commit, and return counters."""
+        raise NotImplementedError
+
+
+JOBS: dict[str, MaintenanceJob] = {}
+
+
+def register_job(job_cls: type[MaintenanceJob]) -> type[MaintenanceJob]:
+    JOBS[job_cls.name] = job_cls()
+    return job_cls
+
+
+def get_job(name: str) -> MaintenanceJob:
+    try:
+        return JOBS[name]
+    except KeyError:
+        raise ValueError(f"Job '{name}' não cadastrado.") from None
+
+
+def iter_ranges(first: int, last: int, chunk_size: int) -> Iterator[tuple[int, int]]:
+    # Aligned starts keep a chunk's key stable when ``last`` grows between runs.
+    start = first - first % chunk_size
+    while start <= last:
+        end = min(start + chunk_size, last + 1)
+        yield start, end
+        start = end
+
+
+@dataclass
+class JobReport:
+    job: str
+    run_key: str
+    chunks: int = 0
+    skipped: int = 0
+    seconds: float = 0.0
+    stats: dict[str, int] = field(default_factory=dict)
+
+    def merge(self, stats: dict[str, int]) -> None:
+        for key, value in stats.items():
+            self.stats[key] = self.stats.get(key, 0) + int(value)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "job": self.job,
+            "run_key": self.run_key,
+            "chunks": self.chunks,
+            "skipped": self.skipped,
+            "seconds": round(self.seconds, 3),
+            "stats": dict(sorted(self.stats.items())),
+        }
+
+
+# --- worker processes ----------------------------------------------------
+
+_worker_sessions: Optional[sessionmaker] = None
+
+
+def _init_worker(url: str) -> None:
+    global _worker_sessions
+    import app.jobs  # noqa: F401  # registers the jobs in the spawned process
+    import app.models  # noqa: F401  # resolve string relationships
+
+    options = engine_options(url)
+    if "pool_size" in options:
+        # Queue mode: one connection per worker process is all a chunk needs.
+        options.update(pool_size=1, max_overflow=0)
+    engine = create_engine(url, **options)
+    install_pool_events(engine, settings.db_pre_ping_idle_seconds)
+    _worker_sessions = sessionmaker(bind=engine, autoflush=False, future=True)
+
+
+def _run_chunk(
+    job_name: str, start: int, end: int, options: dict[str, Any]
+) -> tuple[int, int, dict[str, int], float]:
+    assert _worker_sessions is not None
+    started = time.perf_counter()
+    with _worker_sessions() as db:
+        stats = get_job(job_name).process(db, start, end, options)
+    return start, end, stats, time.perf_counter() - started
+
+
+class _Throttle:
+    """Sleep until the summed chunk time fits ``budget`` seconds per second."""
+
+    def __init__(self, budget: float) -> None:
+        self.budget = budget
+        self.started = time.monotonic()
+        self.busy = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.busy += seconds
+
+    def wait(self) -> None:
+        ahead = self.busy / self.budget - (time.monotonic() - self.started)
+        if ahead > 0:
+            time.sleep(ahead)
+
+
+class JobRunner:
+    def __init__(
+        self,
+        db: Session,
+        job: MaintenanceJob,
+        *,
+        options: Optional[dict[str, Any]] = None,
+        run_key: Optional[str] = None,
+        workers: int = settings.job_workers,
+        chunk_size: int = settings.job_chunk_size,
+        db_load_budget: float = settings.job_db_load_budget,
+        on_chunk: Optional[Callable[[JobReport, int], None]] = None,
+    ) -> None:
+        if chunk_size <= 0 or workers <= 0 or db_load_budget <= 0:
+            raise ValueError(
+                "workers, chunk_size e db_load_budget devem ser positivos."
+            )
+        self.db = db
+        self.job = job
+        self.options = options or {}
+        self.run_key = run_key or job.name
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.throttle = _Throttle(db_load_budget)
+        # Called with the running report and the number of pending ranges.
+        self.on_chunk = on_chunk
+
+    def reset(self) -> None:
+        """Forget the checkpoints of this run key (start over)."""
+        self.db.execute(
+            delete(MaintenanceJobChunkORM).where(
+                MaintenanceJobChunkORM.run_key == self.run_key
+            )
+        )
+        self.db.commit()
+
+    def _pending_ranges(self, report: JobReport) -> list[tuple[int, int]]:
+        limits = self.job.bounds(self.db, self.options)
+        self.db.commit()
+        if limits is None:
+            return []
+        finished = {
+            row.range_start: row.range_end
+            for row in self.db.execute(
+                select(
+                    MaintenanceJobChunkORM.range_start,
+                    MaintenanceJobChunkORM.range_end,
+                ).where(MaintenanceJobChunkORM.run_key == self.run_key)
+            )
+        }
+        pending = []
+        for chunk in iter_ranges(limits[0], limits[1], self.chunk_size):
+            start, end = chunk
+            if start in finished and finished[start] >= end:
+                report.skipped += 1
+            else:
+                pending.append(chunk)
+        return pending
+
+    def _finish(
+        self,
+        report: JobReport,
+        start: int,
+        end: int,
+        stats: dict[str, int],
+        seconds: float,
+        remaining: int,
+    ) -> None:
+        # A range re-run because it grew replaces its earlier checkpoint.
+        self.db.merge(
+            MaintenanceJobChunkORM(
+                run_key=self.run_key,
+                range_start=start,
+                range_end=end,
+                job=self.job.name,
+                stats=stats,
+                seconds=seconds,
+                finished_at=datetime.now(timezone.utc),
+            )
+        )
+        self.db.commit()
+        self.throttle.record(seconds)
+        report.chunks += 1
+        report.seconds += seconds
+        report.merge(stats)
+        if self.on_chunk is not None:
+            self.on_chunk(report, remaining)
+
+    def run(self) -> JobReport:
+        report = JobReport(job=self.job.name, run_key=self.run_key)
+        pending = self._pending_ranges(report)
+        if self.workers == 1:
+            for index, (start, end) in enumerate(pending, start=1):
+                self.throttle.wait()
+                started = time.perf_counter()
+                stats = self.job.process(self.db, start, end, self.options)
+                self._finish(
+                    report,
+                    start,
+                    end,
+                    stats,
+                    time.perf_counter() - started,
+                    len(pending) - index,
+                )
+            return report
+
+        queue = list(reversed(pending))
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(settings.url,),
+        ) as pool:
+            running: set[Future] = set()
+            while queue or running:
+                while queue and len(running) < self.workers:
+                    self.throttle.wait()
+                    start, end = queue.pop()
+                    running.add(
+                        pool.submit(_run_chunk, self.job.name, start, end, self.options)
+                    )
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        start, end, stats, seconds = future.result()
+                    except Exception:
+                        LOGGER.exception("Job %s falhou", self.job.name)
+                        raise
+                    self._finish(
+                        report,
+                        start,
+                        end,
+                        stats,
+                        seconds,
+                        len(queue) + len(running),
+                    )
+        return report
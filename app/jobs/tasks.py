@@ -0,0 +1,154 @@
+"""Maintenance jobs available to ``python -m app.scripts.run_job``."""
+
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.settings import settings
+from app.jobs.runner import MaintenanceJob, register_job
+from app.models.lk_enrollment_status import LkEnrollmentStatus as LkEnrollmentStatusORM
+from app.models.trail_sections import TrailSections as TrailSectionsORM
+from app.models.trail_certificates import TrailCertificates as TrailCertificatesORM
+from app.models.trails import Trails as TrailsORM
+from app.models.user_trails import UserTrails as UserTrailsORM
+from app.repositories.CertificatesRepository import CertificatesRepository
+from app.services.certificate_documents import prerender
+from app.services.progress_recompute import recompute_enrollment_range
+from app.services.trail_counters import section_counter_values, trail_counter_values
+
+
+def _id_list(options: dict[str, Any], key: str) -> Optional[list[int]]:
+    value = options.get(key)
+    if not value:
+        return None
+    if isinstance(value, str):
+        return [int(part) for part in value.split(",") if part.strip()]
+    return [int(part) for part in value]
+
+
+def _bounds(db: Session, column, *conditions) -> Optional[tuple[int, int]]:
+    low, high = db.execute(
+        select(func.min(column), func.max(column)).where(*conditions)
+    ).one()
+    return None if low is None else (int(low), int(high))
+
+
+@register_job
+class RecomputeProgressJob(MaintenanceJob):
+    name = "recompute_progress"
+    description = "Recalcula progresso e certificados das matrículas (trail_ids=1,2)."
+
+    @staticmethod
+    def _conditions(options: dict[str, Any]) -> list:
+        trail_ids = _id_list(options, "trail_ids")
+        return [UserTrailsORM.trail_id.in_(trail_ids)] if trail_ids else []
+
+    def bounds(self, db: Session, options: dict[str, Any]):
+        return _bounds(db, UserTrailsORM.id, *self._conditions(options))
+
+    def process(self, db: Session, start: int, end: int, options: dict[str, Any]):
+        stats = recompute_enrollment_range(
+            db, start, end, trail_ids=_id_list(options, "trail_ids")
+        )
+        db.commit()
+        return stats.as_dict()
+
+
+@register_job
+class BackfillCertificatesJob(MaintenanceJob):
+    name = "backfill_certificates"
+    description = "Emite os certificados que faltam para matrículas concluídas."
+
+    @staticmethod
+    def _completed(db: Session) -> Optional[int]:
+        return db.execute(
+            select(LkEnrollmentStatusORM.id).where(
+                LkEnrollmentStatusORM.code == "COMPLETED"
+            )
+        ).scalar()
+
+    def bounds(self, db: Session, options: dict[str, Any]):
+        completed = self._completed(db)
+        if completed is None:
+            return None
+        return _bounds(db, UserTrailsORM.id, UserTrailsORM.status_id == completed)
+
+    def process(self, db: Session, start: int, end: int, options: dict[str, Any]):
+        completed = self._completed(db)
+        pairs = db.execute(
+            select(UserTrailsORM.user_id, UserTrailsORM.trail_id).where(
+                UserTrailsORM.id >= start,
+                UserTrailsORM.id < end,
+                UserTrailsORM.status_id == completed,
+            )
+        ).all()
+        issued = CertificatesRepository(db).issue_many(
+            (row.user_id, row.trail_id) for row in pairs
+        )
+        db.commit()
+        return {"enrollments": len(pairs), "certificates": len(issued)}
+
+
+@register_job
+class RepairTrailCountersJob(MaintenanceJob):
+    """Rebuild the counters the trail builder maintains, from the actual rows."""
+
+    name = "repair_trail_counters"
+    description = "Recalcula section_count/item_count/required_item_count das trilhas."
+
+    def bounds(self, db: Session, options: dict[str, Any]):
+        return _bounds(db, TrailsORM.id)
+
+    def process(self, db: Session, start: int, end: int, options: dict[str, Any]):
+        trails = db.execute(
+            update(TrailsORM)
+            .where(TrailsORM.id >= start, TrailsORM.id < end)
+            .values(**trail_counter_values())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        sections = db.execute(
+            update(TrailSectionsORM)
+            .where(TrailSectionsORM.trail_id >= start, TrailSectionsORM.trail_id < end)
+            .values(**section_counter_values())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        return {"trails": trails, "sections": sections}
+
+
+@register_job
+class PregenerateCertificatesJob(MaintenanceJob):
+    """Warm the render cache with the QR code and document of issued certificates."""
+
+    name = "pregenerate_certificates"
+    description = "Pré-gera QR codes e documentos dos certificados (trail_ids=1,2)."
+
+    @staticmethod
+    def _conditions(options: dict[str, Any]) -> list:
+        trail_ids = _id_list(options, "trail_ids")
+        return [TrailCertificatesORM.trail_id.in_(trail_ids)] if trail_ids else []
+
+    def bounds(self, db: Session, options: dict[str, Any]):
+        if not settings.app_base_url:
+            raise ValueError("Defina APP_BASE_URL para pré-gerar certificados.")
+        return _bounds(db, TrailCertificatesORM.id, *self._conditions(options))
+
+    def process(self, db: Session, start: int, end: int, options: dict[str, Any]):
+        hashes = (
+            db.execute(
+                select(TrailCertificatesORM.certificate_hash).where(
+                    TrailCertificatesORM.id >= start,
+                    TrailCertificatesORM.id < end,
+                    *self._conditions(options),
+                )
+            )
+            .scalars()
+            .all()
+        )
+        # Rendering is slow; give the connection back first (prerender opens
+        # its own session for the certificate details).
+        db.commit()
+        return {"certificates": len(hashes), "rendered": prerender(hashes)}
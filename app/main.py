@@ -1,7 +1,7 @@
 from flask import Flask, request
 from flask_cors import CORS as FlaskCORS
 
-from app.core.db import close_db
+from app.core.db import close_db, engine, init_read_your_writes, replicas
 from app.core.settings import settings
 from app.routes.auth import bp as auth_bp
 from app.routes.me import bp as me_bp
@@ -12,12 +12,22 @@ from app.routes.user_trails import bp as user_trails_bp
 from app.routes.forums import bp as forums_bp
 from app.routes.admin import bp as admin_bp
 from app.services.forum_bootstrap import ensure_forum_tables
+from app.services.profiler import init_profiler
+from app.services.request_limits import init_load_shedding
+from app.services.slow_query_log import install_slow_query_log
+
+
+def install_slow_query_logs() -> None:
+    """Log slow statements on the primary and on every read replica."""
+    for db_engine in [engine, *(replica.engine for replica in replicas.replicas)]:
+        install_slow_query_log(db_engine)
 
 
 def create_app() -> Flask:
     app = Flask(__name__)
 
     ensure_forum_tables()
+    install_slow_query_logs()
 
     allowed_origins = settings.cors_allowed_origins_list() or [settings.API_ORIGIN]
 
@@ -67,6 +77,9 @@ def create_app() -> Flask:
     app.register_blueprint(admin_bp)
 
     app.teardown_appcontext(close_db)
+    init_profiler(app)
+    init_load_shedding(app)
+    init_read_your_writes(app)
 
     @app.route("/healthz", methods=["GET", "HEAD"])
     def healthz():
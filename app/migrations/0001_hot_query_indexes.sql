@@ -0,0 +1,45 @@
+-- migrate:no-transaction
+-- Covering/partial indexes for the repository query shapes hit on every request.
+-- CONCURRENTLY avoids write locks on live tables; IF NOT EXISTS keeps the file
+-- re-runnable if a build is interrupted (drop any INVALID leftover first).
+
+-- ForumsRepository.list_posts: WHERE topic_id = ? ORDER BY created_at, id
+-- and the per-topic MAX(created_at)/COUNT(*) subqueries in list_topics.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_forum_posts_topic_created_id
+    ON public.forum_posts (topic_id, created_at, id);
+
+-- ForumsRepository.list_topics / list_forums: WHERE forum_id = ? ORDER BY updated_at.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_forum_topics_forum_updated
+    ON public.forum_topics (forum_id, updated_at DESC);
+
+-- UserTrailsRepository._done_items and get_items_progress: completed counts per
+-- user answered from the index alone.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_uip_user_status_item
+    ON public.user_item_progress (user_id, status_id)
+    INCLUDE (trail_item_id, progress_value, completed_at);
+
+-- Latest attempt per user/form (form submission flow).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_form_submissions_form_user_submitted
+    ON public.form_submissions (form_id, user_id, submitted_at DESC);
+
+-- UserTrailsRepository.find_blocking_item / get_items_progress: items of a trail
+-- in section/order sequence with the completion flags, without heap lookups.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_trail_items_trail_sequence
+    ON public.trail_items (trail_id, section_id, order_index, id)
+    INCLUDE (requires_completion, requires_completion_yn);
+
+-- Admin dashboard: status breakdown and top trails by enrollments.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_user_trails_trail_status
+    ON public.user_trails (trail_id, status_id);
+
+-- Admin dashboard: recent trails / recent certificates.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_trails_created_date_id
+    ON public.trails (created_date DESC NULLS LAST, id DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_trail_certificates_issued_at
+    ON public.trail_certificates (issued_at DESC);
+
+-- ForumsRepository.ensure_general_forum: single row lookup.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_forums_general
+    ON public.forums (id)
+    WHERE is_general IS TRUE;
@@ -0,0 +1,4 @@
+-- Content version of a form, bumped by the trail builder whenever the form, its
+-- questions or its options change. Compiled forms are cached by (id, version).
+-- Adding a column with a constant default is metadata-only on PostgreSQL 11+.
+ALTER TABLE public.forms ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
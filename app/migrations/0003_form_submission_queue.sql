@@ -0,0 +1,20 @@
+-- Durable queue for form submissions accepted with 202 during exam bursts
+-- (FORM_SUBMISSION_QUEUE_ENABLED). The worker claims PENDING rows in id order
+-- with FOR UPDATE SKIP LOCKED, so several workers can drain it side by side.
+CREATE TABLE IF NOT EXISTS public.form_submission_queue (
+    id             BIGSERIAL PRIMARY KEY,
+    ticket         VARCHAR(32) NOT NULL UNIQUE,
+    user_id        BIGINT NOT NULL REFERENCES public.users(user_id) ON DELETE CASCADE,
+    trail_item_id  BIGINT NOT NULL REFERENCES public.trail_items(id) ON DELETE CASCADE,
+    form_id        BIGINT NOT NULL REFERENCES public.forms(id) ON DELETE CASCADE,
+    payload        JSONB NOT NULL,
+    status         VARCHAR(16) NOT NULL,
+    attempts       INTEGER NOT NULL DEFAULT 0,
+    submission_id  BIGINT,
+    result         JSONB,
+    created_at     TIMESTAMPTZ NOT NULL,
+    processed_at   TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS ix_form_submission_queue_pending
+    ON public.form_submission_queue (id) WHERE status = 'PENDING';
@@ -0,0 +1,9 @@
+-- Precomputed student dashboard (/user-trails/me/overview), one row per user.
+-- Enrollment, progress, certificate and trail edits clear payload and bump
+-- generation; the next read rebuilds it.
+CREATE TABLE IF NOT EXISTS public.user_overview_snapshots (
+    user_id      BIGINT PRIMARY KEY REFERENCES public.users(user_id) ON DELETE CASCADE,
+    generation   INTEGER NOT NULL DEFAULT 0,
+    payload      JSONB,
+    computed_at  TIMESTAMPTZ
+);
@@ -0,0 +1,33 @@
+-- Structure counters maintained by the trail builder, so progress and the admin
+-- dashboard read them instead of counting trail_items on every request.
+ALTER TABLE public.trails ADD COLUMN IF NOT EXISTS section_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE public.trails ADD COLUMN IF NOT EXISTS item_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE public.trails ADD COLUMN IF NOT EXISTS required_item_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE public.trail_sections ADD COLUMN IF NOT EXISTS item_count INTEGER NOT NULL DEFAULT 0;
+
+-- Backfill from the current tree.
+UPDATE public.trails t
+   SET section_count = COALESCE(s.total, 0),
+       item_count = COALESCE(i.total, 0),
+       required_item_count = COALESCE(i.required, 0)
+  FROM public.trails base
+  LEFT JOIN (
+        SELECT trail_id, COUNT(*) AS total
+          FROM public.trail_sections
+         GROUP BY trail_id
+       ) s ON s.trail_id = base.id
+  LEFT JOIN (
+        SELECT trail_id,
+               COUNT(*) AS total,
+               COUNT(*) FILTER (
+                   WHERE COALESCE(requires_completion, UPPER(requires_completion_yn) = 'S', FALSE)
+               ) AS required
+          FROM public.trail_items
+         GROUP BY trail_id
+       ) i ON i.trail_id = base.id
+ WHERE t.id = base.id;
+
+UPDATE public.trail_sections s
+   SET item_count = COALESCE(
+        (SELECT COUNT(*) FROM public.trail_items i WHERE i.section_id = s.id), 0
+       );
@@ -0,0 +1,12 @@
+-- Checkpoints of the maintenance job runner (python -m app.scripts.run_job):
+-- one row per finished id range, so an interrupted run resumes where it stopped.
+CREATE TABLE IF NOT EXISTS public.maintenance_job_chunks (
+    run_key      VARCHAR(128) NOT NULL,
+    range_start  BIGINT NOT NULL,
+    range_end    BIGINT NOT NULL,
+    job          VARCHAR(64) NOT NULL,
+    stats        JSONB,
+    seconds      DOUBLE PRECISION NOT NULL DEFAULT 0,
+    finished_at  TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (run_key, range_start)
+);
@@ -0,0 +1,6 @@
+-- migrate:no-transaction
+-- ix_forums_general (0001) indexed forums(id) under WHERE is_general, which the
+-- general-forum lookup never benefits from: forums holds a handful of rows and
+-- is read with a sequential scan. Dropped here rather than edited out of 0001,
+-- which is already applied.
+DROP INDEX CONCURRENTLY IF EXISTS public.ix_forums_general;
@@ -24,6 +24,7 @@ from .forums import Forum, ForumTopic, ForumPost  # noqa: F401
 # Progress / enrollment models
 from .user_trails import UserTrails  # noqa: F401
 from .user_item_progress import UserItemProgress  # noqa: F401
+from .user_overview_snapshots import UserOverviewSnapshot  # noqa: F401
 
 # Forms & assessments
 from .forms import Form  # noqa: F401
@@ -31,3 +32,7 @@ from .form_questions import FormQuestion  # noqa: F401
 from .form_question_options import FormQuestionOption  # noqa: F401
 from .form_submissions import FormSubmission  # noqa: F401
 from .form_answers import FormAnswer  # noqa: F401
+from .form_submission_queue import FormSubmissionQueue  # noqa: F401
+
+# Maintenance
+from .maintenance_job_chunks import MaintenanceJobChunk  # noqa: F401
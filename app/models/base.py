@@ -1,4 +1,12 @@
+from sqlalchemy import JSON, BigInteger, Integer
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import DeclarativeBase
 
+# BIGSERIAL on Postgres; SQLite only autoincrements INTEGER PRIMARY KEY columns.
+BigIntPK = BigInteger().with_variant(Integer, "sqlite")
+# JSONB on Postgres, plain JSON elsewhere.
+JsonDocument = JSON().with_variant(JSONB(), "postgresql")
+
+
 class Base(DeclarativeBase):
     pass
@@ -6,7 +6,7 @@ from typing import TYPE_CHECKING, Optional
 from sqlalchemy import BigInteger, Boolean, ForeignKey, Numeric, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from .base import Base
+from .base import Base, BigIntPK
 
 if TYPE_CHECKING:
     from .form_submissions import FormSubmission
@@ -17,7 +17,7 @@ if TYPE_CHECKING:
 class FormAnswer(Base):
     __tablename__ = "form_answers"
 
-    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    id: Mapped[int] = mapped_column(BigIntPK, primary_key=True, autoincrement=True)
     submission_id: Mapped[int | None] = mapped_column(
         BigInteger, ForeignKey("form_submissions.id", ondelete="CASCADE"), nullable=True
     )
@@ -5,7 +5,7 @@ from typing import TYPE_CHECKING, Optional
 from sqlalchemy import BigInteger, Boolean, ForeignKey, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from .base import Base
+from .base import Base, BigIntPK
 
 if TYPE_CHECKING:
     from .form_questions import FormQuestion
@@ -15,7 +15,7 @@ if TYPE_CHECKING:
 class FormQuestionOption(Base):
     __tablename__ = "form_question_options"
 
-    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    id: Mapped[int] = mapped_column(BigIntPK, primary_key=True, autoincrement=True)
     question_id: Mapped[int | None] = mapped_column(
         BigInteger, ForeignKey("form_question.id", ondelete="CASCADE"), nullable=True
     )
@@ -0,0 +1,49 @@
+# app/models/form_submission_queue.py
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, Integer, String, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base, BigIntPK, JsonDocument
+
+
+class FormSubmissionQueue(Base):
+    """Submissions accepted under load and graded later by the queue worker."""
+
+    __tablename__ = "form_submission_queue"
+    __table_args__ = (
+        Index(
+            "ix_form_submission_queue_pending",
+            "id",
+            postgresql_where=text("status = 'PENDING'"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(BigIntPK, primary_key=True, autoincrement=True)
+    ticket: Mapped[str] = mapped_column(String(32), unique=True, nullable=False)
+    user_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False
+    )
+    trail_item_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("trail_items.id", ondelete="CASCADE"), nullable=False
+    )
+    form_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("forms.id", ondelete="CASCADE"), nullable=False
+    )
+    payload: Mapped[dict[str, Any]] = mapped_column(JsonDocument, nullable=False)
+    # PENDING -> DONE | FAILED
+    status: Mapped[str] = mapped_column(String(16), nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    submission_id: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    result: Mapped[Optional[dict[str, Any]]] = mapped_column(
+        JsonDocument, nullable=True
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+    processed_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
@@ -7,7 +7,7 @@ from typing import TYPE_CHECKING, List, Optional
 from sqlalchemy import BigInteger, Boolean, DateTime, ForeignKey, Integer, Numeric
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from .base import Base
+from .base import Base, BigIntPK
 
 if TYPE_CHECKING:
     from .forms import Form
@@ -18,7 +18,7 @@ if TYPE_CHECKING:
 class FormSubmission(Base):
     __tablename__ = "form_submissions"
 
-    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    id: Mapped[int] = mapped_column(BigIntPK, primary_key=True, autoincrement=True)
     form_id: Mapped[int | None] = mapped_column(
         BigInteger, ForeignKey("forms.id", ondelete="CASCADE"), nullable=True
     )
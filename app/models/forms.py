@@ -3,10 +3,10 @@ from __future__ import annotations
 from decimal import Decimal
 from typing import TYPE_CHECKING, List, Optional
 
-from sqlalchemy import BigInteger, Boolean, ForeignKey, Numeric, String, Text
+from sqlalchemy import BigInteger, Boolean, ForeignKey, Integer, Numeric, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from .base import Base
+from .base import Base, BigIntPK
 
 if TYPE_CHECKING:
     from .trail_items import TrailItems
@@ -17,7 +17,7 @@ if TYPE_CHECKING:
 class Form(Base):
     __tablename__ = "forms"
 
-    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    id: Mapped[int] = mapped_column(BigIntPK, primary_key=True, autoincrement=True)
     trail_item_id: Mapped[int | None] = mapped_column(
         BigInteger,
         ForeignKey("trail_items.id", ondelete="CASCADE"),
@@ -35,6 +35,10 @@ class Form(Base):
     randomize_questions_yn: Mapped[Optional[str]] = mapped_column(
         "randomize_questions_yn", String(1), nullable=True
     )
+    # Bumped on every content change; part of the compiled form cache key.
+    version: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=1, server_default="1"
+    )
 
     trail_item: Mapped["TrailItems"] = relationship(
         "TrailItems", back_populates="form", uselist=False
@@ -0,0 +1,26 @@
+# app/models/maintenance_job_chunks.py
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import BigInteger, DateTime, Float, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base, JsonDocument
+
+
+class MaintenanceJobChunk(Base):
+    """Finished id range of a maintenance job run (see ``app.jobs``)."""
+
+    __tablename__ = "maintenance_job_chunks"
+
+    run_key: Mapped[str] = mapped_column(String(128), primary_key=True)
+    range_start: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    range_end: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    job: Mapped[str] = mapped_column(String(64), nullable=False)
+    stats: Mapped[Optional[dict[str, Any]]] = mapped_column(JsonDocument, nullable=True)
+    seconds: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    finished_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
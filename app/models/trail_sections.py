@@ -19,6 +19,10 @@ class TrailSections(Base):
     )
     title: Mapped[str] = mapped_column(String, nullable=False)
     order_index: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Maintained by the trail builder, like ``Trails.item_count``.
+    item_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
 
     trail: Mapped["Trails"] = relationship(back_populates="sections")
     items: Mapped[List["TrailItems"]] = relationship(
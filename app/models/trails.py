@@ -29,6 +29,16 @@ class Trails(Base):
     )
     author: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     description: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    # Maintained by the trail builder (see ``TrailBuilder._write_counts``).
+    section_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    item_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    required_item_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
 
     sections: Mapped[List["TrailSections"]] = relationship(
         back_populates="trail", cascade="all, delete-orphan"
@@ -3,13 +3,13 @@ from typing import Optional
 from datetime import datetime
 from sqlalchemy import Integer, BigInteger, ForeignKey, DateTime
 from sqlalchemy.orm import Mapped, mapped_column
-from .base import Base
+from .base import Base, BigIntPK
 
 
 class UserItemProgress(Base):
     __tablename__ = "user_item_progress"
 
-    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    id: Mapped[int] = mapped_column(BigIntPK, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(
         ForeignKey("users.user_id", ondelete="CASCADE")
     )
@@ -0,0 +1,35 @@
+# app/models/user_overview_snapshots.py
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base, JsonDocument
+
+
+class UserOverviewSnapshot(Base):
+    """Rendered ``/user-trails/me/overview`` payload, one row per user.
+
+    ``payload`` is cleared and ``generation`` bumped whenever an event changes
+    what the overview shows; a rebuild only stores its result if the generation
+    it started from is still current.
+    """
+
+    __tablename__ = "user_overview_snapshots"
+
+    user_id: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey("users.user_id", ondelete="CASCADE"),
+        primary_key=True,
+        autoincrement=False,
+    )
+    generation: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    payload: Mapped[Optional[dict[str, Any]]] = mapped_column(
+        JsonDocument, nullable=True
+    )
+    computed_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
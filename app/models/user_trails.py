@@ -3,7 +3,6 @@ from typing import Optional
 from datetime import datetime
 from sqlalchemy import (
     Integer,
-    BigInteger,
     ForeignKey,
     DateTime,
     Numeric,
@@ -11,13 +10,13 @@ from sqlalchemy import (
     Text,
 )
 from sqlalchemy.orm import Mapped, mapped_column
-from .base import Base
+from .base import Base, BigIntPK
 
 
 class UserTrails(Base):
     __tablename__ = "user_trails"
 
-    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    id: Mapped[int] = mapped_column(BigIntPK, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(
         ForeignKey("users.user_id", ondelete="CASCADE")
     )
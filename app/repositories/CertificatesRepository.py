@@ -1,59 +1,83 @@
 from __future__ import annotations
 
 import secrets
+from datetime import datetime, timezone
 from typing import Dict, Iterable, Optional
 
-from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
+from app.core.replicas import replica_read
 from app.models.trail_certificates import TrailCertificates as TrailCertificatesORM
 from app.models.users import User as UserORM
 from app.models.trails import Trails as TrailsORM
+from app.repositories.UserOverviewRepository import UserOverviewRepository
+from app.services.certificate_documents import schedule_prerender
+
+TOKEN_BYTES = 16
 
 
 class CertificatesRepository:
     def __init__(self, db: Session):
         self.db = db
 
-    def _generate_token(self, length: int = 16) -> str:
-        # Returns a lower-case hex string with the requested number of characters.
-        return secrets.token_hex(length // 2)
-
-    def _ensure_unique_token(self) -> str:
-        while True:
-            candidate = self._generate_token(16)
-            exists = (
-                self.db.query(TrailCertificatesORM.id)
-                .filter(TrailCertificatesORM.certificate_hash == candidate)
-                .first()
+    def _generate_token(self) -> str:
+        # 128 random bits as 32 lower-case hex chars: far too many to collide,
+        # so uniqueness is left to the constraint instead of probed for.
+        return secrets.token_hex(TOKEN_BYTES)
+
+    def _insert_stmt(self):
+        if self.db.get_bind().dialect.name == "postgresql":
+            return pg_insert(TrailCertificatesORM)
+        return sqlite_insert(TrailCertificatesORM)
+
+    def issue_many(self, pairs: Iterable[tuple[int, int]]) -> list[str]:
+        """Issue certificates for the ``(user_id, trail_id)`` pairs lacking one.
+
+        A single ``INSERT ... ON CONFLICT (user_id, trail_id) DO NOTHING
+        RETURNING``: pairs that already have a certificate, including one a
+        concurrent request just issued, are skipped instead of failing. Returns
+        the hashes of the certificates created by this call.
+        """
+        pending = list(dict.fromkeys((int(u), int(t)) for u, t in pairs))
+        if not pending:
+            return []
+        now = datetime.now(timezone.utc)
+        rows = []
+        for user_id, trail_id in pending:
+            token = self._generate_token()
+            rows.append(
+                {
+                    "user_id": user_id,
+                    "trail_id": trail_id,
+                    "certificate_hash": token,
+                    "credential_id": token,
+                    "issued_at": now,
+                    "issued_at_utc": now.replace(tzinfo=None),
+                }
             )
-            if not exists:
-                return candidate
+        inserted = self.db.execute(
+            self._insert_stmt()
+            .on_conflict_do_nothing(index_elements=["user_id", "trail_id"])
+            .returning(
+                TrailCertificatesORM.user_id, TrailCertificatesORM.certificate_hash
+            ),
+            rows,
+        ).all()
+        if inserted:
+            UserOverviewRepository(self.db).invalidate_users(
+                {row.user_id for row in inserted}
+            )
+        issued = [row.certificate_hash for row in inserted]
+        schedule_prerender(self.db, issued)
+        return issued
 
     def ensure_certificate(self, user_id: int, trail_id: int) -> TrailCertificatesORM:
-        cert = (
-            self.db.query(TrailCertificatesORM)
-            .filter(
-                TrailCertificatesORM.user_id == user_id,
-                TrailCertificatesORM.trail_id == trail_id,
-            )
-            .first()
-        )
-        if cert:
-            return cert
-
-        token = self._ensure_unique_token()
-        now_expr = func.now()
-        cert = TrailCertificatesORM(
-            user_id=user_id,
-            trail_id=trail_id,
-            certificate_hash=token,
-            credential_id=token,
-            issued_at=now_expr,
-            issued_at_utc=now_expr,
-        )
-        self.db.add(cert)
-        self.db.flush()
+        cert = self.get_for_user_trail(user_id, trail_id)
+        if cert is None:
+            self.issue_many([(user_id, trail_id)])
+            cert = self.get_for_user_trail(user_id, trail_id)
         return cert
 
     def get_for_user_trails(
@@ -84,6 +108,7 @@ class CertificatesRepository:
             .first()
         )
 
+    @replica_read
     def get_by_hash(self, certificate_hash: str) -> Optional[TrailCertificatesORM]:
         cleaned = (certificate_hash or "").strip().lower()
         if not cleaned:
@@ -94,6 +119,7 @@ class CertificatesRepository:
             .first()
         )
 
+    @replica_read
     def get_details_by_hash(
         self, certificate_hash: str
     ) -> Optional[tuple[TrailCertificatesORM, UserORM, TrailsORM]]:
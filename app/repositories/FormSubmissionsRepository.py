@@ -0,0 +1,90 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.form_answers import FormAnswer as FormAnswerORM
+from app.models.form_submissions import FormSubmission as FormSubmissionORM
+
+ANSWER_COLUMNS = (
+    "question_id",
+    "selected_option_id",
+    "answer_text",
+    "is_correct",
+    "points_awarded",
+)
+
+
+class FormSubmissionsRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create_submission(
+        self,
+        *,
+        form_id: int,
+        user_id: int,
+        score: Decimal,
+        passed: Optional[bool],
+        duration_seconds: Optional[int],
+        answers: list[dict],
+    ) -> int:
+        """Insert a submission and all its answers; the caller commits.
+
+        Answers go in as one multi-row ``INSERT ... VALUES`` instead of one
+        ORM object per question, so a 200-question quiz is two statements.
+        """
+        [submission_id] = self.create_submissions(
+            [
+                {
+                    "form_id": form_id,
+                    "user_id": user_id,
+                    "score": score,
+                    "passed": passed,
+                    "duration_seconds": duration_seconds,
+                    "answers": answers,
+                }
+            ]
+        )
+        return submission_id
+
+    def create_submissions(self, submissions: list[dict]) -> list[int]:
+        """Insert several submissions (each with an ``answers`` list) at once.
+
+        Returns the new ids in input order. Still two statements in total: one
+        ``INSERT ... RETURNING`` for the submissions and one for every answer.
+        """
+        if not submissions:
+            return []
+        submitted_at = datetime.now(timezone.utc)
+        result = self.db.execute(
+            insert(FormSubmissionORM).returning(
+                FormSubmissionORM.id, sort_by_parameter_order=True
+            ),
+            [
+                {
+                    "form_id": submission["form_id"],
+                    "user_id": submission["user_id"],
+                    "submitted_at": submitted_at,
+                    "score": submission["score"],
+                    "passed": submission["passed"],
+                    "duration_seconds": submission["duration_seconds"],
+                }
+                for submission in submissions
+            ],
+        )
+        submission_ids = list(result.scalars().all())
+
+        answer_rows = [
+            {
+                "submission_id": submission_id,
+                **{column: answer.get(column) for column in ANSWER_COLUMNS},
+            }
+            for submission_id, submission in zip(submission_ids, submissions)
+            for answer in submission["answers"]
+        ]
+        if answer_rows:
+            self.db.execute(insert(FormAnswerORM).values(answer_rows))
+        return submission_ids
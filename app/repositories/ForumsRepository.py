@@ -7,6 +7,7 @@ from typing import Dict, List, Optional, Tuple
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
+from app.core.replicas import replica_read
 from app.models.forums import (
     Forum as ForumORM,
     ForumTopic as ForumTopicORM,
@@ -180,6 +181,7 @@ class ForumsRepository:
             last_activity_at=last_activity or forum.updated_at,
         )
 
+    @replica_read
     def list_topics(
         self, forum_id: int, *, offset: int, limit: int
     ) -> Tuple[List[TopicStats], int]:
@@ -240,6 +242,7 @@ class ForumsRepository:
             return None
         return topic_row, forum_stats
 
+    @replica_read
     def get_topic_stats(self, topic_id: int) -> Optional[TopicStats]:
         posts_count_sq = (
             self.db.query(func.count(ForumPostORM.id))
@@ -273,6 +276,7 @@ class ForumsRepository:
             last_post_at=last_post_at or topic.updated_at,
         )
 
+    @replica_read
     def list_posts(
         self, topic_id: int, *, offset: int, limit: int
     ) -> Tuple[List[PostWithAuthor], int]:
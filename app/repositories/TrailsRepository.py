@@ -1,8 +1,8 @@
 from datetime import date
-from decimal import Decimal
 from typing import List, Tuple
 from sqlalchemy.orm import Session, joinedload, selectinload
 
+from app.core.replicas import replica_read
 from app.models.trails import Trails as TrailsORM
 from app.models.trail_sections import TrailSections as TrailSectionsORM
 from app.models.trail_items import TrailItems as TrailItemsORM
@@ -13,11 +13,10 @@ from app.models.trail_target_audience import (
 )
 from app.models.forms import Form as FormORM
 from app.models.form_questions import FormQuestion as FormQuestionORM
-from app.models.form_question_options import (
-    FormQuestionOption as FormQuestionOptionORM,
-)
 from app.models.lk_item_type import LkItemType as LkItemTypeORM
 from app.models.lk_question_type import LkQuestionType as LkQuestionTypeORM
+from app.repositories.UserOverviewRepository import UserOverviewRepository
+from app.services.trail_builder import TrailBuilder, TrailChangeSet
 
 
 class TrailsRepository:
@@ -31,119 +30,7 @@ class TrailsRepository:
         }
         return item_type_map, question_type_map
 
-    def _persist_sections(
-        self,
-        *,
-        trail_id: int,
-        sections: list[dict],
-        item_type_map: dict[str, int],
-        question_type_map: dict[str, int],
-    ) -> None:
-        for index, section_payload in enumerate(sections):
-            section_order = section_payload.get("order_index")
-            section = TrailSectionsORM(
-                trail_id=trail_id,
-                title=section_payload["title"],
-                order_index=section_order if section_order is not None else index,
-            )
-            self.db.add(section)
-            self.db.flush()
-
-            items_payload = section_payload.get("items") or []
-            for item_index, item_payload in enumerate(items_payload):
-                type_code = (item_payload.get("type") or "").upper()
-                if type_code not in item_type_map:
-                    raise ValueError(f"Tipo de item '{type_code}' não cadastrado.")
-                item_order = item_payload.get("order_index")
-                duration_value = item_payload.get("duration_seconds")
-                if isinstance(duration_value, str):
-                    duration_value = duration_value.strip()
-                    duration_value = int(duration_value) if duration_value else None
-                item = TrailItemsORM(
-                    trail_id=trail_id,
-                    section_id=section.id,
-                    title=item_payload.get("title"),
-                    url=item_payload.get("url"),
-                    duration_seconds=duration_value,
-                    order_index=item_order if item_order is not None else item_index,
-                    item_type_id=item_type_map[type_code],
-                    legacy_type=type_code,
-                    requires_completion=bool(item_payload.get("requires_completion")),
-                )
-                self.db.add(item)
-                self.db.flush()
-
-                if type_code == "FORM":
-                    form_payload = item_payload.get("form") or {}
-                    if not form_payload:
-                        raise ValueError(
-                            "Itens do tipo formulário precisam de dados do formulário."
-                        )
-                    min_score_raw = form_payload.get("min_score_to_pass")
-                    min_score_value = Decimal(str(min_score_raw or 70))
-                    randomize_value = form_payload.get("randomize_questions")
-
-                    form = FormORM(
-                        trail_item_id=item.id,
-                        title=form_payload.get("title"),
-                        description=form_payload.get("description"),
-                        min_score_to_pass=min_score_value,
-                        randomize_questions=(
-                            bool(randomize_value)
-                            if randomize_value is not None
-                            else None
-                        ),
-                    )
-                    self.db.add(form)
-                    self.db.flush()
-
-                    questions_payload = form_payload.get("questions") or []
-                    if not questions_payload:
-                        raise ValueError(
-                            "Formulários precisam de pelo menos uma pergunta."
-                        )
-                    for question_index, question_payload in enumerate(
-                        questions_payload
-                    ):
-                        question_type_code = (
-                            question_payload.get("type") or ""
-                        ).upper()
-                        question_type_id = question_type_map.get(question_type_code)
-                        if question_type_id is None:
-                            raise ValueError(
-                                f"Tipo de questão '{question_type_code}' não cadastrado."
-                            )
-                        points_raw = question_payload.get("points")
-                        points_value = Decimal(str(points_raw or 0))
-                        question = FormQuestionORM(
-                            form_id=form.id,
-                            prompt=question_payload.get("prompt"),
-                            question_type_id=question_type_id,
-                            required=question_payload.get("required"),
-                            order_index=question_payload.get(
-                                "order_index", question_index
-                            ),
-                            points=points_value,
-                        )
-                        self.db.add(question)
-                        self.db.flush()
-
-                        options_payload = question_payload.get("options") or []
-                        if question_type_code != "ESSAY" and not options_payload:
-                            raise ValueError(
-                                "Questões objetivas precisam de alternativas cadastradas."
-                            )
-                        for option_index, option_payload in enumerate(options_payload):
-                            option = FormQuestionOptionORM(
-                                question_id=question.id,
-                                option_text=option_payload.get("text"),
-                                is_correct=bool(option_payload.get("is_correct")),
-                                order_index=option_payload.get(
-                                    "order_index", option_index
-                                ),
-                            )
-                            self.db.add(option)
-
+    @replica_read
     def list_showcase(self, limit: int = 6) -> List[TrailsORM]:
         return (
             self.db.query(TrailsORM)
@@ -152,6 +39,7 @@ class TrailsRepository:
             .all()
         )
 
+    @replica_read
     def list_all(self, offset: int, limit: int) -> Tuple[List[TrailsORM], int]:
         query = self.db.query(TrailsORM)
         total = query.count()
@@ -161,6 +49,7 @@ class TrailsRepository:
     def get_trail(self, trail_id: int) -> TrailsORM | None:
         return self.db.query(TrailsORM).filter(TrailsORM.id == trail_id).first()
 
+    @replica_read
     def list_sections(
         self, trail_id: int, offset: int, limit: int
     ) -> Tuple[List[TrailSectionsORM], int]:
@@ -176,6 +65,7 @@ class TrailsRepository:
         )
         return items, total
 
+    @replica_read
     def list_section_items(
         self, trail_id: int, section_id: int, *, offset: int, limit: int
     ) -> Tuple[List[TrailItemsORM], int]:
@@ -196,6 +86,7 @@ class TrailsRepository:
         )
         return items, total
 
+    @replica_read
     def list_sections_with_items(self, trail_id: int) -> List[TrailSectionsORM]:
         # carrega items e o tipo do item
         return (
@@ -208,6 +99,7 @@ class TrailsRepository:
             .all()
         )
 
+    @replica_read
     def list_included_items(self, trail_id: int) -> List[TrailIncludedItemsORM]:
         return (
             self.db.query(TrailIncludedItemsORM)
@@ -216,6 +108,7 @@ class TrailsRepository:
             .all()
         )
 
+    @replica_read
     def list_requirements(self, trail_id: int) -> List[TrailRequirementsORM]:
         return (
             self.db.query(TrailRequirementsORM)
@@ -224,6 +117,7 @@ class TrailsRepository:
             .all()
         )
 
+    @replica_read
     def list_audience(self, trail_id: int) -> List[TrailTargetAudienceORM]:
         return (
             self.db.query(TrailTargetAudienceORM)
@@ -260,12 +154,11 @@ class TrailsRepository:
         self.db.flush()
 
         item_type_map, question_type_map = self._build_type_maps()
-        self._persist_sections(
-            trail_id=trail.id,
-            sections=sections,
+        TrailBuilder(
+            self.db,
             item_type_map=item_type_map,
             question_type_map=question_type_map,
-        )
+        ).create(trail.id, sections)
 
         self.db.commit()
         self.db.refresh(trail)
@@ -280,36 +173,39 @@ class TrailsRepository:
         description: str | None,
         author: str | None,
         sections: list[dict],
-    ) -> TrailsORM:
-        trail = (
-            self.db.query(TrailsORM)
-            .options(selectinload(TrailsORM.sections))
-            .filter(TrailsORM.id == trail_id)
-            .first()
-        )
+    ) -> Tuple[TrailsORM, TrailChangeSet]:
+        trail = self.db.query(TrailsORM).filter(TrailsORM.id == trail_id).first()
         if not trail:
             raise LookupError("Trail not found")
 
-        trail.name = name
-        trail.thumbnail_url = thumbnail_url
-        trail.description = description
-        trail.author = author
-
-        for section in list(trail.sections):
-            self.db.delete(section)
+        fields = {
+            "name": name,
+            "thumbnail_url": thumbnail_url,
+            "description": description,
+            "author": author,
+        }
+        trail_updated = any(
+            getattr(trail, key) != value for key, value in fields.items()
+        )
+        for key, value in fields.items():
+            setattr(trail, key, value)
         self.db.flush()
 
         item_type_map, question_type_map = self._build_type_maps()
-        self._persist_sections(
-            trail_id=trail.id,
-            sections=sections,
+        builder = TrailBuilder(
+            self.db,
             item_type_map=item_type_map,
             question_type_map=question_type_map,
         )
+        changes = builder.save(trail.id, sections)
+        changes.trail_updated = trail_updated
+        if changes.trail_updated or changes.progress_affected:
+            # Name/thumbnail/author and item totals are shown on dashboards.
+            UserOverviewRepository(self.db).invalidate_trail(trail.id)
 
         self.db.commit()
         self.db.refresh(trail)
-        return trail
+        return trail, changes
 
     def list_admin_trails(self) -> List[TrailsORM]:
         return self.db.query(TrailsORM).order_by(TrailsORM.name).all()
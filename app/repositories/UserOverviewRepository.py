@@ -0,0 +1,76 @@
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.user_overview_snapshots import (
+    UserOverviewSnapshot as UserOverviewSnapshotORM,
+)
+from app.models.user_trails import UserTrails as UserTrailsORM
+
+
+class UserOverviewRepository:
+    """Per-user snapshot of the student dashboard payload."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, user_id: int) -> Optional[UserOverviewSnapshotORM]:
+        return self.db.get(UserOverviewSnapshotORM, user_id, populate_existing=True)
+
+    def reserve(self, user_id: int) -> int:
+        """Return the generation a rebuild starts from, creating the row if needed.
+
+        The row is committed before the rebuild so invalidations that happen
+        while the payload is being computed can bump its generation.
+        """
+        snapshot = self.get(user_id)
+        if snapshot is None:
+            try:
+                with self.db.begin_nested():
+                    self.db.add(UserOverviewSnapshotORM(user_id=user_id, generation=0))
+            except IntegrityError:
+                pass
+            self.db.commit()
+            snapshot = self.get(user_id)
+        return snapshot.generation
+
+    def store(self, user_id: int, generation: int, payload: dict[str, Any]) -> bool:
+        """Save ``payload`` unless the snapshot was invalidated meanwhile."""
+        result = self.db.execute(
+            update(UserOverviewSnapshotORM)
+            .where(
+                UserOverviewSnapshotORM.user_id == user_id,
+                UserOverviewSnapshotORM.generation == generation,
+            )
+            .values(payload=payload, computed_at=datetime.now(timezone.utc))
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+    def invalidate_users(self, user_ids: Iterable[int]) -> None:
+        ids = sorted({int(user_id) for user_id in user_ids})
+        if not ids:
+            return
+        self._invalidate(UserOverviewSnapshotORM.user_id.in_(ids))
+
+    def invalidate_trail(self, trail_id: int) -> None:
+        """Invalidate every user enrolled in ``trail_id`` (trail was edited)."""
+        self._invalidate(
+            UserOverviewSnapshotORM.user_id.in_(
+                select(UserTrailsORM.user_id).where(UserTrailsORM.trail_id == trail_id)
+            )
+        )
+
+    def _invalidate(self, condition) -> None:
+        self.db.execute(
+            update(UserOverviewSnapshotORM)
+            .where(condition)
+            .values(
+                payload=None,
+                generation=UserOverviewSnapshotORM.generation + 1,
+            )
+            .execution_options(synchronize_session=False)
+        )
@@ -29,6 +29,7 @@ class UserProgressRepository:
         progress_value: int | None = None,
         *,
         last_passed_submission_id: Optional[int] = None,
+        commit: bool = True,
     ):
         status_id = self._status_id(status_code)
         completed_status_id = self._status_id("COMPLETED")
@@ -169,5 +170,6 @@ class UserProgressRepository:
         if trail_id is not None:
             UserTrailsRepository(self.db).sync_user_trail_progress(user_id, trail_id)
 
-        self.db.commit()
+        if commit:
+            self.db.commit()
         return uip
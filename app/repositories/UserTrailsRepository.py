@@ -11,7 +11,9 @@ from app.models.lk_enrollment_status import LkEnrollmentStatus as LkEnrollmentSt
 from app.models.trails import Trails as TrailsORM
 
 from app.services.security import get_current_user_id
+from app.services.trail_counters import section_item_total, trail_item_total
 from app.repositories.CertificatesRepository import CertificatesRepository
+from app.repositories.UserOverviewRepository import UserOverviewRepository
 
 
 class UserTrailsRepository:
@@ -34,9 +36,7 @@ class UserTrailsRepository:
 
     def count_items_in_trail(self, trail_id: int) -> int:
         return (
-            self.db.query(func.count(TrailItemsORM.id))
-            .filter(TrailItemsORM.trail_id == trail_id)
-            .scalar()
+            self.db.query(trail_item_total()).filter(TrailsORM.id == trail_id).scalar()
             or 0
         )
 
@@ -76,6 +76,7 @@ class UserTrailsRepository:
                 progress_percent=0,
             )
             self.db.add(ut)
+            UserOverviewRepository(self.db).invalidate_users([user_id])
             self.db.commit()
             created = True
         return ut, created
@@ -112,6 +113,10 @@ class UserTrailsRepository:
         done = self._done_items(user_id, trail_id)
         pct = round(100.0 * done / total, 2) if total > 0 else 0.0
 
+        previous = (
+            float(ut.progress_percent) if ut.progress_percent is not None else None,
+            ut.status_id,
+        )
         ut.progress_percent = pct
 
         completed_status_id = self._enrollment_status_id("COMPLETED")
@@ -120,8 +125,10 @@ class UserTrailsRepository:
         if total > 0 and done >= total:
             if completed_status_id:
                 ut.status_id = completed_status_id
-            ut.completed_at = func.now()
-            ut.completed_at_utc = None
+            # Keep the original completion time on later syncs.
+            if ut.completed_at is None or previous[1] != completed_status_id:
+                ut.completed_at = func.now()
+                ut.completed_at_utc = None
         elif done > 0:
             if in_progress_status_id:
                 ut.status_id = in_progress_status_id
@@ -133,6 +140,8 @@ class UserTrailsRepository:
             ut.completed_at = None
             ut.completed_at_utc = None
 
+        if (float(pct), ut.status_id) != previous:
+            UserOverviewRepository(self.db).invalidate_users([user_id])
         self.db.flush()
 
         if total > 0 and done >= total:
@@ -143,12 +152,8 @@ class UserTrailsRepository:
         if not ids:
             return {}
         rows = (
-            self.db.query(
-                TrailItemsORM.trail_id,
-                func.count(TrailItemsORM.id).label("total"),
-            )
-            .filter(TrailItemsORM.trail_id.in_(ids))
-            .group_by(TrailItemsORM.trail_id)
+            self.db.query(TrailsORM.id, trail_item_total())
+            .filter(TrailsORM.id.in_(ids))
             .all()
         )
         return {trail_id: total for trail_id, total in rows}
@@ -510,28 +515,26 @@ class UserTrailsRepository:
     def get_sections_progress(
         self, user_id: int, trail_id: int
     ) -> List[Dict[str, Any]]:
-        subquery = (
+        # Totals come from trail_sections.item_count; only the user's completed
+        # items are counted here.
+        done_subquery = (
             self.db.query(
                 TrailItemsORM.section_id.label("section_id"),
-                func.count(TrailItemsORM.id).label("total"),
-                func.sum(
-                    case(
-                        (LkProgressStatusORM.code == "COMPLETED", 1),
-                        else_=0,
-                    )
-                ).label("done"),
+                func.count(UserItemProgressORM.id).label("done"),
             )
-            .outerjoin(
+            .join(
                 UserItemProgressORM,
                 (UserItemProgressORM.trail_item_id == TrailItemsORM.id)
                 & (UserItemProgressORM.user_id == user_id),
             )
-            .outerjoin(
+            .join(
                 LkProgressStatusORM,
                 LkProgressStatusORM.id == UserItemProgressORM.status_id,
             )
             .filter(
-                TrailItemsORM.trail_id == trail_id, TrailItemsORM.section_id.isnot(None)
+                TrailItemsORM.trail_id == trail_id,
+                TrailItemsORM.section_id.isnot(None),
+                LkProgressStatusORM.code == "COMPLETED",
             )
             .group_by(TrailItemsORM.section_id)
             .subquery()
@@ -541,10 +544,10 @@ class UserTrailsRepository:
             self.db.query(
                 TrailSectionsORM.id,
                 TrailSectionsORM.title,
-                subquery.c.total,
-                subquery.c.done,
+                section_item_total().label("total"),
+                done_subquery.c.done,
             )
-            .outerjoin(subquery, subquery.c.section_id == TrailSectionsORM.id)
+            .outerjoin(done_subquery, done_subquery.c.section_id == TrailSectionsORM.id)
             .filter(TrailSectionsORM.trail_id == trail_id)
             .order_by(TrailSectionsORM.order_index, TrailSectionsORM.id)
             .all()
@@ -1,183 +1,32 @@
 from __future__ import annotations
 
-from typing import List
-from flask import Blueprint, jsonify, request, g
-from pydantic import BaseModel, Field, ValidationError, field_validator, model_validator
+from flask import Blueprint, Response, jsonify, request, g, stream_with_context
+from pydantic import ValidationError
 from sqlalchemy import case, func
 
-from app.core.db import get_db
+from app.core.db import engine, get_db, pool_wait, replicas
+from app.core.pool import pool_status
 from app.models.users import User
 from app.models.trails import Trails as TrailsORM
-from app.models.trail_sections import TrailSections as TrailSectionsORM
-from app.models.trail_items import TrailItems as TrailItemsORM
 from app.models.trail_certificates import TrailCertificates as TrailCertificatesORM
 from app.models.user_trails import UserTrails as UserTrailsORM
 from app.models.lk_enrollment_status import LkEnrollmentStatus as LkEnrollmentStatusORM
+from app.core.settings import settings
 from app.repositories.TrailsRepository import TrailsRepository
+from app.services.profiler import store as profile_store
 from app.services.security import enforce_csrf, require_roles
+from app.services.trail_archive import (
+    TrailImporter,
+    archive_trail_payload,
+    iter_export,
+)
+from app.services.trail_payload import AdminTrailCreateIn
 from app.routes import format_validation_error
 
 
 bp = Blueprint("admin", __name__, url_prefix="/admin")
 
 
-class AdminFormOptionIn(BaseModel):
-    text: str = Field(..., min_length=1)
-    is_correct: bool = False
-    order_index: int | None = Field(default=None, ge=0)
-
-    @field_validator("text")
-    @classmethod
-    def strip_text(cls, value: str) -> str:
-        cleaned = value.strip()
-        if not cleaned:
-            raise ValueError("Preencha o texto da alternativa.")
-        return cleaned
-
-
-class AdminFormQuestionIn(BaseModel):
-    prompt: str = Field(..., min_length=1)
-    type: str = Field(..., min_length=1)
-    required: bool = True
-    points: float = Field(default=1.0, ge=0)
-    order_index: int | None = Field(default=None, ge=0)
-    options: List[AdminFormOptionIn] = Field(default_factory=list)
-
-    @field_validator("prompt")
-    @classmethod
-    def strip_prompt(cls, value: str) -> str:
-        cleaned = value.strip()
-        if not cleaned:
-            raise ValueError("Informe o enunciado da pergunta.")
-        return cleaned
-
-    @field_validator("type")
-    @classmethod
-    def normalize_question_type(cls, value: str) -> str:
-        normalized = value.strip().upper()
-        allowed = {"ESSAY", "TRUE_OR_FALSE", "SINGLE_CHOICE"}
-        if normalized not in allowed:
-            raise ValueError("Tipo de pergunta inválido.")
-        return normalized
-
-    @model_validator(mode="after")
-    def validate_options(self):
-        if self.type == "ESSAY":
-            self.options = []
-        else:
-            if not self.options:
-                raise ValueError("Adicione alternativas para perguntas objetivas.")
-            if not any(option.is_correct for option in self.options):
-                raise ValueError("Marque pelo menos uma alternativa correta.")
-            if self.type == "TRUE_OR_FALSE" and len(self.options) < 2:
-                raise ValueError(
-                    "Perguntas de verdadeiro ou falso precisam de duas alternativas."
-                )
-        return self
-
-
-class AdminFormIn(BaseModel):
-    title: str | None = None
-    description: str | None = None
-    min_score_to_pass: float = Field(default=70, ge=0)
-    randomize_questions: bool | None = None
-    questions: List[AdminFormQuestionIn] = Field(default_factory=list)
-
-    @field_validator("title", "description")
-    @classmethod
-    def strip_optional(cls, value: str | None) -> str | None:
-        if value is None:
-            return None
-        cleaned = value.strip()
-        return cleaned or None
-
-    @model_validator(mode="after")
-    def ensure_questions(self):
-        if not self.questions:
-            raise ValueError("O formulário precisa de pelo menos uma pergunta.")
-        return self
-
-
-class AdminTrailItemIn(BaseModel):
-    title: str = Field(..., min_length=1, max_length=255)
-    type: str = Field(..., min_length=1, max_length=32)
-    url: str = Field(..., min_length=1)
-    duration_seconds: int | None = Field(default=None, ge=0)
-    requires_completion: bool = False
-    order_index: int | None = Field(default=None, ge=0)
-    form: AdminFormIn | None = None
-
-    @field_validator("title", "type", "url")
-    @classmethod
-    def strip_text(cls, value: str) -> str:
-        cleaned = value.strip()
-        if not cleaned:
-            raise ValueError("Este campo é obrigatório.")
-        return cleaned
-
-    @field_validator("type")
-    @classmethod
-    def normalize_type(cls, value: str) -> str:
-        return value.strip().upper()
-
-    @model_validator(mode="after")
-    def validate_form(self):
-        if self.type == "FORM":
-            if self.form is None:
-                raise ValueError(
-                    "Itens do tipo Formulário precisam de dados do formulário."
-                )
-        else:
-            self.form = None
-        return self
-
-
-class AdminTrailSectionIn(BaseModel):
-    title: str = Field(..., min_length=1, max_length=255)
-    order_index: int | None = Field(default=None, ge=0)
-    items: List[AdminTrailItemIn] = Field(default_factory=list)
-
-    @field_validator("title")
-    @classmethod
-    def strip_title(cls, value: str) -> str:
-        cleaned = value.strip()
-        if not cleaned:
-            raise ValueError("Informe um título para a seção.")
-        return cleaned
-
-
-class AdminTrailCreateIn(BaseModel):
-    name: str = Field(..., min_length=1, max_length=255)
-    thumbnail_url: str = Field(..., min_length=1)
-    description: str | None = None
-    author: str | None = None
-    sections: List[AdminTrailSectionIn] = Field(default_factory=list)
-
-    @field_validator("name", "thumbnail_url")
-    @classmethod
-    def strip_required(cls, value: str) -> str:
-        cleaned = value.strip()
-        if not cleaned:
-            raise ValueError("Este campo é obrigatório.")
-        return cleaned
-
-    @field_validator("author")
-    @classmethod
-    def normalize_optional(cls, value: str | None) -> str | None:
-        if value is None:
-            return None
-        cleaned = value.strip()
-        return cleaned or None
-
-    @field_validator("description")
-    @classmethod
-    def strip_description(cls, value: str | None) -> str | None:
-        if value is None:
-            return None
-        cleaned = value.strip()
-        return cleaned or None
-
-
 @bp.before_request
 def ensure_admin():
     if request.method == "OPTIONS":
@@ -263,23 +112,6 @@ def dashboard():
     if unknown_enrollments:
         enrollment_by_status["UNDEFINED"] = int(unknown_enrollments)
 
-    section_counts = {
-        trail_id: count
-        for trail_id, count in db.query(
-            TrailSectionsORM.trail_id, func.count(TrailSectionsORM.id)
-        )
-        .group_by(TrailSectionsORM.trail_id)
-        .all()
-    }
-    item_counts = {
-        trail_id: count
-        for trail_id, count in db.query(
-            TrailItemsORM.trail_id, func.count(TrailItemsORM.id)
-        )
-        .group_by(TrailItemsORM.trail_id)
-        .all()
-    }
-
     recent_trails = (
         db.query(TrailsORM)
         .order_by(TrailsORM.created_date.desc().nullslast(), TrailsORM.id.desc())
@@ -293,8 +125,9 @@ def dashboard():
             "created_date": (
                 trail.created_date.isoformat() if trail.created_date else None
             ),
-            "sections": int(section_counts.get(trail.id, 0)),
-            "items": int(item_counts.get(trail.id, 0)),
+            "sections": int(trail.section_count or 0),
+            "items": int(trail.item_count or 0),
+            "required_items": int(trail.required_item_count or 0),
         }
         for trail in recent_trails
     ]
@@ -466,7 +299,7 @@ def update_trail(trail_id: int):
     ]
 
     try:
-        trail = repo.update_trail(
+        trail, changes = repo.update_trail(
             trail_id=trail_id,
             name=payload.name,
             thumbnail_url=payload.thumbnail_url,
@@ -484,4 +317,98 @@ def update_trail(trail_id: int):
         db.rollback()
         raise
 
-    return jsonify({"trail": {"id": trail.id, "name": trail.name}})
+    return jsonify(
+        {"trail": {"id": trail.id, "name": trail.name}, "changes": changes.as_dict()}
+    )
+
+
+@bp.get("/trails/export")
+def export_trails():
+    raw_ids = request.args.get("ids")
+    trail_ids = None
+    if raw_ids:
+        try:
+            trail_ids = [int(value) for value in raw_ids.split(",") if value.strip()]
+        except ValueError:
+            return jsonify({"detail": "Parâmetro ids inválido."}), 400
+
+    db = get_db()
+    return Response(
+        stream_with_context(iter_export(db, trail_ids=trail_ids)),
+        mimetype="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="trilhas.ndjson"'},
+    )
+
+
+@bp.post("/trails/import")
+def import_trails():
+    enforce_csrf()
+
+    db = get_db()
+    admin = g.current_admin
+    importer = TrailImporter(
+        db,
+        validate=archive_trail_payload,
+        created_by=getattr(admin, "user_id", None),
+        dry_run=request.args.get("dry_run") in {"1", "true"},
+    )
+    try:
+        report = importer.run(request.stream)
+    except ValueError as exc:
+        db.rollback()
+        return jsonify({"detail": str(exc)}), 400
+    except Exception:
+        db.rollback()
+        raise
+
+    return jsonify(report.as_dict())
+
+
+@bp.get("/profiles")
+def list_profiles():
+    try:
+        limit = min(max(int(request.args.get("limit", 20)), 1), 100)
+    except ValueError:
+        limit = 20
+    endpoint = request.args.get("endpoint") or None
+    profiles = []
+    for capture in profile_store.slowest(limit=limit, endpoint=endpoint):
+        summary = capture.summary()
+        slowest_sql = sorted(capture.sql, key=lambda item: item.duration_ms)[-5:]
+        summary["slowest_sql"] = [
+            {"statement": item.statement, "duration_ms": round(item.duration_ms, 3)}
+            for item in reversed(slowest_sql)
+        ]
+        profiles.append(summary)
+    return jsonify({"enabled": settings.profiler_enabled, "profiles": profiles})
+
+
+@bp.get("/profiles/<string:profile_id>")
+def get_profile(profile_id: str):
+    capture = profile_store.get(profile_id)
+    if not capture:
+        return jsonify({"detail": "Perfil não encontrado."}), 404
+    if request.args.get("format") == "collapsed":
+        return Response(capture.collapsed(), mimetype="text/plain")
+    return jsonify({"profile": capture.detail()})
+
+
+@bp.get("/db/pool")
+def db_pool_status():
+    return jsonify(
+        {
+            "mode": settings.db_pool_mode,
+            "pre_ping_idle_seconds": settings.db_pre_ping_idle_seconds,
+            "pool_wait_ms": round(pool_wait.wait_ms, 3),
+            "primary": pool_status(engine),
+            "replicas": [
+                {
+                    "host": replica.engine.url.host,
+                    "healthy": replica.healthy,
+                    "lag_seconds": replica.lag_seconds,
+                    **pool_status(replica.engine),
+                }
+                for replica in replicas.replicas
+            ],
+        }
+    )
@@ -6,7 +6,7 @@ from flask import Blueprint, jsonify, request, abort
 from werkzeug.exceptions import Unauthorized
 from pydantic import ValidationError
 
-from app.core.db import get_db
+from app.core.db import get_db, release_db
 from app.models.users import (
     RegisterIn,
     LoginIn,
@@ -28,7 +28,7 @@ from app.services.security import (
     decode_password_reset_token,
 )
 from app.repositories.UsersRepository import UsersRepository
-from app.services.rate_limiter import check_auth_rate_limit
+from app.services.rate_limiter import auth_rate_limits, check_auth_rate_limits
 from app.services.email import (
     send_welcome_email,
     send_password_reset_email,
@@ -49,11 +49,13 @@ def _client_identifier() -> str:
 
 
 def _rate_limited_response(scope: str, *, identifier: str | None = None):
-    parts = [scope]
-    if identifier:
-        parts.append(identifier.lower())
-    parts.append(_client_identifier())
-    retry_after = check_auth_rate_limit(":".join(parts))
+    retry_after = check_auth_rate_limits(
+        auth_rate_limits(
+            scope,
+            _client_identifier(),
+            identifier.lower() if identifier else None,
+        )
+    )
     if retry_after is None:
         return None
     wait_seconds = max(1, math.ceil(retry_after))
@@ -110,6 +112,7 @@ def register():
     )
 
     user_out = UserOut.from_orm_user(user).model_dump(mode="json")
+    release_db()
     send_welcome_email(email=user.email, name=user.name_for_certificate)
     response = jsonify({"user": user_out})
     set_session_cookie(response, token, remember=payload.remember)
@@ -135,6 +138,7 @@ def forgot_password():
     user = repo.GetUserByEmail(payload.email)
     if user:
         token = generate_password_reset_token(user)
+        release_db()
         send_password_reset_email(
             email=user.email,
             name=user.name_for_certificate,
@@ -162,6 +166,7 @@ def reset_password():
         return jsonify({"detail": "Token inválido"}), 401
 
     repo.UpdatePassword(user, hash_password(payload.new_password))
+    release_db()
     send_password_changed_notification(
         email=user.email,
         name=user.name_for_certificate,
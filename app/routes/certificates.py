@@ -1,23 +1,35 @@
 from __future__ import annotations
 
-import base64
-import io
 from datetime import datetime
-from functools import lru_cache
 
-from flask import Blueprint, jsonify, abort, request
+from flask import Blueprint, Response, jsonify, abort, request, url_for
 from pydantic import BaseModel
 
-import segno
-
-from app.core.db import get_db
+from app.core.db import get_db, read_only_session, release_db
+from app.core.settings import settings
 from app.repositories.CertificatesRepository import CertificatesRepository
 from app.repositories.UserTrailsRepository import UserTrailsRepository
+from app.services.certificate_documents import (
+    CertificateDocumentData,
+    get_certificate_svg,
+    iter_chunks,
+)
+from app.services.certificate_qr import QR_MIMETYPES, qr_cache, qr_cache_key
+from app.services.certificate_qr import verification_url as build_verification_url
 from app.services.security import get_current_user
 
 
 bp = Blueprint("certificates", __name__, url_prefix="/certificates")
 
+# A QR URL carries its content key (``?v=``, from the verification URL and
+# the render version), so the image behind it never changes. A request without
+# a matching key gets the current image, revalidated like a document.
+QR_CACHE_CONTROL = "public, max-age=31536000, immutable"
+QR_KEY_LENGTH = 16
+# A document shows the current name on record, so caches revalidate it (by
+# ETag, without rendering) once it is a few minutes old.
+DOCUMENT_CACHE_CONTROL = "public, max-age=300"
+
 
 def _format_datetime(dt: datetime | None) -> str | None:
     if not dt:
@@ -27,17 +39,41 @@ def _format_datetime(dt: datetime | None) -> str | None:
     return dt.isoformat()
 
 
-@lru_cache(maxsize=256)
-def _cached_qr_data_uri(payload: str) -> str:
-    qr = segno.make(payload, error="m")
-    buf = io.BytesIO()
-    qr.save(buf, kind="png", scale=6)
-    encoded = base64.b64encode(buf.getvalue()).decode("ascii")
-    return f"data:image/png;base64,{encoded}"
+def _requested_verify_base() -> str | None:
+    """``?verify_base=`` when it is one of our own origins, else None.
+
+    The base is part of the QR and document cache keys, so arbitrary values
+    would let anyone fill the render cache.
+    """
+
+    value = (request.args.get("verify_base") or "").strip().rstrip("/")
+    allowed = {origin.rstrip("/") for origin in settings.cors_origin_set}
+    if settings.app_base_url:
+        allowed.add(settings.app_base_url.rstrip("/"))
+    return value if value in allowed else None
+
+
+def _verification_url(certificate_hash: str) -> str:
+    verify_base = _requested_verify_base() or settings.app_base_url or request.url_root
+    return build_verification_url(certificate_hash, verify_base)
 
 
 def _qr_data_uri(payload: str) -> str:
-    return _cached_qr_data_uri(payload)
+    return qr_cache.data_uri(payload)
+
+
+def _qr_url(certificate_hash: str, verification_url: str) -> str:
+    params = {"v": qr_cache_key(verification_url, "png")[:QR_KEY_LENGTH]}
+    verify_base = _requested_verify_base()
+    if verify_base:
+        params["verify_base"] = verify_base
+    return url_for(
+        "certificates.get_certificate_qr",
+        certificate_hash=certificate_hash,
+        kind="png",
+        _external=True,
+        **params,
+    )
 
 
 class CertificateResponse(BaseModel):
@@ -48,10 +84,31 @@ class CertificateResponse(BaseModel):
     certificate_hash: str
     issued_at: str | None
     verification_url: str
-    qr_code_data_uri: str
+    qr_code_url: str
+    qr_code_data_uri: str | None = None
+
+
+def _certificate_payload(cert, user, trail) -> dict:
+    verification_url = _verification_url(cert.certificate_hash)
+    # The inline image is opt-in; clients should load ``qr_code_url`` instead,
+    # which browsers and proxies cache.
+    inline = request.args.get("qr") == "inline"
+    payload = CertificateResponse(
+        trail_id=trail.id,
+        trail_title=trail.name,
+        student_name=user.name_for_certificate,
+        credential_id=cert.credential_id,
+        certificate_hash=cert.certificate_hash,
+        issued_at=_format_datetime(cert.issued_at),
+        verification_url=verification_url,
+        qr_code_url=_qr_url(cert.certificate_hash, verification_url),
+        qr_code_data_uri=_qr_data_uri(verification_url) if inline else None,
+    )
+    return payload.model_dump(mode="json")
 
 
 @bp.get("/<string:certificate_hash>")
+@read_only_session
 def get_certificate(certificate_hash: str):
     db = get_db()
     repo = CertificatesRepository(db)
@@ -60,21 +117,61 @@ def get_certificate(certificate_hash: str):
         abort(404, description="Certificado não encontrado")
 
     cert, user, trail = row
-    verify_base = request.args.get("verify_base") or request.url_root
-    verify_base = verify_base.rstrip("/")
-    verification_url = f"{verify_base}/certificados/?cert_hash={cert.certificate_hash}"
+    return jsonify(_certificate_payload(cert, user, trail))
+
+
+@bp.get("/<string:certificate_hash>/qr.<any(png, svg):kind>")
+def get_certificate_qr(certificate_hash: str, kind: str):
+    cleaned = certificate_hash.strip().lower()
+    payload = _verification_url(cleaned)
+    etag = qr_cache_key(payload, kind)
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        db = get_db()
+        if CertificatesRepository(db).get_by_hash(cleaned) is None:
+            abort(404, description="Certificado não encontrado")
+        response = Response(
+            qr_cache.get_image(payload, kind), mimetype=QR_MIMETYPES[kind]
+        )
+    response.set_etag(etag)
+    versioned = request.args.get("v") == etag[:QR_KEY_LENGTH]
+    response.headers["Cache-Control"] = (
+        QR_CACHE_CONTROL if versioned else DOCUMENT_CACHE_CONTROL
+    )
+    # The certificate page loads the image with CORS (to print it), and the
+    # CORS headers depend on the requesting origin.
+    response.vary.add("Origin")
+    return response
 
-    payload = CertificateResponse(
-        trail_id=trail.id,
-        trail_title=trail.name,
-        student_name=user.name_for_certificate,
-        credential_id=cert.credential_id,
-        certificate_hash=cert.certificate_hash,
-        issued_at=_format_datetime(cert.issued_at),
-        verification_url=verification_url,
-        qr_code_data_uri=_qr_data_uri(verification_url),
+
+@bp.get("/<string:certificate_hash>/document.svg")
+@read_only_session
+def get_certificate_document(certificate_hash: str):
+    db = get_db()
+    row = CertificatesRepository(db).get_details_by_hash(certificate_hash)
+    if not row:
+        abort(404, description="Certificado não encontrado")
+
+    cert, user, trail = row
+    data = CertificateDocumentData.from_row(
+        cert, user, trail, _verification_url(cert.certificate_hash)
     )
-    return jsonify(payload.model_dump(mode="json"))
+    release_db()
+    etag = data.cache_key
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        document = get_certificate_svg(data)
+        response = Response(iter_chunks(document), mimetype="image/svg+xml")
+        response.content_length = len(document)
+        disposition = "attachment" if request.args.get("download") else "inline"
+        response.headers["Content-Disposition"] = (
+            f'{disposition}; filename="certificado-{cert.certificate_hash}.svg"'
+        )
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = DOCUMENT_CACHE_CONTROL
+    return response
 
 
 @bp.route("/me/trails/<int:trail_id>", methods=["GET", "OPTIONS"])
@@ -92,19 +189,4 @@ def get_certificate_for_my_trail(trail_id: int):
             abort(404, description="Certificado não encontrado para esta trilha")
 
     cert, user_model, trail = row
-
-    verify_base = request.args.get("verify_base") or request.url_root
-    verify_base = verify_base.rstrip("/")
-    verification_url = f"{verify_base}/certificados/?cert_hash={cert.certificate_hash}"
-
-    payload = CertificateResponse(
-        trail_id=trail.id,
-        trail_title=trail.name,
-        student_name=user_model.name_for_certificate,
-        credential_id=cert.credential_id,
-        certificate_hash=cert.certificate_hash,
-        issued_at=_format_datetime(cert.issued_at),
-        verification_url=verification_url,
-        qr_code_data_uri=_qr_data_uri(verification_url),
-    )
-    return jsonify(payload.model_dump(mode="json"))
+    return jsonify(_certificate_payload(cert, user_model, trail))
@@ -8,6 +8,7 @@ from pydantic import BaseModel, ValidationError, field_validator, Field
 
 from app.core.db import get_db
 from app.repositories.ForumsRepository import ForumsRepository
+from app.services.request_limits import rate_limited
 from app.services.security import enforce_csrf, get_current_user
 from app.services.sanitizer import sanitize_user_html
 
@@ -258,6 +259,7 @@ def list_topics(forum_id: int):
 
 
 @bp.post("/<int:forum_id>/topics")
+@rate_limited("write")
 def create_topic(forum_id: int):
     db = get_db()
     repo = ForumsRepository(db)
@@ -343,6 +345,7 @@ def list_posts(topic_id: int):
 
 
 @bp.post("/topics/<int:topic_id>/posts")
+@rate_limited("write")
 def create_post(topic_id: int):
     db = get_db()
     repo = ForumsRepository(db)
@@ -1,27 +1,29 @@
 # app/routes/trail_items.py
 from __future__ import annotations
 
-from datetime import datetime, timezone
-from decimal import Decimal
-from typing import Dict, Literal, Optional, Tuple
+from typing import Literal, Optional, Tuple
 from urllib.parse import urlparse
 import os
+import time
 
 from flask import Blueprint, abort, jsonify, request
 from pydantic import BaseModel, ValidationError, field_validator
 from sqlalchemy.orm import selectinload
 
 from app.core.db import get_db
-from app.models.form_answers import FormAnswer as FormAnswerORM
-from app.models.form_question_options import (
-    FormQuestionOption as FormQuestionOptionORM,
-)
-from app.models.form_questions import FormQuestion as FormQuestionORM
-from app.models.form_submissions import FormSubmission as FormSubmissionORM
-from app.models.forms import Form as FormORM
+from app.core.settings import settings
 from app.models.trail_items import TrailItems as TrailItemsORM
 from app.repositories.UserTrailsRepository import UserTrailsRepository
-from app.repositories.UserProgressRepository import UserProgressRepository
+from app.services.form_cache import CompiledForm, get_compiled_form
+from app.services.form_submissions import (
+    QUEUE_PENDING,
+    SubmissionRejected,
+    enqueue_submission,
+    get_queued_submission,
+    grade_submission,
+    persist_graded,
+)
+from app.services.request_limits import rate_limited
 from app.services.security import enforce_csrf, get_current_user
 from app.routes import format_validation_error
 
@@ -32,6 +34,9 @@ bp = Blueprint("trail_items", __name__, url_prefix="/trails")
 QuestionKind = Literal["ESSAY", "TRUE_OR_FALSE", "SINGLE_CHOICE", "UNKNOWN"]
 ResourceKind = Literal["PDF", "IMAGE", "OTHER"]
 
+MAX_POLL_WAIT_SECONDS = 25.0
+POLL_INTERVAL_SECONDS = 0.25
+
 
 class FormOptionOut(BaseModel):
     id: int
@@ -121,21 +126,6 @@ def _extract_youtube_id(url: str) -> str:
     return m.group(1) if m else ""
 
 
-def _question_type_code(question: FormQuestionORM) -> QuestionKind:
-    code = question.question_type.code if question.question_type else None
-    if code in {"ESSAY", "TRUE_OR_FALSE", "SINGLE_CHOICE"}:
-        return code  # type: ignore[return-value]
-    return "UNKNOWN"
-
-
-def _option_is_correct(option: FormQuestionOptionORM) -> Optional[bool]:
-    if option.is_correct is not None:
-        return option.is_correct
-    if option.is_correct_yn is not None:
-        return option.is_correct_yn.upper() == "Y"
-    return None
-
-
 def _classify_resource(url: str) -> Tuple[Optional[str], Optional[ResourceKind]]:
     cleaned = (url or "").strip()
     if not cleaned:
@@ -152,22 +142,6 @@ def _classify_resource(url: str) -> Tuple[Optional[str], Optional[ResourceKind]]
     return cleaned, "OTHER"
 
 
-def _question_is_required(question: FormQuestionORM) -> bool:
-    if question.required is not None:
-        return bool(question.required)
-    if question.required_yn is not None:
-        return question.required_yn.upper() == "Y"
-    return False
-
-
-def _form_randomize(form: FormORM) -> Optional[bool]:
-    if form.randomize_questions is not None:
-        return bool(form.randomize_questions)
-    if form.randomize_questions_yn is not None:
-        return form.randomize_questions_yn.upper() == "S"
-    return None
-
-
 def _load_item(db, trail_id: int, item_id: int) -> TrailItemsORM:
     item = (
         db.query(TrailItemsORM)
@@ -180,16 +154,8 @@ def _load_item(db, trail_id: int, item_id: int) -> TrailItemsORM:
     return item
 
 
-def _load_form(db, trail_item_id: int) -> FormORM:
-    form = (
-        db.query(FormORM)
-        .options(
-            selectinload(FormORM.questions).selectinload(FormQuestionORM.options),
-            selectinload(FormORM.questions).selectinload(FormQuestionORM.question_type),
-        )
-        .filter(FormORM.trail_item_id == trail_item_id)
-        .first()
-    )
+def _require_form(db, trail_item_id: int) -> CompiledForm:
+    form = get_compiled_form(db, trail_item_id)
     if not form:
         abort(404, description="Formulário não encontrado para este item")
     return form
@@ -294,40 +260,32 @@ def get_item_detail(trail_id: int, item_id: int):
     form_payload: Optional[FormOut] = None
 
     if item_type == "FORM":
-        form = _load_form(db, item.id)
-        questions_out: list[FormQuestionOut] = []
-        for question in sorted(form.questions, key=lambda q: (q.order_index, q.id)):
-            q_type = _question_type_code(question)
-            options_out: list[FormOptionOut] = []
-            for option in sorted(question.options, key=lambda o: (o.order_index, o.id)):
-                option_text = option.option_text or ""
-                options_out.append(
-                    FormOptionOut(
-                        id=option.id,
-                        text=option_text,
-                        order_index=option.order_index or 0,
-                    )
-                )
-
-            questions_out.append(
-                FormQuestionOut(
-                    id=question.id,
-                    prompt=question.prompt or "",
-                    type=q_type,
-                    required=_question_is_required(question),
-                    order_index=question.order_index or 0,
-                    points=float(question.points or Decimal("0")),
-                    options=options_out,
-                )
-            )
-
+        form = _require_form(db, item.id)
         form_payload = FormOut(
             id=form.id,
             title=form.title,
             description=form.description,
-            min_score_to_pass=float(form.min_score_to_pass or Decimal("0")),
-            randomize_questions=_form_randomize(form),
-            questions=questions_out,
+            min_score_to_pass=float(form.min_score_to_pass),
+            randomize_questions=form.randomize_questions,
+            questions=[
+                FormQuestionOut(
+                    id=question.id,
+                    prompt=question.prompt,
+                    type=question.type,
+                    required=question.required,
+                    order_index=question.order_index,
+                    points=float(question.points),
+                    options=[
+                        FormOptionOut(
+                            id=option.id,
+                            text=option.text,
+                            order_index=option.order_index,
+                        )
+                        for option in question.options
+                    ],
+                )
+                for question in form.questions
+            ],
         )
         description_html = form.description or ""
     elif item_type == "DOC":
@@ -354,6 +312,7 @@ def get_item_detail(trail_id: int, item_id: int):
 
 
 @bp.post("/<int:trail_id>/items/<int:item_id>/form-submissions")
+@rate_limited("write")
 def submit_form(trail_id: int, item_id: int):
     db = get_db()
     payload_raw = request.get_json(silent=True) or {}
@@ -375,190 +334,78 @@ def submit_form(trail_id: int, item_id: int):
     if blocker:
         return _build_locked_response(blocker)
 
-    form = _load_form(db, item.id)
+    form = _require_form(db, item.id)
 
     # garante matrícula
     user_trail_repo.ensure_enrollment(user.user_id, trail_id)
 
-    question_map: Dict[int, FormQuestionORM] = {
-        question.id: question
-        for question in sorted(form.questions, key=lambda q: (q.order_index, q.id))
-    }
-
-    provided_answers = {answer.question_id: answer for answer in payload.answers}
-
-    invalid_questions = [
-        answer.question_id
-        for answer in payload.answers
-        if answer.question_id not in question_map
-    ]
-    if invalid_questions:
-        return (
-            jsonify(
-                {
-                    "detail": "Uma ou mais questões informadas são inválidas para este formulário",
-                    "invalid_questions": invalid_questions,
-                }
-            ),
-            422,
-        )
-
-    missing_required = [
-        q.id
-        for q in question_map.values()
-        if _question_is_required(q)
-        and (
-            q.id not in provided_answers or not _has_response(provided_answers[q.id], q)
+    answers = [answer.model_dump() for answer in payload.answers]
+    try:
+        graded = grade_submission(form, answers)
+    except SubmissionRejected as exc:
+        return jsonify(exc.body), 422
+
+    if settings.form_submission_queue_enabled:
+        ticket = enqueue_submission(
+            db,
+            user_id=user.user_id,
+            trail_item_id=item.id,
+            form=form,
+            answers=answers,
+            duration_seconds=payload.duration_seconds,
         )
-    ]
-    if missing_required:
+        db.commit()
         return (
             jsonify(
                 {
-                    "detail": "Responda todas as questões obrigatórias",
-                    "missing_questions": missing_required,
+                    "ticket": ticket,
+                    "status": QUEUE_PENDING,
+                    "poll_url": f"/trails/{trail_id}/items/{item_id}/form-submissions/{ticket}",
                 }
             ),
-            422,
+            202,
         )
 
-    auto_total_points = Decimal("0")
-    auto_scored_points = Decimal("0")
-    requires_manual_review = False
-    answer_outputs: list[FormSubmissionAnswerOut] = []
-    answer_entities: list[FormAnswerORM] = []
-
-    for question in question_map.values():
-        q_type = _question_type_code(question)
-        answer_in = provided_answers.get(question.id)
-
-        if q_type == "ESSAY":
-            response_text = (
-                answer_in.answer_text.strip()
-                if answer_in and answer_in.answer_text
-                else None
-            )
-            if _question_is_required(question) or response_text:
-                requires_manual_review = True
-            answer_entities.append(
-                FormAnswerORM(
-                    question_id=question.id,
-                    answer_text=response_text,
-                    is_correct=None,
-                    points_awarded=None,
-                )
-            )
-            answer_outputs.append(
-                FormSubmissionAnswerOut(
-                    question_id=question.id,
-                    is_correct=None,
-                    points_awarded=None,
-                )
-            )
-            continue
-
-        # perguntas objetivas
-        points_value = question.points if question.points is not None else Decimal("0")
-        auto_total_points += points_value
-        selected_option_id = answer_in.selected_option_id if answer_in else None
-
-        selected_option: Optional[FormQuestionOptionORM] = None
-        if selected_option_id is not None:
-            selected_option = next(
-                (opt for opt in question.options if opt.id == selected_option_id),
-                None,
-            )
-            if not selected_option:
-                return (
-                    jsonify(
-                        {
-                            "detail": f"Opção inválida para a questão {question.id}",
-                            "question_id": question.id,
-                        }
-                    ),
-                    422,
-                )
-
-        is_correct = False
-        points_awarded: Decimal | None = Decimal("0")
-        if selected_option is not None:
-            option_correct = _option_is_correct(selected_option)
-            is_correct = option_correct is True
-            if option_correct is True:
-                auto_scored_points += points_value
-                points_awarded = points_value
-        else:
-            is_correct = False
-
-        answer_entities.append(
-            FormAnswerORM(
-                question_id=question.id,
-                selected_option_id=selected_option.id if selected_option else None,
-                is_correct=is_correct,
-                points_awarded=points_awarded,
-            )
-        )
-        answer_outputs.append(
-            FormSubmissionAnswerOut(
-                question_id=question.id,
-                is_correct=is_correct,
-                points_awarded=(
-                    float(points_awarded) if points_awarded is not None else None
-                ),
-            )
-        )
-
-    max_points = float(auto_total_points) if auto_total_points > 0 else 0.0
-    score_points = float(auto_scored_points)
-    score_percent = (
-        float((auto_scored_points / auto_total_points) * Decimal(100))
-        if auto_total_points > 0
-        else 0.0
-    )
-
-    min_score = float(form.min_score_to_pass or Decimal("0"))
-    passed: Optional[bool]
-    if requires_manual_review:
-        passed = None
-    else:
-        passed = score_percent >= min_score
-
-    submission = FormSubmissionORM(
-        form_id=form.id,
+    # Submission, answers and the progress update share one transaction.
+    submission_id = persist_graded(
+        db,
+        form=form,
         user_id=user.user_id,
-        submitted_at=datetime.now(timezone.utc),
-        score=Decimal(str(round(score_percent, 2))),
-        passed=passed,
+        trail_item_id=item.id,
+        graded=graded,
         duration_seconds=payload.duration_seconds,
     )
-    submission.answers = answer_entities
-    db.add(submission)
-    db.flush()
     db.commit()
 
-    if passed is True:
-        UserProgressRepository(db).upsert_item_progress(
-            user.user_id,
-            item.id,
-            "COMPLETED",
-            last_passed_submission_id=submission.id,
-        )
-
-    response_body = FormSubmissionOut(
-        submission_id=submission.id,
-        score=round(score_percent, 2),
-        score_points=round(score_points, 2),
-        max_points=round(max_points, 2),
-        max_score=100.0 if auto_total_points > 0 else 0.0,
-        passed=passed,
-        requires_manual_review=requires_manual_review,
-        answers=answer_outputs,
-    )
+    response_body = FormSubmissionOut.model_validate(graded.response(submission_id))
     return jsonify(response_body.model_dump(mode="json"))
 
 
-def _has_response(answer: FormAnswerIn, question: FormQuestionORM) -> bool:
-    q_type = _question_type_code(question)
-    if q_type == "ESSAY":
-        return bool(answer.answer_text and answer.answer_text.strip())
-    return answer.selected_option_id is not None
+@bp.get("/<int:trail_id>/items/<int:item_id>/form-submissions/<string:ticket>")
+@rate_limited("read")
+def get_queued_submission_result(trail_id: int, item_id: int, ticket: str):
+    """Result of a queued submission; ``?wait=N`` long-polls up to N seconds."""
+    db = get_db()
+    user = get_current_user()
+    try:
+        wait = min(max(float(request.args.get("wait", 0)), 0.0), MAX_POLL_WAIT_SECONDS)
+    except ValueError:
+        wait = 0.0
+    deadline = time.monotonic() + wait
+
+    while True:
+        queued = get_queued_submission(db, ticket, user.user_id)
+        if queued is None or queued.trail_item_id != item_id:
+            return jsonify({"detail": "Envio não encontrado."}), 404
+        if queued.status != QUEUE_PENDING:
+            result = dict(queued.result or {})
+            status_code = result.pop("status_code", 200)
+            return jsonify(result), status_code
+        # End the transaction so the connection goes back to the pool while
+        # this request sleeps.
+        db.commit()
+        if time.monotonic() >= deadline:
+            break
+        time.sleep(min(POLL_INTERVAL_SECONDS, max(deadline - time.monotonic(), 0)))
+
+    return jsonify({"ticket": ticket, "status": QUEUE_PENDING}), 202
@@ -9,12 +9,13 @@ from sqlalchemy.orm import selectinload
 
 from werkzeug.exceptions import Unauthorized
 
-from app.core.db import get_db
+from app.core.db import get_db, read_only_session
 from app.models.trail_items import TrailItems as TrailItemsORM
 from app.models.user_item_progress import UserItemProgress as UserItemProgressORM
 from app.repositories.TrailsRepository import TrailsRepository
 from app.repositories.UserProgressRepository import UserProgressRepository
 from app.repositories.UserTrailsRepository import UserTrailsRepository
+from app.services.request_limits import rate_limited
 from app.services.security import get_current_user, enforce_csrf, get_current_user_id
 from app.routes import format_validation_error
 
@@ -135,6 +136,7 @@ def _attach_progress_metadata(db, trail_payload: List[dict]) -> List[dict]:
 
 
 @bp.get("/showcase")
+@read_only_session
 def get_trails_showcase():
     db = get_db()
     repo = TrailsRepository(db)
@@ -148,6 +150,7 @@ def get_trails_showcase():
 
 
 @bp.get("/")
+@read_only_session
 def get_trails():
     db = get_db()
     repo = TrailsRepository(db)
@@ -171,6 +174,7 @@ def get_trails():
 
 
 @bp.get("/<int:trail_id>")
+@read_only_session
 def get_trail(trail_id: int):
     db = get_db()
     repo = TrailsRepository(db)
@@ -225,6 +229,7 @@ def submit_trail_review(trail_id: int):
 
 
 @bp.get("/<int:trail_id>/sections")
+@read_only_session
 def get_sections(trail_id: int):
     db = get_db()
     repo = TrailsRepository(db)
@@ -247,6 +252,7 @@ def get_sections(trail_id: int):
 
 
 @bp.get("/<int:trail_id>/sections/<int:section_id>/items")
+@read_only_session
 def get_section_items(trail_id: int, section_id: int):
     db = get_db()
     repo = TrailsRepository(db)
@@ -278,6 +284,7 @@ def get_section_items(trail_id: int, section_id: int):
 
 
 @bp.get("/<int:trail_id>/sections-with-items")
+@read_only_session
 def get_sections_with_items(trail_id: int):
     db = get_db()
     repo = TrailsRepository(db)
@@ -307,6 +314,7 @@ def get_sections_with_items(trail_id: int):
 
 
 @bp.get("/<int:trail_id>/included-items")
+@read_only_session
 def get_included_items(trail_id: int):
     db = get_db()
     repo = TrailsRepository(db)
@@ -316,6 +324,7 @@ def get_included_items(trail_id: int):
 
 
 @bp.get("/<int:trail_id>/requirements")
+@read_only_session
 def get_requirements(trail_id: int):
     db = get_db()
     repo = TrailsRepository(db)
@@ -325,6 +334,7 @@ def get_requirements(trail_id: int):
 
 
 @bp.get("/<int:trail_id>/audience")
+@read_only_session
 def get_audience(trail_id: int):
     db = get_db()
     repo = TrailsRepository(db)
@@ -345,6 +355,7 @@ class ItemProgressIn(BaseModel):
 
 
 @bp.put("/<int:trail_id>/items/<int:item_id>/progress")
+@rate_limited("write")
 def set_item_progress(trail_id: int, item_id: int):
     data = request.get_json(silent=True) or {}
     try:
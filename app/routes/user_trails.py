@@ -6,7 +6,9 @@ from flask import Blueprint, jsonify
 from pydantic import BaseModel
 
 from app.core.db import get_db
+from app.repositories.UserOverviewRepository import UserOverviewRepository
 from app.repositories.UserTrailsRepository import UserTrailsRepository
+from app.services.request_limits import rate_limited
 from app.services.security import get_current_user, enforce_csrf
 from app.services.security import get_current_user_id
 from app.services.email import send_trail_enrollment_email
@@ -62,10 +64,7 @@ class OverviewOut(BaseModel):
     trails: List[TrailOverviewOut]
 
 
-@bp.get("/me/overview")
-def get_user_overview():
-    user_id = get_current_user_id()
-    db = get_db()
+def _build_overview(db, user_id: int) -> dict:
     repo = UserTrailsRepository(db)
     trails_raw = repo.get_overview_for_user(user_id)
 
@@ -106,7 +105,27 @@ def get_user_overview():
         summary=summary,
         trails=trails_out,
     )
-    return jsonify(payload.model_dump(mode="json"))
+    return payload.model_dump(mode="json")
+
+
+@bp.get("/me/overview")
+@rate_limited("read")
+def get_user_overview():
+    user_id = get_current_user_id()
+    db = get_db()
+    snapshots = UserOverviewRepository(db)
+
+    # Served from the per-user snapshot; enrollment, progress, certificate and
+    # trail edits invalidate it and the next load rebuilds it.
+    snapshot = snapshots.get(user_id)
+    if snapshot is not None and snapshot.payload is not None:
+        return jsonify(snapshot.payload)
+
+    generation = snapshots.reserve(user_id)
+    payload = _build_overview(db, user_id)
+    snapshots.store(user_id, generation, payload)
+    db.commit()
+    return jsonify(payload)
 
 
 @bp.get("/<int:trail_id>/progress")
@@ -1,7 +1,8 @@
 """Backfill certificates for trails já concluídas.
 
 Executar após deploy da feature de certificados para gerar hashes para estudantes
-que terminaram cursos no passado.
+que terminaram cursos no passado. Usa o recálculo em lote de
+``app.scripts.recompute_progress`` nas trilhas com matrículas concluídas.
 """
 
 from sqlalchemy import select
@@ -13,13 +14,11 @@ import app.models  # noqa: F401  # load all models for relationship resolution
 from app.core.db import session_scope
 from app.models.user_trails import UserTrails
 from app.models.lk_enrollment_status import LkEnrollmentStatus
-from app.repositories.UserTrailsRepository import UserTrailsRepository
+from app.scripts.recompute_progress import run
 
 
 def main() -> None:
     with session_scope() as session:
-        repo = UserTrailsRepository(session)
-
         completed_status_id = session.execute(
             select(LkEnrollmentStatus.id).where(LkEnrollmentStatus.code == "COMPLETED")
         ).scalar_one_or_none()
@@ -27,25 +26,24 @@ def main() -> None:
             print("Nenhum status COMPLETED encontrado; nada para fazer.")
             return
 
-        completeds = (
-            session.query(UserTrails)
-            .filter(UserTrails.status_id == completed_status_id)
-            .all()
+        trail_ids = list(
+            session.scalars(
+                select(UserTrails.trail_id)
+                .where(UserTrails.status_id == completed_status_id)
+                .distinct()
+                .order_by(UserTrails.trail_id)
+            )
         )
 
-        if not completeds:
-            print("Nenhuma trilha concluída pendente de certificado.")
-            return
-
-        processed = 0
-        for ut in completeds:
-            repo.sync_user_trail_progress(ut.user_id, ut.trail_id)
-            processed += 1
+    if not trail_ids:
+        print("Nenhuma trilha concluída pendente de certificado.")
+        return
 
-        session.commit()
-        print(
-            f"Certificados verificados/gerados para {processed} matrículas concluídas."
-        )
+    stats = run(trail_ids)
+    print(
+        f"Certificados verificados/gerados para {stats.completed} matrículas "
+        f"concluídas ({stats.certificates} novos)."
+    )
 
 
 if __name__ == "__main__":
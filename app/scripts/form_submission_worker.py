@@ -0,0 +1,52 @@
+"""Processa a fila de envios de formulários (``FORM_SUBMISSION_QUEUE_ENABLED``).
+
+Uso:
+    python -m app.scripts.form_submission_worker [--batch-size 50] [--once]
+
+Vários workers podem rodar em paralelo: cada lote é reservado com
+``FOR UPDATE SKIP LOCKED``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+import time
+from typing import Optional, Sequence
+
+from app.core.db import session_scope
+from app.core.settings import settings
+from app.services.form_submissions import process_queue_batch
+
+LOGGER = logging.getLogger(__name__)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--batch-size", type=int, default=settings.form_submission_queue_batch_size
+    )
+    parser.add_argument(
+        "--once", action="store_true", help="Esvazia a fila uma vez e sai."
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    idle_seconds = settings.form_submission_queue_idle_ms / 1000
+    try:
+        while True:
+            with session_scope() as db:
+                processed = process_queue_batch(db, batch_size=args.batch_size)
+            if processed:
+                LOGGER.info("%s envio(s) processado(s)", processed)
+                continue
+            if args.once:
+                return 0
+            time.sleep(idle_seconds)
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
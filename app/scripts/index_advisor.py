@@ -0,0 +1,404 @@
+"""Sugere índices a partir do slow-query log (ou de ``pg_stat_statements``).
+
+Agrupa as consultas por fingerprint, ordena pelo tempo total gasto e, para cada
+tabela filtrada/ordenada, propõe um índice (igualdades, depois intervalo/ordem)
+que ainda não esteja coberto pelos índices existentes.
+
+Uso:
+    python -m app.scripts.index_advisor logs/slow_queries.jsonl
+    python -m app.scripts.index_advisor --pg-stat-statements --live --sql
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Optional, Sequence
+
+from app.core.migrations import MIGRATIONS_DIR
+from app.services.slow_query_log import fingerprint
+
+SCHEMA_FILES = [Path(__file__).resolve().parent / "bootstrap_schema.sql"]
+MAX_INDEX_COLUMNS = 4
+
+_IDENT = r'"?(\w+)"?'
+_TABLE_REF = re.compile(
+    r"\b(?:FROM|JOIN)\s+(?:\w+\.)?"
+    + _IDENT
+    + r"(?:\s+(?:AS\s+)?(?!(?:ON|WHERE|JOIN|LEFT|RIGHT|FULL|INNER|OUTER|CROSS|GROUP|ORDER|LIMIT|OFFSET|HAVING|UNION|FOR)\b)(\w+))?",
+    re.IGNORECASE,
+)
+_COLUMN = re.compile(r"\b(\w+)\.\"?(\w+)\"?")
+_PREDICATE = re.compile(
+    r"\b(\w+)\.\"?(\w+)\"?\s*(=|!=|<>|<=|>=|<|>|\bIN\b|\bIS\b|\bBETWEEN\b|\bLIKE\b|\bILIKE\b)\s*(\w+\.\"?\w+\"?)?",
+    re.IGNORECASE,
+)
+_ORDER_BY = re.compile(
+    r"\bORDER\s+BY\b(.*?)(?=\bLIMIT\b|\bOFFSET\b|\bFOR\s+UPDATE\b|\)\s*(?:AS\b|$)|$)",
+    re.IGNORECASE | re.DOTALL,
+)
+_CREATE_INDEX = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?"
+    r"(\w+)\s+ON\s+(?:ONLY\s+)?(?:\w+\.)?(\w+)\s*(?:USING\s+\w+\s*)?\(([^)]*)\)",
+    re.IGNORECASE,
+)
+_CREATE_TABLE = re.compile(
+    r"CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(?:\w+\.)?(\w+)\s*\((.*?)\n\);",
+    re.IGNORECASE | re.DOTALL,
+)
+_UNIQUE_COLUMNS = re.compile(r"\b(?:UNIQUE|PRIMARY\s+KEY)\s*\(([^)]*)\)", re.IGNORECASE)
+_INLINE_KEY = re.compile(
+    r"^\s*\"?(\w+)\"?\s+[^,]*?\b(?:PRIMARY\s+KEY|UNIQUE)\b", re.IGNORECASE
+)
+
+
+@dataclass
+class QueryGroup:
+    fingerprint: str
+    statement: str
+    calls: int = 0
+    total_ms: float = 0.0
+    durations: list[float] = field(default_factory=list)
+    origins: set[str] = field(default_factory=set)
+    seq_scans: set[str] = field(default_factory=set)
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.calls if self.calls else 0.0
+
+    @property
+    def p95_ms(self) -> float:
+        if not self.durations:
+            return self.mean_ms
+        ordered = sorted(self.durations)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+
+@dataclass
+class IndexSuggestion:
+    table: str
+    columns: tuple[str, ...]
+    total_ms: float = 0.0
+    calls: int = 0
+    fingerprints: set[str] = field(default_factory=set)
+    origins: set[str] = field(default_factory=set)
+    seq_scan: bool = False
+
+    @property
+    def name(self) -> str:
+        return f"ix_{self.table}_{'_'.join(self.columns)}"[:63]
+
+    def ddl(self) -> str:
+        return (
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {self.name}"
+            f" ON public.{self.table} ({', '.join(self.columns)});"
+        )
+
+
+# --- sources -------------------------------------------------------------
+
+
+def _plan_seq_scans(plan: Any) -> set[str]:
+    found: set[str] = set()
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, dict):
+            if node.get("Node Type") == "Seq Scan" and node.get("Relation Name"):
+                found.add(node["Relation Name"])
+            stack.extend(node.values())
+    return found
+
+
+def load_slow_query_log(paths: Iterable[Path]) -> list[QueryGroup]:
+    groups: dict[str, QueryGroup] = {}
+    for path in paths:
+        with path.open(encoding="utf-8") as fh:
+            for line in fh:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                statement = record.get("statement")
+                if not statement:
+                    continue
+                key = record.get("fingerprint") or fingerprint(statement)
+                group = groups.setdefault(
+                    key, QueryGroup(fingerprint=key, statement=statement)
+                )
+                duration = float(record.get("duration_ms") or 0.0)
+                group.calls += 1
+                group.total_ms += duration
+                group.durations.append(duration)
+                if record.get("origin"):
+                    group.origins.add(record["origin"])
+                if record.get("explain"):
+                    group.seq_scans |= _plan_seq_scans(record["explain"])
+    return sorted(groups.values(), key=lambda g: g.total_ms, reverse=True)
+
+
+def load_pg_stat_statements(engine, limit: int = 200) -> list[QueryGroup]:
+    from sqlalchemy import text
+
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                "SELECT query, calls, total_exec_time"
+                " FROM pg_stat_statements"
+                " WHERE dbid = (SELECT oid FROM pg_database"
+                "               WHERE datname = current_database())"
+                " ORDER BY total_exec_time DESC LIMIT :limit"
+            ),
+            {"limit": limit},
+        ).all()
+    return [
+        QueryGroup(
+            fingerprint=fingerprint(row.query),
+            statement=row.query,
+            calls=int(row.calls),
+            total_ms=float(row.total_exec_time),
+        )
+        for row in rows
+    ]
+
+
+# --- existing indexes ----------------------------------------------------
+
+
+def _clean_columns(raw: str) -> tuple[str, ...]:
+    columns = []
+    for part in raw.split(","):
+        token = part.strip().split()[0] if part.strip() else ""
+        columns.append(token.strip('"').lower())
+    return tuple(column for column in columns if column)
+
+
+def existing_indexes_from_sql(sql: str) -> dict[str, list[tuple[str, ...]]]:
+    indexes: dict[str, list[tuple[str, ...]]] = {}
+    for _, table, columns in _CREATE_INDEX.findall(sql):
+        indexes.setdefault(table.lower(), []).append(_clean_columns(columns))
+    for table, body in _CREATE_TABLE.findall(sql):
+        bucket = indexes.setdefault(table.lower(), [])
+        for columns in _UNIQUE_COLUMNS.findall(body):
+            bucket.append(_clean_columns(columns))
+        for line in body.splitlines():
+            match = _INLINE_KEY.match(line)
+            if match and match.group(1).upper() != "CONSTRAINT":
+                bucket.append((match.group(1).lower(),))
+    return indexes
+
+
+def existing_indexes_offline(
+    schema_files: Sequence[Path] = SCHEMA_FILES, migrations_dir: Path = MIGRATIONS_DIR
+) -> dict[str, list[tuple[str, ...]]]:
+    sources = list(schema_files) + sorted(migrations_dir.glob("*.sql"))
+    merged: dict[str, list[tuple[str, ...]]] = {}
+    for path in sources:
+        for table, columns in existing_indexes_from_sql(
+            path.read_text(encoding="utf-8")
+        ).items():
+            merged.setdefault(table, []).extend(columns)
+    return merged
+
+
+def existing_indexes_live(engine) -> dict[str, list[tuple[str, ...]]]:
+    from sqlalchemy import text
+
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT indexdef FROM pg_indexes WHERE schemaname = 'public'")
+        ).scalars()
+        return existing_indexes_from_sql(";\n".join(rows))
+
+
+# --- analysis ------------------------------------------------------------
+
+
+def _aliases(statement: str) -> dict[str, str]:
+    aliases: dict[str, str] = {}
+    for table, alias in _TABLE_REF.findall(statement):
+        aliases[table.lower()] = table.lower()
+        if alias:
+            aliases[alias.lower()] = table.lower()
+    return aliases
+
+
+def candidate_columns(statement: str) -> dict[str, tuple[str, ...]]:
+    """Return ``table -> columns``: equality filters, then range or ORDER BY.
+
+    Tables without a filter of their own (the inner side of a join) get their
+    join key instead, since that is what the nested loop probes.
+    """
+
+    aliases = _aliases(statement)
+    equality: dict[str, list[str]] = {}
+    joins: dict[str, list[str]] = {}
+    ranges: dict[str, list[str]] = {}
+    ordering: dict[str, list[str]] = {}
+
+    def _add(bucket: dict[str, list[str]], alias: str, column: str) -> None:
+        table = aliases.get(alias.lower())
+        if table is None:
+            return
+        columns = bucket.setdefault(table, [])
+        if column.lower() not in columns:
+            columns.append(column.lower())
+
+    for alias, column, operator, other in _PREDICATE.findall(statement):
+        op = operator.strip().upper()
+        if other and "." in other:
+            if op == "=":
+                other_alias, other_column = other.replace('"', "").split(".", 1)
+                _add(joins, alias, column)
+                _add(joins, other_alias, other_column)
+        elif op in {"=", "IN", "IS"}:
+            _add(equality, alias, column)
+        elif op in {"<", ">", "<=", ">=", "BETWEEN", "LIKE"}:
+            _add(ranges, alias, column)
+
+    for clause in _ORDER_BY.findall(statement):
+        for alias, column in _COLUMN.findall(clause):
+            _add(ordering, alias, column)
+
+    result: dict[str, tuple[str, ...]] = {}
+    for table in set(equality) | set(ranges) | set(joins):
+        if table in equality or table in ranges:
+            columns = list(equality.get(table, []))
+            tail = ranges.get(table) or ordering.get(table) or []
+        else:
+            columns = [column for column in joins[table] if column != "id"]
+            tail = []
+        for column in tail:
+            if column not in columns:
+                columns.append(column)
+        if columns:
+            result[table] = tuple(columns[:MAX_INDEX_COLUMNS])
+    return result
+
+
+def is_covered(columns: tuple[str, ...], existing: Iterable[tuple[str, ...]]) -> bool:
+    for index in existing:
+        if len(index) < len(columns):
+            continue
+        if index[: len(columns)] == columns:
+            return True
+        # Equality columns may appear in any order within the leading prefix.
+        if set(index[: len(columns)]) == set(columns):
+            return True
+    return False
+
+
+def suggest_indexes(
+    groups: Sequence[QueryGroup],
+    existing: dict[str, list[tuple[str, ...]]],
+) -> list[IndexSuggestion]:
+    suggestions: dict[tuple[str, tuple[str, ...]], IndexSuggestion] = {}
+    for group in groups:
+        for table, columns in candidate_columns(group.statement).items():
+            if is_covered(columns, existing.get(table, [])):
+                continue
+            item = suggestions.setdefault(
+                (table, columns), IndexSuggestion(table=table, columns=columns)
+            )
+            item.total_ms += group.total_ms
+            item.calls += group.calls
+            item.fingerprints.add(group.fingerprint)
+            item.origins |= group.origins
+            item.seq_scan = item.seq_scan or table in group.seq_scans
+    # Plans that showed a sequential scan on the table come first.
+    return sorted(
+        suggestions.values(), key=lambda s: (s.seq_scan, s.total_ms), reverse=True
+    )
+
+
+def print_report(groups: Sequence[QueryGroup], suggestions: Sequence[IndexSuggestion]):
+    print(f"{'Fingerprint':18} {'Calls':>7} {'Total ms':>11} {'p95 ms':>9}  Origem")
+    for group in groups[:20]:
+        origins = ", ".join(sorted(group.origins)) or "-"
+        print(
+            f"{group.fingerprint:18} {group.calls:7d} {group.total_ms:11.1f}"
+            f" {group.p95_ms:9.1f}  {origins}"
+        )
+    print()
+    if not suggestions:
+        print("Nenhum índice novo sugerido.")
+        return
+    for item in suggestions:
+        flag = " [seq scan]" if item.seq_scan else ""
+        print(
+            f"{item.table}({', '.join(item.columns)}){flag}"
+            f" — {item.calls} chamadas, {item.total_ms:.1f} ms"
+        )
+        if item.origins:
+            print(f"    origem: {', '.join(sorted(item.origins))}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("logs", nargs="*", type=Path, help="Arquivos JSONL do log.")
+    parser.add_argument(
+        "--pg-stat-statements",
+        action="store_true",
+        help="Lê as consultas de pg_stat_statements no banco configurado.",
+    )
+    parser.add_argument(
+        "--live",
+        action="store_true",
+        help="Lê os índices existentes de pg_indexes em vez dos arquivos SQL.",
+    )
+    parser.add_argument("--sql", action="store_true", help="Imprime só o DDL.")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    if not args.logs and not args.pg_stat_statements:
+        parser.error("informe um arquivo de log ou --pg-stat-statements")
+
+    engine = None
+    if args.pg_stat_statements or args.live:
+        from app.core.db import engine
+
+    groups = load_slow_query_log(args.logs) if args.logs else []
+    if args.pg_stat_statements:
+        groups += load_pg_stat_statements(engine)
+    existing = (
+        existing_indexes_live(engine) if args.live else existing_indexes_offline()
+    )
+    suggestions = suggest_indexes(groups, existing)
+
+    if args.sql:
+        for item in suggestions:
+            print(item.ddl())
+    elif args.json:
+        print(
+            json.dumps(
+                [
+                    {
+                        "table": item.table,
+                        "columns": list(item.columns),
+                        "calls": item.calls,
+                        "total_ms": round(item.total_ms, 3),
+                        "seq_scan": item.seq_scan,
+                        "origins": sorted(item.origins),
+                        "ddl": item.ddl(),
+                    }
+                    for item in suggestions
+                ],
+                indent=2,
+            )
+        )
+    else:
+        print_report(groups, suggestions)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
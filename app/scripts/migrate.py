@@ -0,0 +1,49 @@
+"""Aplica as migrações versionadas de ``app/migrations`` no banco configurado.
+
+Uso:
+    python -m app.scripts.migrate status
+    python -m app.scripts.migrate up [--target 0003] [--dry-run]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from typing import Optional, Sequence
+
+from app.core.db import engine
+from app.core.migrations import migrate, status
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="Lista migrações aplicadas e pendentes.")
+    up = sub.add_parser("up", help="Aplica as migrações pendentes.")
+    up.add_argument("--target", default=None, help="Última versão a aplicar.")
+    up.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    statuses = status(engine)
+    mismatched = [item for item in statuses if item.checksum_mismatch]
+    for item in mismatched:
+        print(
+            f"AVISO: {item.migration.version} {item.migration.name} foi alterada"
+            " depois de aplicada (checksum diferente).",
+            file=sys.stderr,
+        )
+
+    if args.command == "status":
+        for item in statuses:
+            state = item.applied_at.isoformat() if item.applied else "pendente"
+            print(f"{item.migration.version} {item.migration.name:40} {state}")
+        return 0
+
+    applied = migrate(engine, target=args.target, dry_run=args.dry_run)
+    if not applied:
+        print("Nenhuma migração pendente.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""Recalcula o progresso das matrículas de uma ou mais trilhas em lote.
+
+Uso:
+    python -m app.scripts.recompute_progress [--trail-ids 1,2] [--chunk-size 1000]
+        [--checkpoint progresso.json]
+
+Sem ``--trail-ids`` processa todas as trilhas com matrículas. Com
+``--checkpoint`` o avanço é gravado após cada lote e uma nova execução com o
+mesmo arquivo continua de onde parou; o arquivo é removido ao final.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+from sqlalchemy import select
+
+# Carrega todos os modelos para resolver relationships declaradas por string.
+import app.models  # noqa: F401
+
+from app.core.db import session_scope
+from app.models.user_trails import UserTrails as UserTrailsORM
+from app.services.progress_recompute import (
+    RECOMPUTE_CHUNK_SIZE,
+    RecomputeStats,
+    count_enrollments,
+    recompute_trail,
+)
+
+
+def _read_checkpoint(path: Optional[Path]) -> dict[str, Any]:
+    if path is None or not path.exists():
+        return {"done": [], "trail_id": None, "after_id": 0}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _write_checkpoint(path: Optional[Path], state: dict[str, Any]) -> None:
+    if path is None:
+        return
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(state), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def run(
+    trail_ids: Optional[list[int]] = None,
+    *,
+    chunk_size: int = RECOMPUTE_CHUNK_SIZE,
+    checkpoint: Optional[Path] = None,
+) -> RecomputeStats:
+    state = _read_checkpoint(checkpoint)
+    totals = RecomputeStats()
+    with session_scope() as db:
+        if trail_ids is None:
+            trail_ids = list(
+                db.scalars(
+                    select(UserTrailsORM.trail_id)
+                    .distinct()
+                    .order_by(UserTrailsORM.trail_id)
+                )
+            )
+        finished = set(state["done"])
+        pending = [tid for tid in trail_ids if tid not in finished]
+        for position, trail_id in enumerate(pending, start=1):
+            after_id = state["after_id"] if state["trail_id"] == trail_id else 0
+            enrollments = count_enrollments(db, trail_id)
+            label = f"[{position}/{len(pending)}] trilha {trail_id}"
+
+            def report(last_id: int, stats: RecomputeStats) -> None:
+                state.update(trail_id=trail_id, after_id=last_id)
+                _write_checkpoint(checkpoint, state)
+                print(
+                    f"{label}: {stats.enrollments}/{enrollments} matrículas, "
+                    f"{stats.updated} atualizadas, {stats.certificates} certificados",
+                    file=sys.stderr,
+                )
+
+            stats = recompute_trail(
+                db,
+                trail_id,
+                chunk_size=chunk_size,
+                after_id=after_id,
+                on_chunk=report,
+            )
+            totals.add(stats)
+            state["done"].append(trail_id)
+            state.update(trail_id=None, after_id=0)
+            _write_checkpoint(checkpoint, state)
+
+    if checkpoint is not None and checkpoint.exists():
+        checkpoint.unlink()
+    return totals
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--trail-ids", default=None, help="IDs separados por vírgula.")
+    parser.add_argument("--chunk-size", type=int, default=RECOMPUTE_CHUNK_SIZE)
+    parser.add_argument("--checkpoint", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    trail_ids = (
+        [int(value) for value in args.trail_ids.split(",") if value.strip()]
+        if args.trail_ids
+        else None
+    )
+    stats = run(trail_ids, chunk_size=args.chunk_size, checkpoint=args.checkpoint)
+    print(json.dumps(stats.as_dict(), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
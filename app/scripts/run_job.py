@@ -0,0 +1,96 @@
+"""Executa um job de manutenção em faixas de IDs, em paralelo e com retomada.
+
+Uso:
+    python -m app.scripts.run_job --list
+    python -m app.scripts.run_job recompute_progress [--option trail_ids=1,2]
+        [--workers 4] [--chunk-size 5000] [--budget 0.5] [--run-key nome] [--restart]
+
+Cada faixa concluída fica registrada em ``maintenance_job_chunks``; rodar de
+novo com o mesmo ``--run-key`` (padrão: o nome do job) e o mesmo
+``--chunk-size`` pula o que já terminou. ``--restart`` apaga esse histórico.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from typing import Optional, Sequence
+
+import app.models  # noqa: F401  # load all models for relationship resolution
+
+from app.core.db import session_scope
+from app.core.settings import settings
+from app.jobs import JOBS, JobReport, JobRunner, get_job
+
+
+def _options(values: Sequence[str]) -> dict[str, str]:
+    options: dict[str, str] = {}
+    for value in values:
+        key, sep, option = value.partition("=")
+        if not sep or not key.strip():
+            raise ValueError(f"Opção inválida '{value}'; use chave=valor.")
+        options[key.strip()] = option.strip()
+    return options
+
+
+def _report(report: JobReport, remaining: int) -> None:
+    counters = ", ".join(
+        f"{key}={value}" for key, value in sorted(report.stats.items())
+    )
+    print(
+        f"{report.job}: {report.chunks} faixa(s) concluída(s), {remaining} restante(s)"
+        f" [{counters}]",
+        file=sys.stderr,
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("job", nargs="?", help="Nome do job (veja --list).")
+    parser.add_argument("--list", action="store_true", help="Lista os jobs.")
+    parser.add_argument("--option", action="append", default=[], metavar="CHAVE=VALOR")
+    parser.add_argument("--workers", type=int, default=settings.job_workers)
+    parser.add_argument("--chunk-size", type=int, default=settings.job_chunk_size)
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=settings.job_db_load_budget,
+        help="Segundos de banco por segundo somando os workers.",
+    )
+    parser.add_argument("--run-key", default=None)
+    parser.add_argument("--restart", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.list or not args.job:
+        for name, job in sorted(JOBS.items()):
+            print(f"{name:<24} {job.description}")
+        return 0 if args.list else 2
+
+    try:
+        job = get_job(args.job)
+        options = _options(args.option)
+        with session_scope() as db:
+            runner = JobRunner(
+                db,
+                job,
+                options=options,
+                run_key=args.run_key,
+                workers=args.workers,
+                chunk_size=args.chunk_size,
+                db_load_budget=args.budget,
+                on_chunk=_report,
+            )
+            if args.restart:
+                runner.reset()
+            report = runner.run()
+    except ValueError as exc:
+        print(f"Erro: {exc}", file=sys.stderr)
+        return 1
+
+    print(json.dumps(report.as_dict(), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
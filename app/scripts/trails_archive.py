@@ -0,0 +1,78 @@
+"""Exporta e importa trilhas no formato NDJSON (uma trilha completa por linha).
+
+Uso:
+    python -m app.scripts.trails_archive export [-o trilhas.ndjson.gz] [--ids 1,2]
+    python -m app.scripts.trails_archive import trilhas.ndjson.gz [--dry-run]
+
+Arquivos terminados em ``.gz`` são lidos e gravados comprimidos.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import sys
+from contextlib import contextmanager
+from typing import IO, Iterator, Optional, Sequence
+
+from app.core.db import session_scope
+from app.services.trail_archive import (
+    IMPORT_BATCH_SIZE,
+    TrailImporter,
+    archive_trail_payload,
+    iter_export,
+)
+
+
+@contextmanager
+def _open(path: str, mode: str) -> Iterator[IO[str]]:
+    if path == "-":
+        yield sys.stdout if "w" in mode else sys.stdin
+        return
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, mode + "t", encoding="utf-8") as handle:
+        yield handle
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="Grava as trilhas em NDJSON.")
+    export.add_argument("-o", "--output", default="-")
+    export.add_argument("--ids", default=None, help="IDs separados por vírgula.")
+    load = sub.add_parser("import", help="Carrega trilhas de um arquivo NDJSON.")
+    load.add_argument("path")
+    load.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    load.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        trail_ids = (
+            [int(value) for value in args.ids.split(",") if value.strip()]
+            if args.ids
+            else None
+        )
+        with session_scope() as db, _open(args.output, "w") as handle:
+            handle.writelines(iter_export(db, trail_ids=trail_ids))
+        return 0
+
+    with session_scope() as db, _open(args.path, "r") as handle:
+        importer = TrailImporter(
+            db,
+            validate=archive_trail_payload,
+            batch_size=args.batch_size,
+            dry_run=args.dry_run,
+        )
+        try:
+            report = importer.run(handle)
+        except ValueError as exc:
+            print(f"Erro: {exc}", file=sys.stderr)
+            return 1
+
+    print(json.dumps(report.as_dict(), ensure_ascii=False, indent=2))
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
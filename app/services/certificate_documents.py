@@ -0,0 +1,187 @@
+"""Printable certificate documents rendered on the server and cached.
+
+A certificate is rendered as a self-contained A4 landscape SVG (vector, prints
+the same everywhere, browsers save it as PDF) from the data of
+``CertificatesRepository.get_details_by_hash``. The cache key hashes the
+template version with every rendered field, so a new template or a changed
+name simply misses; documents share the ``RenderCache`` tiers of the QR codes
+(``CERTIFICATE_CACHE_DIR`` / Redis).
+
+Issuing a certificate records its hash on the session; after the commit the
+QR code and the document are rendered on a background thread, so a batch of
+graduates downloading right away is served from the cache.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import astuple, dataclass
+from datetime import datetime
+from html import escape
+from typing import Iterable, Iterator
+
+import segno
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.core.db import session_scope
+from app.core.settings import settings
+from app.models.trail_certificates import TrailCertificates as TrailCertificatesORM
+from app.models.trails import Trails as TrailsORM
+from app.models.users import User as UserORM
+from app.services.certificate_qr import qr_cache, verification_url
+from app.services.render_cache import (
+    RenderCache,
+    build_store,
+    content_key,
+    submit_background,
+)
+
+LOGGER = logging.getLogger(__name__)
+
+# Part of every cache key: bump it whenever the template below changes.
+CERTIFICATE_TEMPLATE_VERSION = "svg-1"
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_PENDING_KEY = "rota_certificates_to_render"
+
+
+@dataclass(frozen=True)
+class CertificateDocumentData:
+    certificate_hash: str
+    credential_id: str
+    student_name: str
+    trail_title: str
+    issued_on: str
+    verification_url: str
+
+    @classmethod
+    def from_row(cls, cert, user, trail, url: str) -> "CertificateDocumentData":
+        issued_at: datetime | None = cert.issued_at
+        return cls(
+            certificate_hash=cert.certificate_hash,
+            credential_id=cert.credential_id,
+            student_name=user.name_for_certificate or "",
+            trail_title=trail.name,
+            issued_on=issued_at.strftime("%d/%m/%Y") if issued_at else "",
+            verification_url=url,
+        )
+
+    @property
+    def cache_key(self) -> str:
+        return content_key(CERTIFICATE_TEMPLATE_VERSION, *astuple(self))
+
+
+def _brand_color() -> str:
+    color = settings.rota_brand_color.strip()
+    return color if color.startswith("#") else f"#{color}"
+
+
+def render_certificate_svg(data: CertificateDocumentData) -> bytes:
+    color = escape(_brand_color())
+    qr = segno.make(data.verification_url, error="m").svg_inline(
+        omitsize=True, border=2
+    )
+    qr = qr.replace("<svg ", '<svg x="237" y="150" width="40" height="40" ', 1)
+    svg = f"""<svg xmlns="http://www.w3.org/2000/svg" width="297mm" height="210mm" \
+viewBox="0 0 297 210" font-family="Helvetica, Arial, sans-serif">
+  <title>Certificado {escape(data.credential_id)}</title>
+  <rect width="297" height="210" fill="#ffffff"/>
+  <rect x="8" y="8" width="281" height="194" fill="none" stroke="{color}" \
+stroke-width="1.5"/>
+  <rect x="11" y="11" width="275" height="188" fill="none" stroke="{color}" \
+stroke-width="0.4"/>
+  <text x="148.5" y="48" text-anchor="middle" font-size="16" font-weight="bold" \
+fill="{color}" letter-spacing="2">CERTIFICADO DE CONCLUSÃO</text>
+  <text x="148.5" y="72" text-anchor="middle" font-size="6" fill="#444444">\
+Certificamos que</text>
+  <text x="148.5" y="92" text-anchor="middle" font-size="12" font-weight="bold" \
+fill="#111111">{escape(data.student_name)}</text>
+  <text x="148.5" y="110" text-anchor="middle" font-size="6" fill="#444444">\
+concluiu a trilha</text>
+  <text x="148.5" y="126" text-anchor="middle" font-size="9" fill="#111111">\
+{escape(data.trail_title)}</text>
+  <text x="20" y="170" font-size="4.5" fill="#444444">Emitido em \
+{escape(data.issued_on)}</text>
+  <text x="20" y="178" font-size="4.5" fill="#444444">Credencial \
+{escape(data.credential_id)}</text>
+  <text x="20" y="186" font-size="3.5" fill="#666666">Verifique em \
+{escape(data.verification_url)}</text>
+  {qr}
+</svg>
+"""
+    return svg.encode("utf-8")
+
+
+document_cache = RenderCache(
+    settings.certificate_cache_size,
+    build_store(
+        "certificate",
+        settings.certificate_cache_dir,
+        settings.qr_cache_ttl_seconds,
+    ),
+)
+
+
+def get_certificate_svg(data: CertificateDocumentData) -> bytes:
+    return document_cache.get(data.cache_key, lambda: render_certificate_svg(data))
+
+
+def iter_chunks(document: bytes, size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    for start in range(0, len(document), size):
+        yield document[start : start + size]
+
+
+def prerender(certificate_hashes: Iterable[str]) -> int:
+    """Render and cache the QR code and document of each certificate."""
+
+    hashes = sorted(set(certificate_hashes))
+    if not hashes or not settings.app_base_url:
+        return 0
+    rendered = 0
+    with session_scope() as db:
+        rows = db.execute(
+            select(TrailCertificatesORM, UserORM, TrailsORM)
+            .join(UserORM, UserORM.user_id == TrailCertificatesORM.user_id)
+            .join(TrailsORM, TrailsORM.id == TrailCertificatesORM.trail_id)
+            .where(TrailCertificatesORM.certificate_hash.in_(hashes))
+        ).all()
+        for cert, user, trail in rows:
+            url = verification_url(cert.certificate_hash)
+            try:
+                if settings.qr_pregenerate:
+                    qr_cache.get_png(url)
+                if settings.certificate_prerender:
+                    get_certificate_svg(
+                        CertificateDocumentData.from_row(cert, user, trail, url)
+                    )
+            except Exception:  # noqa: BLE001 - the request path renders it anyway
+                LOGGER.exception(
+                    "Falha ao pré-gerar certificado %s", cert.certificate_hash
+                )
+                continue
+            rendered += 1
+    return rendered
+
+
+def schedule_prerender(db: Session, certificate_hashes: Iterable[str]) -> None:
+    """Pre-render the given certificates once ``db`` commits."""
+
+    if not settings.app_base_url or not (
+        settings.qr_pregenerate or settings.certificate_prerender
+    ):
+        return
+    db.info.setdefault(_PENDING_KEY, set()).update(certificate_hashes)
+
+
+@event.listens_for(Session, "after_commit")
+def _prerender_committed(session: Session) -> None:
+    hashes = session.info.pop(_PENDING_KEY, None)
+    if hashes:
+        submit_background(prerender, hashes)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_rolled_back(session: Session, previous_transaction) -> None:
+    if not previous_transaction.nested:
+        session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,69 @@
+"""QR codes of certificate verification URLs, rendered once and shared.
+
+A QR image is a pure function of its payload and format (PNG or SVG), so its
+cache key (``qr_cache_key``) is a hash of both plus the render parameters,
+which also makes it a strong ETag. Images live in a ``RenderCache``: a
+per-process LRU over Redis or ``QR_CACHE_DIR``.
+"""
+
+from __future__ import annotations
+
+import base64
+import io
+from typing import Optional
+
+import segno
+
+from app.core.settings import settings
+from app.services.render_cache import RenderCache, build_store, content_key
+
+QR_ERROR_LEVEL = "m"
+QR_SCALE = 6
+# Part of every cache key: change it whenever the rendering above changes.
+QR_RENDER_VERSION = f"png-{QR_ERROR_LEVEL}-{QR_SCALE}"
+QR_RENDER_VERSIONS = {
+    "png": QR_RENDER_VERSION,
+    "svg": f"svg-{QR_ERROR_LEVEL}-{QR_SCALE}",
+}
+QR_MIMETYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+
+def verification_url(certificate_hash: str, base: Optional[str] = None) -> str:
+    base = (base or settings.app_base_url or "").rstrip("/")
+    return f"{base}/certificados/?cert_hash={certificate_hash}"
+
+
+def render_qr(payload: str, kind: str = "png") -> bytes:
+    qr = segno.make(payload, error=QR_ERROR_LEVEL)
+    buf = io.BytesIO()
+    if kind == "svg":
+        qr.save(buf, kind="svg", scale=QR_SCALE, xmldecl=False)
+    else:
+        qr.save(buf, kind="png", scale=QR_SCALE)
+    return buf.getvalue()
+
+
+def render_qr_png(payload: str) -> bytes:
+    return render_qr(payload, "png")
+
+
+def qr_cache_key(payload: str, kind: str = "png") -> str:
+    return content_key(QR_RENDER_VERSIONS[kind], payload)
+
+
+class QrCache(RenderCache):
+    def get_image(self, payload: str, kind: str = "png") -> bytes:
+        return self.get(qr_cache_key(payload, kind), lambda: render_qr(payload, kind))
+
+    def get_png(self, payload: str) -> bytes:
+        return self.get_image(payload, "png")
+
+    def data_uri(self, payload: str) -> str:
+        encoded = base64.b64encode(self.get_png(payload)).decode("ascii")
+        return f"data:image/png;base64,{encoded}"
+
+
+qr_cache = QrCache(
+    settings.qr_cache_size,
+    build_store("qr", settings.qr_cache_dir, settings.qr_cache_ttl_seconds),
+)
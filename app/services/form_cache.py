@@ -0,0 +1,242 @@
+"""Compiled, immutable form definitions shared by rendering and grading.
+
+A form is compiled once per ``(form_id, version)`` into plain tuples and lookup
+maps (question id -> question, option id -> option with its correctness), so a
+submission is graded with dictionary lookups and no lazy relationship loads.
+The trail builder bumps ``forms.version`` on every content change, which makes
+stale entries unreachable; the LRU bound takes care of evicting them.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from decimal import Decimal
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.settings import settings
+from app.models.form_question_options import (
+    FormQuestionOption as FormQuestionOptionORM,
+)
+from app.models.form_questions import FormQuestion as FormQuestionORM
+from app.models.forms import Form as FormORM
+from app.models.lk_question_type import LkQuestionType as LkQuestionTypeORM
+
+KNOWN_QUESTION_TYPES = frozenset({"ESSAY", "TRUE_OR_FALSE", "SINGLE_CHOICE"})
+
+
+@dataclass(frozen=True)
+class CompiledOption:
+    id: int
+    text: str
+    order_index: int
+    correct: Optional[bool]
+
+
+@dataclass(frozen=True)
+class CompiledQuestion:
+    id: int
+    prompt: str
+    type: str
+    required: bool
+    order_index: int
+    points: Decimal
+    options: tuple[CompiledOption, ...]
+    option_map: Mapping[int, CompiledOption]
+
+    @property
+    def is_essay(self) -> bool:
+        return self.type == "ESSAY"
+
+
+@dataclass(frozen=True)
+class CompiledForm:
+    id: int
+    version: int
+    trail_item_id: Optional[int]
+    title: Optional[str]
+    description: Optional[str]
+    min_score_to_pass: Decimal
+    randomize_questions: Optional[bool]
+    questions: tuple[CompiledQuestion, ...]
+    question_map: Mapping[int, CompiledQuestion]
+    # Sum of the points of the auto-graded (non-essay) questions.
+    total_points: Decimal
+
+
+def _legacy_flag(value: Optional[bool], legacy: Optional[str], truthy: str):
+    if value is not None:
+        return bool(value)
+    if legacy is not None:
+        return legacy.upper() == truthy
+    return None
+
+
+def compile_form(db: Session, form_id: int) -> Optional[CompiledForm]:
+    form = (
+        db.execute(
+            select(
+                FormORM.id,
+                FormORM.version,
+                FormORM.trail_item_id,
+                FormORM.title,
+                FormORM.description,
+                FormORM.min_score_to_pass,
+                FormORM.randomize_questions,
+                FormORM.randomize_questions_yn,
+            ).where(FormORM.id == form_id)
+        )
+        .mappings()
+        .first()
+    )
+    if form is None:
+        return None
+
+    question_rows = (
+        db.execute(
+            select(
+                FormQuestionORM.id,
+                FormQuestionORM.prompt,
+                FormQuestionORM.required,
+                FormQuestionORM.required_yn,
+                FormQuestionORM.order_index,
+                FormQuestionORM.points,
+                LkQuestionTypeORM.code,
+            )
+            .outerjoin(
+                LkQuestionTypeORM,
+                LkQuestionTypeORM.id == FormQuestionORM.question_type_id,
+            )
+            .where(FormQuestionORM.form_id == form_id)
+            .order_by(FormQuestionORM.order_index, FormQuestionORM.id)
+        )
+        .mappings()
+        .all()
+    )
+    options_by_question: dict[int, list[CompiledOption]] = {}
+    if question_rows:
+        option_rows = db.execute(
+            select(
+                FormQuestionOptionORM.id,
+                FormQuestionOptionORM.question_id,
+                FormQuestionOptionORM.option_text,
+                FormQuestionOptionORM.is_correct,
+                FormQuestionOptionORM.is_correct_yn,
+                FormQuestionOptionORM.order_index,
+            )
+            .where(
+                FormQuestionOptionORM.question_id.in_(
+                    [row["id"] for row in question_rows]
+                )
+            )
+            .order_by(FormQuestionOptionORM.order_index, FormQuestionOptionORM.id)
+        ).mappings()
+        for row in option_rows:
+            options_by_question.setdefault(row["question_id"], []).append(
+                CompiledOption(
+                    id=row["id"],
+                    text=row["option_text"] or "",
+                    order_index=row["order_index"] or 0,
+                    correct=_legacy_flag(row["is_correct"], row["is_correct_yn"], "Y"),
+                )
+            )
+
+    questions: list[CompiledQuestion] = []
+    total_points = Decimal("0")
+    for row in question_rows:
+        code = row["code"] if row["code"] in KNOWN_QUESTION_TYPES else "UNKNOWN"
+        points = row["points"] if row["points"] is not None else Decimal("0")
+        options = tuple(options_by_question.get(row["id"], ()))
+        questions.append(
+            CompiledQuestion(
+                id=row["id"],
+                prompt=row["prompt"] or "",
+                type=code,
+                required=bool(_legacy_flag(row["required"], row["required_yn"], "Y")),
+                order_index=row["order_index"] or 0,
+                points=points,
+                options=options,
+                option_map=MappingProxyType({option.id: option for option in options}),
+            )
+        )
+        if code != "ESSAY":
+            total_points += points
+
+    return CompiledForm(
+        id=form["id"],
+        version=form["version"],
+        trail_item_id=form["trail_item_id"],
+        title=form["title"],
+        description=form["description"],
+        min_score_to_pass=form["min_score_to_pass"] or Decimal("0"),
+        randomize_questions=_legacy_flag(
+            form["randomize_questions"], form["randomize_questions_yn"], "S"
+        ),
+        questions=tuple(questions),
+        question_map=MappingProxyType(
+            {question.id: question for question in questions}
+        ),
+        total_points=total_points,
+    )
+
+
+class FormCache:
+    """Thread-safe LRU of compiled forms keyed by ``(form_id, version)``."""
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._entries: OrderedDict[tuple[int, int], CompiledForm] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple[int, int]) -> Optional[CompiledForm]:
+        with self._lock:
+            compiled = self._entries.get(key)
+            if compiled is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return compiled
+
+    def put(self, compiled: CompiledForm) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[(compiled.id, compiled.version)] = compiled
+            self._entries.move_to_end((compiled.id, compiled.version))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+form_cache = FormCache(settings.form_cache_size)
+
+
+def get_compiled_form(db: Session, trail_item_id: int) -> Optional[CompiledForm]:
+    """Return the compiled form of an item; one indexed lookup on a cache hit."""
+    key_row = db.execute(
+        select(FormORM.id, FormORM.version).where(
+            FormORM.trail_item_id == trail_item_id
+        )
+    ).first()
+    if key_row is None:
+        return None
+    compiled = form_cache.get((key_row.id, key_row.version))
+    if compiled is not None:
+        return compiled
+    compiled = compile_form(db, key_row.id)
+    if compiled is not None:
+        form_cache.put(compiled)
+    return compiled
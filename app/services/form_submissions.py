@@ -0,0 +1,390 @@
+"""Grading, persistence and the optional admission queue for form submissions.
+
+Grading is a pure function of a compiled form and the submitted answers, so the
+request handler and the queue worker share it. With
+``FORM_SUBMISSION_QUEUE_ENABLED`` the endpoint only validates the answers and
+stores them in ``form_submission_queue`` (one short INSERT), answering 202 with
+a ticket; ``app.scripts.form_submission_worker`` claims pending rows with
+``FOR UPDATE SKIP LOCKED``, grades them and persists a whole batch with one
+commit, and clients poll the ticket for the result.
+"""
+
+from __future__ import annotations
+
+import logging
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.form_submission_queue import (
+    FormSubmissionQueue as FormSubmissionQueueORM,
+)
+from app.repositories.FormSubmissionsRepository import FormSubmissionsRepository
+from app.repositories.UserProgressRepository import UserProgressRepository
+from app.services.form_cache import CompiledForm, get_compiled_form
+
+LOGGER = logging.getLogger(__name__)
+
+QUEUE_PENDING = "PENDING"
+QUEUE_DONE = "DONE"
+QUEUE_FAILED = "FAILED"
+
+
+class SubmissionRejected(Exception):
+    """The answers do not fit the form; ``body`` is the 422 response payload."""
+
+    def __init__(self, body: dict[str, Any]) -> None:
+        super().__init__(body.get("detail"))
+        self.body = body
+
+
+@dataclass
+class GradedSubmission:
+    answer_rows: list[dict[str, Any]] = field(default_factory=list)
+    answers: list[dict[str, Any]] = field(default_factory=list)
+    score_percent: float = 0.0
+    score_points: float = 0.0
+    max_points: float = 0.0
+    has_auto_points: bool = False
+    passed: Optional[bool] = None
+    requires_manual_review: bool = False
+
+    def response(self, submission_id: int) -> dict[str, Any]:
+        return {
+            "submission_id": submission_id,
+            "score": round(self.score_percent, 2),
+            "score_points": round(self.score_points, 2),
+            "max_points": round(self.max_points, 2),
+            "max_score": 100.0 if self.has_auto_points else 0.0,
+            "passed": self.passed,
+            "requires_manual_review": self.requires_manual_review,
+            "answers": self.answers,
+        }
+
+
+def _has_response(answer: dict[str, Any], is_essay: bool) -> bool:
+    if is_essay:
+        text = answer.get("answer_text")
+        return bool(text and text.strip())
+    return answer.get("selected_option_id") is not None
+
+
+def grade_submission(
+    form: CompiledForm, answers: list[dict[str, Any]]
+) -> GradedSubmission:
+    """Grade ``answers`` (``question_id``/``selected_option_id``/``answer_text``).
+
+    Raises ``SubmissionRejected`` for unknown questions, unanswered required
+    questions or options that do not belong to their question, in that order.
+    """
+    provided = {answer["question_id"]: answer for answer in answers}
+    invalid_questions = [
+        answer["question_id"]
+        for answer in answers
+        if answer["question_id"] not in form.question_map
+    ]
+    if invalid_questions:
+        raise SubmissionRejected(
+            {
+                "detail": "Uma ou mais questões informadas são inválidas para este formulário",
+                "invalid_questions": invalid_questions,
+            }
+        )
+
+    graded = GradedSubmission()
+    scored_points = Decimal("0")
+    missing_required: list[int] = []
+    invalid_option_question: Optional[int] = None
+
+    # One pass over the compiled questions: required check, option lookup and
+    # scoring.
+    for question in form.questions:
+        answer = provided.get(question.id)
+        if question.required and (
+            answer is None or not _has_response(answer, question.is_essay)
+        ):
+            missing_required.append(question.id)
+
+        if question.is_essay:
+            text = answer.get("answer_text") if answer else None
+            response_text = text.strip() if text else None
+            if question.required or response_text:
+                graded.requires_manual_review = True
+            graded.answer_rows.append(
+                {"question_id": question.id, "answer_text": response_text}
+            )
+            graded.answers.append(
+                {"question_id": question.id, "is_correct": None, "points_awarded": None}
+            )
+            continue
+
+        # perguntas objetivas
+        selected_option_id = answer.get("selected_option_id") if answer else None
+        selected_option = None
+        if selected_option_id is not None:
+            selected_option = question.option_map.get(selected_option_id)
+            if selected_option is None and invalid_option_question is None:
+                invalid_option_question = question.id
+
+        is_correct = selected_option is not None and selected_option.correct is True
+        points_awarded = question.points if is_correct else Decimal("0")
+        if is_correct:
+            scored_points += question.points
+        graded.answer_rows.append(
+            {
+                "question_id": question.id,
+                "selected_option_id": selected_option.id if selected_option else None,
+                "is_correct": is_correct,
+                "points_awarded": points_awarded,
+            }
+        )
+        graded.answers.append(
+            {
+                "question_id": question.id,
+                "is_correct": is_correct,
+                "points_awarded": float(points_awarded),
+            }
+        )
+
+    if missing_required:
+        raise SubmissionRejected(
+            {
+                "detail": "Responda todas as questões obrigatórias",
+                "missing_questions": missing_required,
+            }
+        )
+    if invalid_option_question is not None:
+        raise SubmissionRejected(
+            {
+                "detail": f"Opção inválida para a questão {invalid_option_question}",
+                "question_id": invalid_option_question,
+            }
+        )
+
+    total_points = form.total_points
+    graded.has_auto_points = total_points > 0
+    graded.max_points = float(total_points) if total_points > 0 else 0.0
+    graded.score_points = float(scored_points)
+    graded.score_percent = (
+        float((scored_points / total_points) * Decimal(100))
+        if total_points > 0
+        else 0.0
+    )
+    if not graded.requires_manual_review:
+        graded.passed = graded.score_percent >= float(form.min_score_to_pass)
+    return graded
+
+
+def _submission_row(
+    form: CompiledForm,
+    user_id: int,
+    graded: GradedSubmission,
+    duration_seconds: Optional[int],
+) -> dict[str, Any]:
+    return {
+        "form_id": form.id,
+        "user_id": user_id,
+        "score": Decimal(str(round(graded.score_percent, 2))),
+        "passed": graded.passed,
+        "duration_seconds": duration_seconds,
+        "answers": graded.answer_rows,
+    }
+
+
+def persist_graded(
+    db: Session,
+    *,
+    form: CompiledForm,
+    user_id: int,
+    trail_item_id: int,
+    graded: GradedSubmission,
+    duration_seconds: Optional[int],
+) -> int:
+    """Write the submission, its answers and the item progress; caller commits."""
+    submission_id = FormSubmissionsRepository(db).create_submission(
+        **_submission_row(form, user_id, graded, duration_seconds)
+    )
+    if graded.passed is True:
+        UserProgressRepository(db).upsert_item_progress(
+            user_id,
+            trail_item_id,
+            "COMPLETED",
+            last_passed_submission_id=submission_id,
+            commit=False,
+        )
+    return submission_id
+
+
+# --- queue ---------------------------------------------------------------
+
+
+def enqueue_submission(
+    db: Session,
+    *,
+    user_id: int,
+    trail_item_id: int,
+    form: CompiledForm,
+    answers: list[dict[str, Any]],
+    duration_seconds: Optional[int],
+) -> str:
+    """Store an already validated submission for the worker; caller commits."""
+    ticket = uuid.uuid4().hex
+    db.add(
+        FormSubmissionQueueORM(
+            ticket=ticket,
+            user_id=user_id,
+            trail_item_id=trail_item_id,
+            form_id=form.id,
+            payload={
+                "answers": answers,
+                "duration_seconds": duration_seconds,
+                "form_version": form.version,
+            },
+            status=QUEUE_PENDING,
+            attempts=0,
+            created_at=datetime.now(timezone.utc),
+        )
+    )
+    db.flush()
+    return ticket
+
+
+def get_queued_submission(
+    db: Session, ticket: str, user_id: int
+) -> Optional[FormSubmissionQueueORM]:
+    # Overwrite the copy already in the identity map: long polls re-read the
+    # same row while the worker settles it from another session.
+    return db.scalars(
+        select(FormSubmissionQueueORM)
+        .where(
+            FormSubmissionQueueORM.ticket == ticket,
+            FormSubmissionQueueORM.user_id == user_id,
+        )
+        .execution_options(populate_existing=True)
+    ).first()
+
+
+@dataclass
+class _Claimed:
+    row: FormSubmissionQueueORM
+    form: CompiledForm
+    graded: GradedSubmission
+
+
+def _finish(row: FormSubmissionQueueORM, status: str, result: dict[str, Any]) -> None:
+    row.status = status
+    row.result = result
+    row.processed_at = datetime.now(timezone.utc)
+
+
+def _persist_batch(db: Session, claimed: list[_Claimed]) -> None:
+    submission_ids = FormSubmissionsRepository(db).create_submissions(
+        [
+            _submission_row(
+                entry.form,
+                entry.row.user_id,
+                entry.graded,
+                entry.row.payload.get("duration_seconds"),
+            )
+            for entry in claimed
+        ]
+    )
+    progress = UserProgressRepository(db)
+    for entry, submission_id in zip(claimed, submission_ids):
+        if entry.graded.passed is True:
+            progress.upsert_item_progress(
+                entry.row.user_id,
+                entry.row.trail_item_id,
+                "COMPLETED",
+                last_passed_submission_id=submission_id,
+                commit=False,
+            )
+        entry.row.submission_id = submission_id
+        _finish(
+            entry.row,
+            QUEUE_DONE,
+            {"status_code": 200, **entry.graded.response(submission_id)},
+        )
+    db.flush()
+
+
+def process_queue_batch(db: Session, *, batch_size: int) -> int:
+    """Grade and persist up to ``batch_size`` pending submissions; one commit.
+
+    Returns how many queue rows were settled (graded or rejected).
+    """
+    rows = list(
+        db.scalars(
+            select(FormSubmissionQueueORM)
+            .where(FormSubmissionQueueORM.status == QUEUE_PENDING)
+            .order_by(FormSubmissionQueueORM.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+    )
+    if not rows:
+        db.commit()
+        return 0
+
+    claimed: list[_Claimed] = []
+    for row in rows:
+        row.attempts += 1
+        form = get_compiled_form(db, row.trail_item_id)
+        if form is None or form.id != row.form_id:
+            _finish(
+                row,
+                QUEUE_FAILED,
+                {
+                    "status_code": 404,
+                    "detail": "Formulário não encontrado para este item",
+                },
+            )
+            continue
+        queued_version = row.payload.get("form_version")
+        if queued_version is not None and queued_version != form.version:
+            # Only the current version can be graded and stored; the student
+            # answered questions that have since been edited.
+            _finish(
+                row,
+                QUEUE_FAILED,
+                {
+                    "status_code": 409,
+                    "detail": "O formulário foi alterado depois do envio; "
+                    "responda novamente.",
+                },
+            )
+            continue
+        try:
+            graded = grade_submission(form, row.payload.get("answers") or [])
+        except SubmissionRejected as exc:
+            # The form changed after the answers were accepted.
+            _finish(row, QUEUE_FAILED, {"status_code": 422, **exc.body})
+            continue
+        claimed.append(_Claimed(row=row, form=form, graded=graded))
+
+    try:
+        with db.begin_nested():
+            _persist_batch(db, claimed)
+    except Exception:
+        LOGGER.exception("Falha ao gravar lote da fila de envios; refazendo um a um")
+        for entry in claimed:
+            try:
+                with db.begin_nested():
+                    _persist_batch(db, [entry])
+            except Exception:
+                LOGGER.exception("Envio %s da fila falhou", entry.row.ticket)
+                _finish(
+                    entry.row,
+                    QUEUE_FAILED,
+                    {
+                        "status_code": 500,
+                        "detail": "Não foi possível registrar o envio.",
+                    },
+                )
+    db.commit()
+    return len(rows)
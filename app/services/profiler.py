@@ -0,0 +1,306 @@
+"""Opt-in statistical request profiler.
+
+When ``PROFILER_ENABLED`` is off nothing is registered, so requests pay no cost.
+When on, a request is profiled if an admin sends ``X-Rota-Profile: 1`` or it is
+picked by ``PROFILER_SAMPLE_RATE``. A background thread samples the request
+thread's stack and the SQL statements it runs are recorded; captures are kept in
+a bounded in-memory store per endpoint.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Deque, Optional
+
+import jwt
+from flask import Flask, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.settings import settings
+
+LOGGER = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Rota-Profile"
+PROFILE_ID_HEADER = "X-Rota-Profile-Id"
+MAX_SQL_PER_CAPTURE = 500
+MAX_STACK_DEPTH = 128
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@dataclass
+class SqlSample:
+    statement: str
+    duration_ms: float
+    params: str
+
+
+@dataclass
+class ProfileCapture:
+    id: str
+    endpoint: str
+    method: str
+    path: str
+    trigger: str
+    started_at: datetime
+    duration_ms: float = 0.0
+    status_code: int | None = None
+    samples: int = 0
+    stacks: Counter = field(default_factory=Counter)
+    sql: list[SqlSample] = field(default_factory=list)
+
+    @property
+    def sql_time_ms(self) -> float:
+        return sum(item.duration_ms for item in self.sql)
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "endpoint": self.endpoint,
+            "method": self.method,
+            "path": self.path,
+            "trigger": self.trigger,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration_ms, 3),
+            "status_code": self.status_code,
+            "samples": self.samples,
+            "sql_count": len(self.sql),
+            "sql_time_ms": round(self.sql_time_ms, 3),
+        }
+
+    def detail(self) -> dict[str, Any]:
+        payload = self.summary()
+        payload["stacks"] = [
+            {"stack": stack, "count": count}
+            for stack, count in self.stacks.most_common()
+        ]
+        payload["sql"] = [
+            {
+                "statement": item.statement,
+                "duration_ms": round(item.duration_ms, 3),
+                "params": item.params,
+            }
+            for item in self.sql
+        ]
+        return payload
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed format (flamegraph.pl / speedscope)."""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.items())
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(_APP_ROOT):
+        filename = os.path.relpath(filename, _APP_ROOT)
+    else:
+        filename = os.path.basename(filename)
+    return f"{filename}:{code.co_name}"
+
+
+class StackSampler:
+    """Periodically record the stack of one thread until stopped."""
+
+    def __init__(self, thread_id: int, interval: float) -> None:
+        self._thread_id = thread_id
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="rota-profiler", daemon=True
+        )
+        self.stacks: Counter = Counter()
+        self.samples = 0
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+            labels: list[str] = []
+            while frame is not None and len(labels) < MAX_STACK_DEPTH:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.reverse()
+            self.stacks[";".join(labels)] += 1
+            self.samples += 1
+
+
+class ProfileStore:
+    """Keep the most recent captures per endpoint, bounded in size."""
+
+    def __init__(self, max_per_endpoint: int) -> None:
+        self._max_per_endpoint = max_per_endpoint
+        self._by_endpoint: dict[str, Deque[ProfileCapture]] = {}
+        self._by_id: dict[str, ProfileCapture] = {}
+        self._lock = threading.Lock()
+
+    def add(self, capture: ProfileCapture) -> None:
+        with self._lock:
+            bucket = self._by_endpoint.setdefault(capture.endpoint, deque())
+            if len(bucket) >= self._max_per_endpoint:
+                evicted = bucket.popleft()
+                self._by_id.pop(evicted.id, None)
+            bucket.append(capture)
+            self._by_id[capture.id] = capture
+
+    def get(self, capture_id: str) -> Optional[ProfileCapture]:
+        with self._lock:
+            return self._by_id.get(capture_id)
+
+    def slowest(
+        self, limit: int = 20, endpoint: str | None = None
+    ) -> list[ProfileCapture]:
+        with self._lock:
+            if endpoint is not None:
+                captures = list(self._by_endpoint.get(endpoint, ()))
+            else:
+                captures = list(self._by_id.values())
+        captures.sort(key=lambda item: item.duration_ms, reverse=True)
+        return captures[:limit]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._by_endpoint.clear()
+            self._by_id.clear()
+
+
+store = ProfileStore(settings.profiler_max_per_endpoint)
+
+# thread id -> capture currently running on that thread
+_active: dict[int, ProfileCapture] = {}
+_sql_listeners_installed = False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the execution context: a failed statement leaves nothing behind.
+    if context is not None and threading.get_ident() in _active:
+        context._rota_profiler_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    capture = _active.get(threading.get_ident())
+    if capture is None:
+        return
+    started = getattr(context, "_rota_profiler_start", None)
+    if started is None:
+        return
+    elapsed = (time.perf_counter() - started) * 1000
+    if len(capture.sql) < MAX_SQL_PER_CAPTURE:
+        capture.sql.append(
+            SqlSample(
+                statement=statement, duration_ms=elapsed, params=repr(parameters)[:500]
+            )
+        )
+
+
+def _install_sql_listeners() -> None:
+    global _sql_listeners_installed
+    if _sql_listeners_installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    _sql_listeners_installed = True
+
+
+def _is_admin_request() -> bool:
+    token = request.cookies.get(settings.COOKIE_NAME)
+    if not token:
+        return False
+    try:
+        decoded = jwt.decode(
+            token,
+            settings.JWT_SECRET,
+            algorithms=["HS256"],
+            options={"require": ["exp"]},
+        )
+    except jwt.PyJWTError:
+        return False
+    return decoded.get("role") == "Admin"
+
+
+def _trigger(sample_rate: float) -> Optional[str]:
+    if request.headers.get(PROFILE_HEADER) and _is_admin_request():
+        return "header"
+    if sample_rate > 0 and random.random() < sample_rate:
+        return "sampled"
+    return None
+
+
+def _finish(status_code: int | None) -> Optional[ProfileCapture]:
+    state = g.pop("_rota_profile", None)
+    if state is None:
+        return None
+    capture, sampler, started = state
+    sampler.stop()
+    _active.pop(threading.get_ident(), None)
+    capture.duration_ms = (time.perf_counter() - started) * 1000
+    capture.status_code = status_code
+    capture.stacks = sampler.stacks
+    capture.samples = sampler.samples
+    store.add(capture)
+    return capture
+
+
+def init_profiler(
+    app: Flask, *, enabled: bool | None = None, sample_rate: float | None = None
+) -> None:
+    """Register the profiling hooks when profiling is enabled."""
+
+    if not (settings.profiler_enabled if enabled is None else enabled):
+        return
+
+    rate = settings.profiler_sample_rate if sample_rate is None else sample_rate
+    interval = settings.profiler_interval_ms / 1000.0
+    _install_sql_listeners()
+    LOGGER.info("Request profiler enabled (sample rate %.4f)", rate)
+
+    @app.before_request
+    def _start_profile():
+        trigger = _trigger(rate)
+        if trigger is None:
+            return None
+        thread_id = threading.get_ident()
+        rule = request.url_rule.rule if request.url_rule else request.path
+        capture = ProfileCapture(
+            id=uuid.uuid4().hex,
+            endpoint=f"{request.method} {rule}",
+            method=request.method,
+            path=request.full_path.rstrip("?"),
+            trigger=trigger,
+            started_at=datetime.now(timezone.utc),
+        )
+        sampler = StackSampler(thread_id, interval)
+        _active[thread_id] = capture
+        g._rota_profile = (capture, sampler, time.perf_counter())
+        sampler.start()
+        return None
+
+    @app.after_request
+    def _stop_profile(response):
+        capture = _finish(response.status_code)
+        if capture is not None and capture.trigger == "header":
+            response.headers[PROFILE_ID_HEADER] = capture.id
+        return response
+
+    @app.teardown_request
+    def _abort_profile(exc):
+        # Only runs the capture to completion when after_request was skipped.
+        _finish(500 if exc is not None else None)
@@ -0,0 +1,267 @@
+"""Set-based recompute of ``user_trails`` progress after trail edits or backfills.
+
+``UserTrailsRepository.sync_user_trail_progress`` handles one enrollment per
+call (status lookups, two counts, a flush and a certificate check). This module
+applies the same rules to every enrollment of a trail in keyset-paginated
+chunks: per chunk one aggregate of completed items, one bulk ``UPDATE`` of the
+rows whose progress changed and one bulk ``INSERT`` of the missing
+certificates, committed together. ``on_chunk`` receives the last enrollment id
+of every committed chunk so a caller can checkpoint and resume;
+``recompute_enrollment_range`` is the same step over an id range of
+``user_trails`` for the parallel job runner (``app.jobs``).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.models.lk_enrollment_status import LkEnrollmentStatus as LkEnrollmentStatusORM
+from app.models.lk_progress_status import LkProgressStatus as LkProgressStatusORM
+from app.models.trail_items import TrailItems as TrailItemsORM
+from app.models.trails import Trails as TrailsORM
+from app.models.user_item_progress import UserItemProgress as UserItemProgressORM
+from app.models.user_trails import UserTrails as UserTrailsORM
+from app.repositories.CertificatesRepository import CertificatesRepository
+from app.repositories.UserOverviewRepository import UserOverviewRepository
+from app.services.trail_counters import trail_item_total
+
+RECOMPUTE_CHUNK_SIZE = 1000
+
+
+@dataclass
+class RecomputeStats:
+    enrollments: int = 0
+    updated: int = 0
+    completed: int = 0
+    certificates: int = 0
+
+    def add(self, other: "RecomputeStats") -> None:
+        self.enrollments += other.enrollments
+        self.updated += other.updated
+        self.completed += other.completed
+        self.certificates += other.certificates
+
+    def as_dict(self) -> dict[str, int]:
+        return {
+            "enrollments": self.enrollments,
+            "updated": self.updated,
+            "completed": self.completed,
+            "certificates": self.certificates,
+        }
+
+
+@dataclass(frozen=True)
+class _Statuses:
+    enrolled: Optional[int]
+    in_progress: Optional[int]
+    completed: Optional[int]
+    item_completed: Optional[int]
+
+
+def _load_statuses(db: Session) -> _Statuses:
+    enrollment = dict(
+        db.execute(select(LkEnrollmentStatusORM.code, LkEnrollmentStatusORM.id)).all()
+    )
+    item_completed = db.execute(
+        select(LkProgressStatusORM.id).where(LkProgressStatusORM.code == "COMPLETED")
+    ).scalar()
+    return _Statuses(
+        enrolled=enrollment.get("ENROLLED"),
+        in_progress=enrollment.get("IN_PROGRESS"),
+        completed=enrollment.get("COMPLETED"),
+        item_completed=item_completed,
+    )
+
+
+def count_enrollments(db: Session, trail_id: int) -> int:
+    return (
+        db.execute(
+            select(func.count(UserTrailsORM.id)).where(
+                UserTrailsORM.trail_id == trail_id
+            )
+        ).scalar()
+        or 0
+    )
+
+
+def issue_missing_certificates(db: Session, trail_id: int, user_ids: list[int]) -> int:
+    """Insert the certificates ``user_ids`` still lack on ``trail_id``."""
+    issued = CertificatesRepository(db).issue_many(
+        (user_id, trail_id) for user_id in user_ids
+    )
+    return len(issued)
+
+
+def _recompute_chunk(
+    db: Session,
+    trail_id: int,
+    total: int,
+    statuses: _Statuses,
+    enrollments: list,
+) -> RecomputeStats:
+    stats = RecomputeStats(enrollments=len(enrollments))
+    user_ids = [row.user_id for row in enrollments]
+    done_map: dict[int, int] = {}
+    if statuses.item_completed is not None:
+        done_map = dict(
+            db.execute(
+                select(UserItemProgressORM.user_id, func.count(UserItemProgressORM.id))
+                .join(
+                    TrailItemsORM, TrailItemsORM.id == UserItemProgressORM.trail_item_id
+                )
+                .where(
+                    TrailItemsORM.trail_id == trail_id,
+                    UserItemProgressORM.user_id.in_(user_ids),
+                    UserItemProgressORM.status_id == statuses.item_completed,
+                )
+                .group_by(UserItemProgressORM.user_id)
+            ).all()
+        )
+
+    now = datetime.now(timezone.utc)
+    updates: list[dict] = []
+    completed_users: list[int] = []
+    for row in enrollments:
+        done = int(done_map.get(row.user_id, 0))
+        pct = round(100.0 * done / total, 2) if total > 0 else 0.0
+        if total > 0 and done >= total:
+            status_id = statuses.completed or row.status_id
+            completed_at = (
+                row.completed_at
+                if row.completed_at is not None and row.status_id == statuses.completed
+                else now
+            )
+            completed_users.append(row.user_id)
+        else:
+            status_id = (
+                statuses.in_progress if done > 0 else statuses.enrolled
+            ) or row.status_id
+            completed_at = None
+
+        current_pct = (
+            float(row.progress_percent) if row.progress_percent is not None else None
+        )
+        if (current_pct, row.status_id, row.completed_at) == (
+            float(pct),
+            status_id,
+            completed_at,
+        ):
+            continue
+        patch = {"id": row.id, "progress_percent": pct, "status_id": status_id}
+        if completed_at != row.completed_at:
+            patch["completed_at"] = completed_at
+            patch["completed_at_utc"] = None
+        updates.append(patch)
+
+    if updates:
+        db.execute(
+            update(UserTrailsORM).execution_options(synchronize_session=False),
+            updates,
+        )
+        changed = {patch["id"] for patch in updates}
+        UserOverviewRepository(db).invalidate_users(
+            row.user_id for row in enrollments if row.id in changed
+        )
+    stats.updated = len(updates)
+    stats.completed = len(completed_users)
+    stats.certificates = issue_missing_certificates(db, trail_id, completed_users)
+    return stats
+
+
+def recompute_trail(
+    db: Session,
+    trail_id: int,
+    *,
+    chunk_size: int = RECOMPUTE_CHUNK_SIZE,
+    after_id: int = 0,
+    on_chunk: Optional[Callable[[int, RecomputeStats], None]] = None,
+) -> RecomputeStats:
+    """Recompute every enrollment of ``trail_id`` with ``id > after_id``.
+
+    Commits once per chunk and then calls ``on_chunk(last_enrollment_id,
+    running_stats)``. Rules match ``sync_user_trail_progress``: the original
+    ``completed_at`` of an already completed enrollment is kept.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size deve ser positivo.")
+    total = (
+        db.execute(select(trail_item_total()).where(TrailsORM.id == trail_id)).scalar()
+        or 0
+    )
+    statuses = _load_statuses(db)
+    stats = RecomputeStats()
+    cursor = after_id
+    while True:
+        enrollments = db.execute(
+            select(
+                UserTrailsORM.id,
+                UserTrailsORM.user_id,
+                UserTrailsORM.status_id,
+                UserTrailsORM.progress_percent,
+                UserTrailsORM.completed_at,
+            )
+            .where(UserTrailsORM.trail_id == trail_id, UserTrailsORM.id > cursor)
+            .order_by(UserTrailsORM.id)
+            .limit(chunk_size)
+        ).all()
+        if not enrollments:
+            break
+        stats.add(_recompute_chunk(db, trail_id, total, statuses, enrollments))
+        db.commit()
+        cursor = enrollments[-1].id
+        if on_chunk is not None:
+            on_chunk(cursor, stats)
+        if len(enrollments) < chunk_size:
+            break
+    return stats
+
+
+def recompute_enrollment_range(
+    db: Session,
+    start: int,
+    end: int,
+    *,
+    trail_ids: Optional[list[int]] = None,
+) -> RecomputeStats:
+    """Recompute enrollments with ``start <= id < end``; the caller commits."""
+    stmt = (
+        select(
+            UserTrailsORM.id,
+            UserTrailsORM.user_id,
+            UserTrailsORM.trail_id,
+            UserTrailsORM.status_id,
+            UserTrailsORM.progress_percent,
+            UserTrailsORM.completed_at,
+        )
+        .where(UserTrailsORM.id >= start, UserTrailsORM.id < end)
+        .order_by(UserTrailsORM.id)
+    )
+    if trail_ids:
+        stmt = stmt.where(UserTrailsORM.trail_id.in_(trail_ids))
+    by_trail: dict[int, list] = {}
+    for row in db.execute(stmt):
+        by_trail.setdefault(row.trail_id, []).append(row)
+    stats = RecomputeStats()
+    if not by_trail:
+        return stats
+
+    totals = dict(
+        db.execute(
+            select(TrailsORM.id, trail_item_total()).where(
+                TrailsORM.id.in_(list(by_trail))
+            )
+        ).all()
+    )
+    statuses = _load_statuses(db)
+    for trail_id, enrollments in by_trail.items():
+        stats.add(
+            _recompute_chunk(
+                db, trail_id, int(totals.get(trail_id) or 0), statuses, enrollments
+            )
+        )
+    return stats
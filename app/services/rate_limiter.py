@@ -1,12 +1,20 @@
-"""Rate limiter utilities resilient to multi-instance deployments."""
+"""Rate limiter utilities resilient to multi-instance deployments.
+
+Both backends implement GCRA: a key stores only its theoretical arrival time.
+A check can cover several scopes at once (e.g. account+IP, IP, global) and is
+all-or-nothing: a denied scope consumes nothing from the others. The Redis
+backend does it in one script call and falls back to the local limiter, behind
+a circuit breaker, when Redis errors or times out.
+"""
 
 from __future__ import annotations
 
 import logging
 import time
-from collections import defaultdict, deque
+from collections import OrderedDict
+from dataclasses import dataclass
 from threading import Lock
-from typing import Deque, DefaultDict, Tuple
+from typing import Optional, Sequence, Tuple
 from urllib.parse import urlsplit
 
 try:  # pragma: no cover - handled by runtime detection
@@ -38,58 +46,149 @@ def _mask_redis_url(url: str) -> str:
     return f"{parsed.scheme}://{host}{port}{db}" if parsed.scheme else f"redis://{host}{port}{db}"
 
 
-class FixedWindowRateLimiter:
-    """Track attempts per key within a rolling time window (in-memory)."""
+@dataclass(frozen=True)
+class RateLimit:
+    """``max_attempts`` per ``window_seconds`` for one scope key."""
+
+    key: str
+    max_attempts: int
+    window_seconds: float
+
+    @property
+    def interval(self) -> float:
+        return float(self.window_seconds) / max(int(self.max_attempts), 1)
+
+
+class _Shard:
+    __slots__ = ("lock", "tats")
+
+    def __init__(self) -> None:
+        self.lock = Lock()
+        # key -> theoretical arrival time, least recently used first.
+        self.tats: OrderedDict[str, float] = OrderedDict()
+
+
+class GcraRateLimiter:
+    """In-memory GCRA limiter: ``max_attempts`` per ``window_seconds`` per key.
+
+    Each key keeps a single float (its theoretical arrival time), so a check is
+    O(1) and memory does not depend on the number of hits. Keys are spread over
+    ``shards`` independently locked LRU maps; a key whose arrival time has
+    passed carries no state and is dropped when met at the cold end of its
+    shard, and each shard is hard-capped at ``max_keys / shards`` entries by
+    evicting its least recently used key.
+    """
 
-    def __init__(self, max_attempts: int, window_seconds: int) -> None:
-        self._max_attempts = max_attempts
+    def __init__(
+        self,
+        max_attempts: int,
+        window_seconds: int,
+        *,
+        max_keys: int = 100_000,
+        shards: int = 16,
+    ) -> None:
+        self._max_attempts = int(max_attempts)
         self._window = float(window_seconds)
-        self._hits: DefaultDict[str, Deque[float]] = defaultdict(deque)
-        self._lock = Lock()
+        self._shards = tuple(_Shard() for _ in range(max(shards, 1)))
+        self._max_per_shard = max(max_keys // len(self._shards), 1)
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return sum(len(shard.tats) for shard in self._shards)
+
+    def _shard(self, key: str) -> _Shard:
+        return self._shards[hash(key) % len(self._shards)]
+
+    def limit_for(self, key: str) -> RateLimit:
+        return RateLimit(key, self._max_attempts, self._window)
 
     def register_attempt(self, key: str) -> Tuple[bool, float | None]:
-        """Record a hit and return whether it's allowed and next allowed timestamp."""
+        """Record a hit and return whether it's allowed and the wait otherwise."""
+
+        return self.register_attempts([self.limit_for(key)])
+
+    def register_attempts(
+        self, limits: Sequence[RateLimit]
+    ) -> Tuple[bool, float | None]:
+        """Record a hit on every scope, or on none if any of them is exhausted."""
 
         now = time.monotonic()
-        cutoff = now - self._window
-        with self._lock:
-            bucket = self._hits[key]
-            while bucket and bucket[0] <= cutoff:
-                bucket.popleft()
-            if len(bucket) >= self._max_attempts:
-                retry_after = bucket[0] + self._window - now
-                return False, max(retry_after, 0.0)
-            bucket.append(now)
-            return True, None
+        retry_after = max((self._wait(limit, now) for limit in limits), default=0.0)
+        if retry_after > 0:
+            return False, retry_after
+        # Scopes live on different shards, so a concurrent hit can still win
+        # between the check above and here; the loser is simply denied.
+        for limit in limits:
+            shard = self._shard(limit.key)
+            with shard.lock:
+                tats = shard.tats
+                tat = max(tats.get(limit.key, now), now)
+                allow_at = tat + limit.interval - limit.window_seconds
+                if now < allow_at:
+                    return False, allow_at - now
+                tats[limit.key] = tat + limit.interval
+                tats.move_to_end(limit.key)
+                self._evict(tats, now)
+        return True, None
 
+    def _wait(self, limit: RateLimit, now: float) -> float:
+        shard = self._shard(limit.key)
+        with shard.lock:
+            tat = shard.tats.get(limit.key)
+        if tat is None:
+            return 0.0
+        return max(max(tat, now) + limit.interval - limit.window_seconds - now, 0.0)
 
-_RATE_LIMIT_LUA = """
-local key = KEYS[1]
+    def _evict(self, tats: OrderedDict[str, float], now: float) -> None:
+        # Idle keys first (cheap: stop at the first one still active), then the
+        # hard cap, which forgives the least recently used key.
+        while tats:
+            key, tat = next(iter(tats.items()))
+            if tat > now:
+                break
+            del tats[key]
+        while len(tats) > self._max_per_shard:
+            tats.popitem(last=False)
+            self.evicted += 1
+
+
+# Kept for callers and tests that still use the old name.
+FixedWindowRateLimiter = GcraRateLimiter
+
+
+# KEYS: one per scope. ARGV: now, then (interval, window) per scope. TATs are
+# stored as strings because Lua numbers are truncated to integers on return.
+_GCRA_LUA = """
 local now = tonumber(ARGV[1])
-local window = tonumber(ARGV[2])
-local limit = tonumber(ARGV[3])
-
-redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
-local count = redis.call('ZCARD', key)
-if count >= limit then
-  local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
-  local retry_after = 0
-  if oldest[2] then
-    retry_after = oldest[2] + window - now
-  else
-    retry_after = window
+local tats = {}
+local retry_after = 0
+for i = 1, #KEYS do
+  local interval = tonumber(ARGV[2 * i])
+  local window = tonumber(ARGV[2 * i + 1])
+  local stored = redis.call('GET', KEYS[i])
+  local tat = stored and tonumber(stored) or now
+  if tat < now then
+    tat = now
+  end
+  local allow_at = tat + interval - window
+  if now < allow_at and allow_at - now > retry_after then
+    retry_after = allow_at - now
   end
-  return {0, retry_after}
+  tats[i] = tat + interval
 end
-
-redis.call('ZADD', key, now, now)
-redis.call('EXPIRE', key, window)
-return {1, 0}
+if retry_after > 0 then
+  return {0, tostring(retry_after)}
+end
+for i = 1, #KEYS do
+  local ttl = math.ceil((tats[i] - now) * 1000)
+  redis.call('SET', KEYS[i], tostring(tats[i]), 'PX', ttl)
+end
+return {1, '0'}
 """
 
 
-class RedisFixedWindowRateLimiter:
-    """Fixed window limiter backed by Redis sorted sets."""
+class RedisGcraRateLimiter:
+    """GCRA limiter in Redis: one string per scope key, one round-trip per check."""
 
     def __init__(
         self,
@@ -103,35 +202,161 @@ class RedisFixedWindowRateLimiter:
         self._max_attempts = int(max_attempts)
         self._window = float(window_seconds)
         self._namespace = namespace
-        self._script = client.register_script(_RATE_LIMIT_LUA)
+        self._script = client.register_script(_GCRA_LUA)
 
     def _key(self, key: str) -> str:
-        return f"rate:{self._namespace}:{key}"
+        # New prefix: the old sliding-window limiter kept sorted sets under
+        # ``rate:``, which GET would reject with WRONGTYPE.
+        return f"rl:{self._namespace}:{key}"
+
+    def limit_for(self, key: str) -> RateLimit:
+        return RateLimit(key, self._max_attempts, self._window)
 
     def register_attempt(self, key: str) -> Tuple[bool, float | None]:
-        now = time.time()
+        return self.register_attempts([self.limit_for(key)])
+
+    def register_attempts(
+        self, limits: Sequence[RateLimit]
+    ) -> Tuple[bool, float | None]:
+        args: list[float] = [time.time()]
+        for limit in limits:
+            args.extend((limit.interval, float(limit.window_seconds)))
         allowed, retry_after = self._script(
-            keys=[self._key(key)],
-            args=[now, self._window, self._max_attempts],
+            keys=[self._key(limit.key) for limit in limits], args=args
         )
         if int(allowed):
             return True, None
-        retry_after = float(retry_after)
-        return False, max(retry_after, 0.0)
+        return False, max(float(retry_after), 0.0)
 
 
-def _build_auth_limiter():
+# Kept for callers that still use the old name.
+RedisFixedWindowRateLimiter = RedisGcraRateLimiter
+
+
+class CircuitBreaker:
+    """Open after ``failure_threshold`` consecutive failures for ``reset_seconds``.
+
+    Once the timeout passes a single trial call is let through (half-open); its
+    success closes the breaker and its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_seconds: float = 30.0):
+        self.failure_threshold = max(int(failure_threshold), 1)
+        self.reset_seconds = float(reset_seconds)
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial:
+                return False
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class FallbackRateLimiter:
+    """Use ``primary`` (Redis) and fall back to ``fallback`` (local) on errors."""
+
+    def __init__(
+        self,
+        primary: RedisGcraRateLimiter,
+        fallback: GcraRateLimiter,
+        breaker: CircuitBreaker,
+    ) -> None:
+        self.primary = primary
+        self.fallback = fallback
+        self.breaker = breaker
+
+    def register_attempt(self, key: str) -> Tuple[bool, float | None]:
+        return self.register_attempts([self.fallback.limit_for(key)])
+
+    def register_attempts(
+        self, limits: Sequence[RateLimit]
+    ) -> Tuple[bool, float | None]:
+        if self.breaker.allow():
+            try:
+                result = self.primary.register_attempts(limits)
+            except (RedisError, OSError) as exc:
+                was_open = self.breaker.is_open
+                self.breaker.record_failure()
+                if self.breaker.is_open and not was_open:
+                    LOGGER.warning(
+                        "Redis indisponível para rate limiting; usando memória local",
+                        exc_info=exc,
+                    )
+            else:
+                if self.breaker.is_open:
+                    LOGGER.info("Redis voltou a responder para rate limiting")
+                self.breaker.record_success()
+                return result
+        return self.fallback.register_attempts(limits)
+
+
+def build_limiter(
+    max_attempts: int,
+    window_seconds: int,
+    *,
+    namespace: str,
+    max_keys: int | None = None,
+):
+    """Redis-backed limiter with local fallback, or local only without Redis."""
+
+    local = GcraRateLimiter(
+        max_attempts=max_attempts,
+        window_seconds=window_seconds,
+        max_keys=max_keys or settings.auth_rate_limit_max_keys,
+    )
     if settings.redis_url and from_url and Redis is not None:
+        timeout = settings.rate_limit_redis_timeout_ms / 1000
         try:
-            client = from_url(settings.redis_url, decode_responses=False)
+            client = from_url(
+                settings.redis_url,
+                decode_responses=False,
+                socket_timeout=timeout,
+                socket_connect_timeout=timeout,
+            )
             LOGGER.info(
                 "Usando Redis para rate limiting",
-                extra={"redis": _mask_redis_url(settings.redis_url)},
+                extra={
+                    "redis": _mask_redis_url(settings.redis_url),
+                    "namespace": namespace,
+                },
             )
-            return RedisFixedWindowRateLimiter(
-                client,
-                max_attempts=settings.auth_rate_limit_max_attempts,
-                window_seconds=settings.auth_rate_limit_window_seconds,
+            return FallbackRateLimiter(
+                RedisGcraRateLimiter(
+                    client,
+                    max_attempts=max_attempts,
+                    window_seconds=window_seconds,
+                    namespace=namespace,
+                ),
+                local,
+                CircuitBreaker(
+                    failure_threshold=settings.rate_limit_breaker_failures,
+                    reset_seconds=settings.rate_limit_breaker_reset_seconds,
+                ),
             )
         except RedisError as exc:
             LOGGER.warning(
@@ -142,15 +367,59 @@ def _build_auth_limiter():
         LOGGER.warning(
             "Redis não está disponível no ambiente atual; usando rate limiting em memória"
         )
-    return FixedWindowRateLimiter(
-        max_attempts=settings.auth_rate_limit_max_attempts,
-        window_seconds=settings.auth_rate_limit_window_seconds,
+    return local
+
+
+def _build_auth_limiter():
+    return build_limiter(
+        settings.auth_rate_limit_max_attempts,
+        settings.auth_rate_limit_window_seconds,
+        namespace="auth",
     )
 
 
 _auth_limiter = _build_auth_limiter()
 
 
+def auth_rate_limits(
+    scope: str, client_ip: str, identifier: str | None = None
+) -> list[RateLimit]:
+    """Scopes checked together for an auth attempt: account+IP, IP and global."""
+
+    window = settings.auth_rate_limit_window_seconds
+    limits = [
+        RateLimit(
+            ":".join(part for part in (scope, identifier, client_ip) if part),
+            settings.auth_rate_limit_max_attempts,
+            window,
+        )
+    ]
+    if identifier and settings.auth_rate_limit_ip_max_attempts:
+        limits.append(
+            RateLimit(
+                f"{scope}:ip:{client_ip}",
+                settings.auth_rate_limit_ip_max_attempts,
+                window,
+            )
+        )
+    if settings.auth_rate_limit_global_max_attempts:
+        limits.append(
+            RateLimit(
+                f"{scope}:global", settings.auth_rate_limit_global_max_attempts, window
+            )
+        )
+    return limits
+
+
+def check_auth_rate_limits(limits: Sequence[RateLimit]) -> float | None:
+    """Check several scopes at once; returns the wait in seconds when limited."""
+
+    allowed, retry_after = _auth_limiter.register_attempts(limits)
+    if allowed:
+        return None
+    return retry_after or 0.0
+
+
 def check_auth_rate_limit(identifier: str) -> float | None:
     """Check whether the identifier can perform another auth attempt."""
 
@@ -0,0 +1,244 @@
+"""Two-tier cache for rendered artefacts (QR codes, certificate documents).
+
+Entries are immutable bytes stored by content key (a SHA-256 of everything the
+rendering depends on), so they never need invalidation: a change in the inputs
+is a different key. Lookups go through a per-process LRU first and then a
+shared store, Redis when ``REDIS_URL`` is set or a directory otherwise, so
+restarts and other workers reuse what one of them rendered. Both stores are
+bounded: Redis entries expire after the TTL, and the directory drops files
+older than the TTL and keeps at most ``RENDER_CACHE_MAX_FILES``, oldest first.
+Store errors only cost a re-render.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional, Protocol
+
+try:  # pragma: no cover - handled by runtime detection
+    from redis import from_url
+    from redis.exceptions import RedisError
+except ModuleNotFoundError:  # pragma: no cover - redis is opcional
+    from_url = None  # type: ignore
+
+    class RedisError(Exception):
+        """Fallback exception when redis is unavailable."""
+
+        pass
+
+
+from app.core.settings import settings
+
+LOGGER = logging.getLogger(__name__)
+
+
+def content_key(*parts: object) -> str:
+    return hashlib.sha256("\n".join(str(part) for part in parts).encode()).hexdigest()
+
+
+class RenderStore(Protocol):
+    def get(self, key: str) -> Optional[bytes]: ...
+
+    def put(self, key: str, data: bytes) -> None: ...
+
+
+class DiskStore:
+    """One file per key under ``root/<2 hex chars>/``; writes are atomic.
+
+    Files older than ``ttl_seconds`` are misses. Every ``prune_every`` writes
+    (starting with the first) the directory is swept: expired files go, then
+    the oldest ones until at most ``max_files`` remain.
+    """
+
+    def __init__(
+        self,
+        root: str | os.PathLike,
+        *,
+        ttl_seconds: Optional[int] = None,
+        max_files: Optional[int] = None,
+        prune_every: int = 256,
+    ) -> None:
+        self.root = Path(root)
+        self.ttl_seconds = ttl_seconds
+        self.max_files = max_files
+        self.prune_every = prune_every
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def _expired(self, mtime: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - mtime > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            if self._expired(path.stat().st_mtime, time.time()):
+                path.unlink(missing_ok=True)
+                return None
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def prune(self) -> int:
+        """Apply the age and count limits now; returns how many files went."""
+        now = time.time()
+        entries = []
+        for path in self.root.glob("*/*"):
+            if path.suffix == ".tmp":
+                continue
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+        doomed = [path for mtime, path in entries if self._expired(mtime, now)]
+        live = sorted(entry for entry in entries if not self._expired(entry[0], now))
+        if self.max_files is not None and len(live) > self.max_files:
+            doomed += [path for _, path in live[: len(live) - self.max_files]]
+        for path in doomed:
+            path.unlink(missing_ok=True)
+        return len(doomed)
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        with self._lock:
+            self._writes += 1
+            sweep = (self._writes - 1) % self.prune_every == 0
+        if sweep:
+            self.prune()
+
+
+class RedisStore:
+    def __init__(self, client, prefix: str, ttl_seconds: int) -> None:
+        self._client = client
+        self._prefix = prefix
+        self._ttl = ttl_seconds
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(f"{self._prefix}:{key}")
+
+    def put(self, key: str, data: bytes) -> None:
+        self._client.set(f"{self._prefix}:{key}", data, ex=self._ttl)
+
+
+class RenderCache:
+    """Per-process LRU of rendered bytes in front of an optional shared store."""
+
+    def __init__(self, max_size: int, store: Optional[RenderStore] = None) -> None:
+        self.max_size = max_size
+        self.store = store
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.store_hits = 0
+        self.renders = 0
+
+    def _remember(self, key: str, data: bytes) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _load(self, key: str) -> Optional[bytes]:
+        if self.store is None:
+            return None
+        try:
+            return self.store.get(key)
+        except (RedisError, OSError) as exc:
+            LOGGER.warning("Falha ao ler do cache compartilhado", exc_info=exc)
+            return None
+
+    def _save(self, key: str, data: bytes) -> None:
+        if self.store is None:
+            return
+        try:
+            self.store.put(key, data)
+        except (RedisError, OSError) as exc:
+            LOGGER.warning("Falha ao gravar no cache compartilhado", exc_info=exc)
+
+    def get(self, key: str, render: Callable[[], bytes]) -> bytes:
+        """Return the bytes stored under ``key``, calling ``render`` on a miss."""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+        data = self._load(key)
+        if data is not None:
+            self.store_hits += 1
+        else:
+            data = render()
+            self.renders += 1
+            self._save(key, data)
+        self._remember(key, data)
+        return data
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.store_hits = 0
+            self.renders = 0
+
+
+def build_store(
+    prefix: str, directory: Optional[str], ttl_seconds: int
+) -> Optional[RenderStore]:
+    if settings.redis_url and from_url is not None:
+        try:
+            client = from_url(
+                settings.redis_url,
+                decode_responses=False,
+                socket_timeout=settings.rate_limit_redis_timeout_ms / 1000,
+            )
+            return RedisStore(client, prefix, ttl_seconds)
+        except RedisError as exc:
+            LOGGER.warning(
+                "Falha ao inicializar Redis para o cache de renderização; usando disco",
+                exc_info=exc,
+            )
+    if directory:
+        return DiskStore(
+            directory,
+            ttl_seconds=ttl_seconds,
+            max_files=settings.render_cache_max_files,
+        )
+    return None
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def submit_background(fn: Callable, *args) -> Future:
+    """Run ``fn`` on the shared single-thread render executor."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="rota-render"
+                )
+    return _executor.submit(fn, *args)
@@ -0,0 +1,149 @@
+"""Per-route rate limits and load shedding for the regular API.
+
+``@rate_limited("write")`` / ``@rate_limited("read")`` give a route its own
+budget per caller: the logged-in user when the session cookie is valid, the
+client IP otherwise (plus an optional per-IP budget shared by every route of
+the same kind). Budgets come from the ``API_RATE_LIMIT_*`` settings and use the
+same GCRA limiters as the auth routes, under the ``api`` Redis namespace.
+
+``init_load_shedding`` rejects requests with 503 while the average wait for a
+database connection (``app.core.db.pool_wait``) is above
+``LOAD_SHED_POOL_WAIT_MS``. Past the threshold the share of rejected requests
+grows with the excess, reaching all of them at twice the threshold.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+from functools import wraps
+from typing import Callable, Literal, Optional
+
+from flask import Flask, jsonify, request
+from werkzeug.exceptions import HTTPException
+
+from app.core.db import pool_wait
+from app.core.settings import settings
+from app.services.rate_limiter import RateLimit, build_limiter
+from app.services.security import get_current_user_id
+
+Kind = Literal["read", "write"]
+
+SHED_EXEMPT_PATHS = frozenset({"/healthz"})
+
+
+def _build_api_limiter():
+    return build_limiter(
+        max(settings.api_rate_limit_write_max_attempts, 1),
+        settings.api_rate_limit_window_seconds,
+        namespace="api",
+    )
+
+
+_api_limiter = _build_api_limiter()
+
+
+def reset_api_limiter() -> None:
+    """Start over with empty budgets (keys embed user ids, which tests reuse)."""
+
+    global _api_limiter
+    _api_limiter = _build_api_limiter()
+
+
+def _client_ip() -> str:
+    forwarded_for = request.headers.get("X-Forwarded-For", "")
+    ip = forwarded_for.split(",", 1)[0].strip() if forwarded_for else ""
+    return ip or request.remote_addr or "unknown"
+
+
+def _caller() -> str:
+    try:
+        return f"u{get_current_user_id()}"
+    except HTTPException:
+        return f"ip{_client_ip()}"
+
+
+def _budget(kind: Kind) -> int:
+    if kind == "write":
+        return settings.api_rate_limit_write_max_attempts
+    return settings.api_rate_limit_read_max_attempts
+
+
+def api_rate_limits(kind: Kind, endpoint: str) -> list[RateLimit]:
+    """Scopes checked for one call of ``endpoint``; empty when disabled."""
+
+    window = settings.api_rate_limit_window_seconds
+    limits = []
+    budget = _budget(kind)
+    if budget:
+        limits.append(RateLimit(f"{kind}:{endpoint}:{_caller()}", budget, window))
+    if settings.api_rate_limit_ip_max_attempts:
+        limits.append(
+            RateLimit(
+                f"{kind}:ip:{_client_ip()}",
+                settings.api_rate_limit_ip_max_attempts,
+                window,
+            )
+        )
+    return limits
+
+
+def _too_many_requests(retry_after: float):
+    response = jsonify(
+        {"detail": "Muitas requisições. Aguarde antes de tentar novamente."}
+    )
+    response.status_code = 429
+    response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def rate_limited(kind: Kind = "write") -> Callable:
+    """Limit the decorated view with the ``kind`` budget of its caller."""
+
+    if kind not in ("read", "write"):
+        raise ValueError(f"Tipo de limite inválido: {kind}")
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            limits = api_rate_limits(kind, request.endpoint or view.__name__)
+            if limits:
+                allowed, retry_after = _api_limiter.register_attempts(limits)
+                if not allowed:
+                    return _too_many_requests(retry_after or 0.0)
+            return view(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def shed_probability(wait_ms: float, threshold_ms: Optional[float] = None) -> float:
+    """Share of requests to reject for the current pool wait."""
+
+    threshold = (
+        settings.load_shed_pool_wait_ms if threshold_ms is None else threshold_ms
+    )
+    if not threshold or wait_ms <= threshold:
+        return 0.0
+    return min(1.0, (wait_ms - threshold) / threshold)
+
+
+def init_load_shedding(app: Flask) -> None:
+    """Reject requests with 503 while the connection pool is saturated."""
+
+    @app.before_request
+    def _shed_load():
+        if settings.load_shed_pool_wait_ms is None:
+            return None
+        if request.method == "OPTIONS" or request.path in SHED_EXEMPT_PATHS:
+            return None
+        probability = shed_probability(pool_wait.wait_ms)
+        if probability <= 0.0 or random.random() >= probability:
+            return None
+        response = jsonify(
+            {"detail": "Serviço sobrecarregado. Tente novamente em instantes."}
+        )
+        response.status_code = 503
+        response.headers["Retry-After"] = str(max(1, math.ceil(pool_wait.half_life)))
+        return response
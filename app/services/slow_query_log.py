@@ -0,0 +1,256 @@
+"""Record statements slower than ``SLOW_QUERY_THRESHOLD_MS`` to a JSONL log.
+
+Each record carries the statement, its parameters, the repository method that
+issued it and, on Postgres, an ``EXPLAIN (ANALYZE, BUFFERS)`` of SELECTs re-run
+in a read-only transaction on a background thread.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.settings import settings
+
+LOGGER = logging.getLogger(__name__)
+
+MAX_PARAMS_CHARS = 2000
+EXPLAIN_TIMEOUT_MS = 10_000
+
+_WHITESPACE = re.compile(r"\s+")
+_IN_LIST = re.compile(r"\(\s*(%\([^)]+\)s|\?|:\w+)(\s*,\s*(%\([^)]+\)s|\?|:\w+))+\s*\)")
+_SKIP_PATH_PARTS = (
+    f"{os.sep}sqlalchemy{os.sep}",
+    f"{os.sep}logging{os.sep}",
+    __file__,
+)
+
+
+def fingerprint(statement: str) -> str:
+    """Stable id for a query shape (whitespace and IN-list length ignored)."""
+    normalized = _WHITESPACE.sub(" ", statement).strip()
+    normalized = _IN_LIST.sub("(?...)", normalized)
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def _is_plain_select(statement: str) -> bool:
+    head = statement.lstrip().lower()
+    if not (head.startswith("select") or head.startswith("with")):
+        return False
+    return not re.search(r"\b(insert|update|delete|for\s+update)\b", head)
+
+
+def find_origin() -> Optional[str]:
+    """Return ``Class.method`` of the innermost repository frame on the stack."""
+    frame = sys._getframe(1)
+    fallback: Optional[str] = None
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not any(part in filename for part in _SKIP_PATH_PARTS):
+            owner = frame.f_locals.get("self")
+            owner_name = type(owner).__name__ if owner is not None else ""
+            if owner_name.endswith("Repository"):
+                return f"{owner_name}.{frame.f_code.co_name}"
+            if fallback is None and f"{os.sep}app{os.sep}" in filename:
+                module = os.path.splitext(os.path.basename(filename))[0]
+                fallback = f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return fallback
+
+
+def _build_logger(path: str, max_bytes: int, backup_count: int) -> logging.Logger:
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    logger = logging.getLogger(f"rota.slow_queries.{os.path.abspath(path)}")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    if not logger.handlers:
+        handler = RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+    return logger
+
+
+class SlowQueryRecorder:
+    """Engine listener pair that logs statements above a latency threshold."""
+
+    def __init__(
+        self,
+        engine: Engine,
+        *,
+        threshold_ms: float,
+        log_path: str,
+        explain: bool,
+        explain_cooldown_seconds: float,
+        max_bytes: int,
+        backup_count: int,
+    ) -> None:
+        self.engine = engine
+        self.threshold_ms = threshold_ms
+        self.explain = explain and engine.dialect.name == "postgresql"
+        self.explain_cooldown_seconds = explain_cooldown_seconds
+        self._logger = _build_logger(log_path, max_bytes, backup_count)
+        self._last_explained: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    # --- listeners ---------------------------------------------------------
+    # The start time lives on the statement's execution context, so a statement
+    # that raises (and never reaches ``_after``) leaves nothing behind.
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._rota_slow_query_start = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_rota_slow_query_start", None)
+        if started is None:
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms < self.threshold_ms:
+            return
+        record = {
+            "type": "slow_query",
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(elapsed_ms, 3),
+            "fingerprint": fingerprint(statement),
+            "origin": find_origin(),
+            "executemany": bool(executemany),
+            "statement": statement,
+            "params": repr(parameters)[:MAX_PARAMS_CHARS],
+        }
+        if not executemany and self._should_explain(statement, record["fingerprint"]):
+            self._submit_explain(record, statement, parameters)
+        else:
+            self._write(record)
+
+    # --- explain -----------------------------------------------------------
+    def _should_explain(self, statement: str, key: str) -> bool:
+        if not self.explain or not _is_plain_select(statement):
+            return False
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_explained.get(key)
+            if last is not None and now - last < self.explain_cooldown_seconds:
+                return False
+            self._last_explained[key] = now
+        return True
+
+    def _submit_explain(self, record: dict, statement: str, parameters: Any) -> None:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=1, thread_name_prefix="rota-explain"
+                    )
+        self._executor.submit(self._explain_and_write, record, statement, parameters)
+
+    def _explain_and_write(self, record: dict, statement: str, parameters: Any) -> None:
+        try:
+            record["explain"] = self.run_explain(statement, parameters)
+        except Exception as exc:  # noqa: BLE001 - never break the app for a plan
+            record["explain_error"] = str(exc)
+        self._write(record)
+
+    def run_explain(self, statement: str, parameters: Any) -> Any:
+        # The connection runs its own statements through this engine's listeners,
+        # so mark it to keep the EXPLAIN itself out of the log.
+        with self.engine.connect() as conn:
+            conn.info["_rota_slow_query_skip"] = True
+            try:
+                conn.exec_driver_sql("SET TRANSACTION READ ONLY")
+                conn.exec_driver_sql(
+                    f"SET LOCAL statement_timeout = {int(EXPLAIN_TIMEOUT_MS)}"
+                )
+                result = conn.exec_driver_sql(
+                    "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement,
+                    parameters,
+                )
+                plan = result.scalar()
+            finally:
+                conn.rollback()
+                conn.info.pop("_rota_slow_query_skip", None)
+        return json.loads(plan) if isinstance(plan, str) else plan
+
+    def _write(self, record: dict) -> None:
+        self._logger.info(json.dumps(record, default=str))
+
+    # --- lifecycle ---------------------------------------------------------
+    def _before_guarded(self, conn, *args):
+        if not conn.info.get("_rota_slow_query_skip"):
+            self._before(conn, *args)
+
+    def _after_guarded(self, conn, *args):
+        if not conn.info.get("_rota_slow_query_skip"):
+            self._after(conn, *args)
+
+    def attach(self) -> "SlowQueryRecorder":
+        event.listen(self.engine, "before_cursor_execute", self._before_guarded)
+        event.listen(self.engine, "after_cursor_execute", self._after_guarded)
+        return self
+
+    def detach(self) -> None:
+        event.remove(self.engine, "before_cursor_execute", self._before_guarded)
+        event.remove(self.engine, "after_cursor_execute", self._after_guarded)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+_installed: dict[int, SlowQueryRecorder] = {}
+
+
+def install_slow_query_log(
+    engine: Engine,
+    *,
+    threshold_ms: float | None = None,
+    log_path: str | None = None,
+    explain: bool | None = None,
+) -> Optional[SlowQueryRecorder]:
+    """Attach the recorder to ``engine`` once; no-op when no threshold is set."""
+
+    threshold = (
+        settings.slow_query_threshold_ms if threshold_ms is None else threshold_ms
+    )
+    if threshold is None:
+        return None
+    existing = _installed.get(id(engine))
+    if existing is not None:
+        return existing
+
+    recorder = SlowQueryRecorder(
+        engine,
+        threshold_ms=threshold,
+        log_path=log_path or settings.slow_query_log_path,
+        explain=settings.slow_query_explain if explain is None else explain,
+        explain_cooldown_seconds=settings.slow_query_explain_cooldown_seconds,
+        max_bytes=settings.slow_query_log_max_bytes,
+        backup_count=settings.slow_query_log_backup_count,
+    ).attach()
+    _installed[id(engine)] = recorder
+    LOGGER.info(
+        "Slow query log enabled (>= %.1f ms) at %s",
+        threshold,
+        log_path or settings.slow_query_log_path,
+    )
+    return recorder
+
+
+def uninstall_slow_query_log(engine: Engine) -> None:
+    recorder = _installed.pop(id(engine), None)
+    if recorder is not None:
+        recorder.detach()
@@ -0,0 +1,527 @@
+"""Stream trails in and out as NDJSON (one complete trail tree per line).
+
+Export pages through trails by id and loads each page's sections, items, forms,
+questions and options with one query per table, so memory is bounded by the page
+size. Legacy items without a section are exported in an extra last section
+(``UNSECTIONED_TITLE``), so an import recreates them inside it. Import validates line by line and writes each batch of trails through the
+bulk builder pipeline; a batch that fails is retried trail by trail so errors are
+reported against the offending line.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.form_question_options import (
+    FormQuestionOption as FormQuestionOptionORM,
+)
+from app.models.form_questions import FormQuestion as FormQuestionORM
+from app.models.forms import Form as FormORM
+from app.models.lk_item_type import LkItemType as LkItemTypeORM
+from app.models.lk_question_type import LkQuestionType as LkQuestionTypeORM
+from app.models.trail_items import TrailItems as TrailItemsORM
+from app.models.trail_sections import TrailSections as TrailSectionsORM
+from app.models.trails import Trails as TrailsORM
+from app.services.trail_builder import TrailBuilder
+from app.services.trail_payload import AdminTrailCreateIn
+
+LOGGER = logging.getLogger(__name__)
+
+ARCHIVE_FORMAT = "rota-trails"
+ARCHIVE_VERSION = 1
+EXPORT_PAGE_SIZE = 100
+IMPORT_BATCH_SIZE = 50
+MAX_REPORTED_ERRORS = 100
+UNSECTIONED_TITLE = "Itens sem seção"
+
+
+def _flag(value: Optional[bool], legacy: Optional[str], truthy: str) -> bool:
+    if value is not None:
+        return bool(value)
+    if legacy is not None:
+        return legacy.upper() == truthy
+    return False
+
+
+def _order_key(row: dict[str, Any]) -> tuple[int, int]:
+    return (row["order_index"] or 0, row["id"])
+
+
+# --- export --------------------------------------------------------------
+
+
+def _group(rows: Iterable[dict[str, Any]], key: str) -> dict[int, list[dict]]:
+    grouped: dict[int, list[dict]] = {}
+    for row in rows:
+        grouped.setdefault(row[key], []).append(row)
+    for children in grouped.values():
+        children.sort(key=_order_key)
+    return grouped
+
+
+def _mappings(db: Session, stmt) -> list[dict[str, Any]]:
+    return [dict(row) for row in db.execute(stmt).mappings()]
+
+
+def _item_payload(
+    item: dict[str, Any],
+    forms: dict[int, dict],
+    questions: dict[int, list[dict]],
+    options: dict[int, list[dict]],
+) -> dict[str, Any]:
+    item_payload: dict[str, Any] = {
+        "title": item["title"] or "",
+        "type": (item["legacy_type"] or item["type_code"] or "").upper(),
+        "url": item["url"] or "",
+        "duration_seconds": item["duration_seconds"],
+        "requires_completion": _flag(
+            item["requires_completion"],
+            item["requires_completion_yn"],
+            "S",
+        ),
+        "order_index": item["order_index"] or 0,
+    }
+    form = forms.get(item["id"])
+    if form:
+        item_payload["form"] = {
+            "title": form["title"],
+            "description": form["description"],
+            "min_score_to_pass": float(form["min_score_to_pass"] or 70),
+            "randomize_questions": _flag(
+                form["randomize_questions"],
+                form["randomize_questions_yn"],
+                "S",
+            ),
+            "questions": [
+                {
+                    "prompt": question["prompt"] or "",
+                    "type": (question["type_code"] or "ESSAY").upper(),
+                    "required": _flag(
+                        question["required"], question["required_yn"], "Y"
+                    ),
+                    "points": float(question["points"] or 0),
+                    "order_index": question["order_index"] or 0,
+                    "options": [
+                        {
+                            "text": option["option_text"] or "",
+                            "is_correct": _flag(
+                                option["is_correct"],
+                                option["is_correct_yn"],
+                                "Y",
+                            ),
+                            "order_index": option["order_index"] or 0,
+                        }
+                        for option in options.get(question["id"], [])
+                    ],
+                }
+                for question in questions.get(form["id"], [])
+            ],
+        }
+    return item_payload
+
+
+def _load_page(db: Session, trails: list[dict[str, Any]]) -> Iterator[dict]:
+    trail_ids = [trail["id"] for trail in trails]
+    sections = _group(
+        _mappings(
+            db,
+            select(
+                TrailSectionsORM.id,
+                TrailSectionsORM.trail_id,
+                TrailSectionsORM.title,
+                TrailSectionsORM.order_index,
+            ).where(TrailSectionsORM.trail_id.in_(trail_ids)),
+        ),
+        "trail_id",
+    )
+    item_rows = _mappings(
+        db,
+        select(
+            TrailItemsORM.id,
+            TrailItemsORM.trail_id,
+            TrailItemsORM.section_id,
+            TrailItemsORM.title,
+            TrailItemsORM.url,
+            TrailItemsORM.duration_seconds,
+            TrailItemsORM.order_index,
+            TrailItemsORM.legacy_type,
+            TrailItemsORM.requires_completion,
+            TrailItemsORM.requires_completion_yn,
+            LkItemTypeORM.code.label("type_code"),
+        )
+        .outerjoin(LkItemTypeORM, LkItemTypeORM.id == TrailItemsORM.item_type_id)
+        .where(TrailItemsORM.trail_id.in_(trail_ids)),
+    )
+    items = _group(
+        (row for row in item_rows if row["section_id"] is not None), "section_id"
+    )
+    unsectioned = _group(
+        (row for row in item_rows if row["section_id"] is None), "trail_id"
+    )
+    item_ids = [row["id"] for row in item_rows]
+    forms = {
+        row["trail_item_id"]: row
+        for row in (
+            _mappings(
+                db,
+                select(
+                    FormORM.id,
+                    FormORM.trail_item_id,
+                    FormORM.title,
+                    FormORM.description,
+                    FormORM.min_score_to_pass,
+                    FormORM.randomize_questions,
+                    FormORM.randomize_questions_yn,
+                ).where(FormORM.trail_item_id.in_(item_ids)),
+            )
+            if item_ids
+            else []
+        )
+    }
+    form_ids = [row["id"] for row in forms.values()]
+    question_rows = (
+        _mappings(
+            db,
+            select(
+                FormQuestionORM.id,
+                FormQuestionORM.form_id,
+                FormQuestionORM.prompt,
+                FormQuestionORM.required,
+                FormQuestionORM.required_yn,
+                FormQuestionORM.order_index,
+                FormQuestionORM.points,
+                LkQuestionTypeORM.code.label("type_code"),
+            )
+            .outerjoin(
+                LkQuestionTypeORM,
+                LkQuestionTypeORM.id == FormQuestionORM.question_type_id,
+            )
+            .where(FormQuestionORM.form_id.in_(form_ids)),
+        )
+        if form_ids
+        else []
+    )
+    questions = _group(question_rows, "form_id")
+    question_ids = [row["id"] for row in question_rows]
+    options = _group(
+        (
+            _mappings(
+                db,
+                select(
+                    FormQuestionOptionORM.id,
+                    FormQuestionOptionORM.question_id,
+                    FormQuestionOptionORM.option_text,
+                    FormQuestionOptionORM.is_correct,
+                    FormQuestionOptionORM.is_correct_yn,
+                    FormQuestionOptionORM.order_index,
+                ).where(FormQuestionOptionORM.question_id.in_(question_ids)),
+            )
+            if question_ids
+            else []
+        ),
+        "question_id",
+    )
+
+    for trail in trails:
+        sections_payload = [
+            {
+                "title": section["title"] or "",
+                "order_index": section["order_index"] or 0,
+                "items": [
+                    _item_payload(item, forms, questions, options)
+                    for item in items.get(section["id"], [])
+                ],
+            }
+            for section in sections.get(trail["id"], [])
+        ]
+        legacy_items = unsectioned.get(trail["id"])
+        if legacy_items:
+            LOGGER.warning(
+                "Trilha %s: %d itens sem seção exportados em '%s'.",
+                trail["id"],
+                len(legacy_items),
+                UNSECTIONED_TITLE,
+            )
+            sections_payload.append(
+                {
+                    "title": UNSECTIONED_TITLE,
+                    "order_index": 1
+                    + max(
+                        (section["order_index"] for section in sections_payload),
+                        default=-1,
+                    ),
+                    "items": [
+                        dict(
+                            _item_payload(item, forms, questions, options),
+                            order_index=position,
+                        )
+                        for position, item in enumerate(legacy_items)
+                    ],
+                }
+            )
+        yield {
+            "type": "trail",
+            "source_id": trail["id"],
+            "name": trail["name"],
+            "thumbnail_url": trail["thumbnail_url"],
+            "description": trail["description"],
+            "author": trail["author"],
+            "sections": sections_payload,
+        }
+
+
+def iter_export(
+    db: Session,
+    *,
+    trail_ids: Optional[Iterable[int]] = None,
+    page_size: int = EXPORT_PAGE_SIZE,
+) -> Iterator[str]:
+    """Yield the archive as NDJSON lines (header first, one trail per line)."""
+
+    yield json.dumps(
+        {
+            "type": "header",
+            "format": ARCHIVE_FORMAT,
+            "version": ARCHIVE_VERSION,
+            "exported_at": datetime.now(timezone.utc).isoformat(),
+        }
+    ) + "\n"
+
+    wanted = sorted(set(trail_ids)) if trail_ids is not None else None
+    last_id = 0
+    while True:
+        stmt = (
+            select(
+                TrailsORM.id,
+                TrailsORM.name,
+                TrailsORM.thumbnail_url,
+                TrailsORM.description,
+                TrailsORM.author,
+            )
+            .where(TrailsORM.id > last_id)
+            .order_by(TrailsORM.id)
+            .limit(page_size)
+        )
+        if wanted is not None:
+            stmt = stmt.where(TrailsORM.id.in_(wanted))
+        page = _mappings(db, stmt)
+        if not page:
+            return
+        for record in _load_page(db, page):
+            yield json.dumps(record, ensure_ascii=False) + "\n"
+        last_id = page[-1]["id"]
+        # Drop anything the page pulled into the session before the next one.
+        db.expunge_all()
+
+
+# --- import --------------------------------------------------------------
+
+
+@dataclass
+class LineError:
+    line: int
+    detail: str
+    name: Optional[str] = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"line": self.line, "name": self.name, "detail": self.detail}
+
+
+@dataclass
+class ImportReport:
+    imported: int = 0
+    failed: int = 0
+    trail_ids: list[int] = field(default_factory=list)
+    errors: list[LineError] = field(default_factory=list)
+
+    def add_error(self, line: int, detail: str, name: Optional[str] = None) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(LineError(line=line, detail=detail, name=name))
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": [error.as_dict() for error in self.errors],
+        }
+
+
+def archive_trail_payload(record: dict) -> dict:
+    """Validate one archive line the same way the builder endpoints do."""
+    try:
+        payload = AdminTrailCreateIn.model_validate(record)
+    except ValidationError as exc:
+        messages = [
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+            for error in exc.errors(include_url=False)
+        ]
+        raise ValueError("; ".join(messages)) from None
+    return payload.model_dump(mode="python")
+
+
+@dataclass
+class _Pending:
+    line: int
+    trail: dict[str, Any]
+
+
+class TrailImporter:
+    """Validate NDJSON lines and load them in batches through ``TrailBuilder``.
+
+    ``validate`` turns a raw record into the builder payload (``name``,
+    ``thumbnail_url``, ``description``, ``author``, ``sections``) or raises
+    ``ValueError`` with a message for the admin.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        *,
+        validate: Callable[[dict], dict],
+        created_by: Optional[int] = None,
+        batch_size: int = IMPORT_BATCH_SIZE,
+        dry_run: bool = False,
+    ) -> None:
+        self.db = db
+        self.validate = validate
+        self.created_by = created_by
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.report = ImportReport()
+        self._builder: Optional[TrailBuilder] = None
+
+    def _get_builder(self) -> TrailBuilder:
+        if self._builder is None:
+            item_type_map = {
+                row.code.upper(): row.id for row in self.db.query(LkItemTypeORM).all()
+            }
+            question_type_map = {
+                row.code.upper(): row.id
+                for row in self.db.query(LkQuestionTypeORM).all()
+            }
+            self._builder = TrailBuilder(
+                self.db,
+                item_type_map=item_type_map,
+                question_type_map=question_type_map,
+            )
+        return self._builder
+
+    def _write(self, batch: list[_Pending]) -> list[int]:
+        created_date = date.today()
+        result = self.db.execute(
+            insert(TrailsORM).returning(TrailsORM.id, sort_by_parameter_order=True),
+            [
+                {
+                    "name": pending.trail["name"],
+                    "thumbnail_url": pending.trail["thumbnail_url"],
+                    "description": pending.trail.get("description"),
+                    "author": pending.trail.get("author"),
+                    "created_by": self.created_by,
+                    "created_date": created_date,
+                }
+                for pending in batch
+            ],
+        )
+        trail_ids = list(result.scalars().all())
+        self._get_builder().create_many(
+            [
+                (trail_id, pending.trail["sections"])
+                for trail_id, pending in zip(trail_ids, batch)
+            ]
+        )
+        return trail_ids
+
+    def _flush_batch(self, batch: list[_Pending]) -> None:
+        if not batch:
+            return
+        if self.dry_run:
+            # Still run the builder planning so type codes and ids are checked.
+            for pending in batch:
+                savepoint = self.db.begin_nested()
+                try:
+                    self._write([pending])
+                except (ValueError, IntegrityError) as exc:
+                    self.report.add_error(
+                        pending.line, _describe(exc), pending.trail["name"]
+                    )
+                else:
+                    self.report.imported += 1
+                finally:
+                    savepoint.rollback()
+            return
+
+        try:
+            with self.db.begin_nested():
+                trail_ids = self._write(batch)
+        except (ValueError, IntegrityError):
+            # Find the offending trails; the others still go in.
+            for pending in batch:
+                try:
+                    with self.db.begin_nested():
+                        [trail_id] = self._write([pending])
+                except (ValueError, IntegrityError) as exc:
+                    self.report.add_error(
+                        pending.line, _describe(exc), pending.trail["name"]
+                    )
+                else:
+                    self.report.imported += 1
+                    self.report.trail_ids.append(trail_id)
+        else:
+            self.report.imported += len(batch)
+            self.report.trail_ids.extend(trail_ids)
+        self.db.commit()
+
+    def run(self, lines: Iterable[str | bytes]) -> ImportReport:
+        batch: list[_Pending] = []
+        for number, raw in enumerate(lines, start=1):
+            if isinstance(raw, bytes):
+                raw = raw.decode("utf-8")
+            raw = raw.strip()
+            if not raw:
+                continue
+            try:
+                record = json.loads(raw)
+            except json.JSONDecodeError as exc:
+                self.report.add_error(number, f"JSON inválido: {exc.msg}.")
+                continue
+            if not isinstance(record, dict):
+                self.report.add_error(number, "Cada linha deve ser um objeto JSON.")
+                continue
+            kind = record.get("type", "trail")
+            if kind == "header":
+                if (
+                    record.get("format") != ARCHIVE_FORMAT
+                    or record.get("version") != ARCHIVE_VERSION
+                ):
+                    raise ValueError("Formato de arquivo de trilhas não suportado.")
+                continue
+            if kind != "trail":
+                self.report.add_error(number, f"Tipo de registro '{kind}' inválido.")
+                continue
+            try:
+                trail = self.validate(record)
+            except ValueError as exc:
+                self.report.add_error(number, str(exc), record.get("name"))
+                continue
+            batch.append(_Pending(line=number, trail=trail))
+            if len(batch) >= self.batch_size:
+                self._flush_batch(batch)
+                batch = []
+        self._flush_batch(batch)
+        return self.report
+
+
+def _describe(exc: Exception) -> str:
+    if isinstance(exc, IntegrityError):
+        return "Conflito com dados existentes (URL de item já cadastrada?)."
+    return str(exc)
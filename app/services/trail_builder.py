@@ -0,0 +1,665 @@
+"""Reconcile a trail builder payload with the stored section/item/form tree.
+
+Nodes are matched by ``id``: rows present in the payload are updated only when a
+value changed, rows without an id are inserted, and stored rows missing from the
+payload are deleted. Every level is written with one bulk statement per
+operation instead of a flush per row, and matched rows keep their ids so
+``user_item_progress`` and submissions stay attached.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.form_question_options import (
+    FormQuestionOption as FormQuestionOptionORM,
+)
+from app.models.form_questions import FormQuestion as FormQuestionORM
+from app.models.forms import Form as FormORM
+from app.models.trail_items import TrailItems as TrailItemsORM
+from app.models.trail_sections import TrailSections as TrailSectionsORM
+from app.models.trails import Trails as TrailsORM
+from app.services.trail_counters import section_counter_values, trail_counter_values
+
+# Rows whose position changes are first moved past any real order_index, so
+# swaps never trip the (parent, order_index) unique constraints. Must stay
+# non-negative because of the order_index CHECK constraints.
+PARK_OFFSET = 1 << 30
+
+
+@dataclass
+class EntityChanges:
+    created: list[int] = field(default_factory=list)
+    updated: list[int] = field(default_factory=list)
+    deleted: list[int] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.created or self.updated or self.deleted)
+
+    def as_dict(self) -> dict[str, list[int]]:
+        return {
+            "created": sorted(self.created),
+            "updated": sorted(self.updated),
+            "deleted": sorted(self.deleted),
+        }
+
+
+@dataclass
+class TrailChangeSet:
+    # None when several trails were written together (``create_many``).
+    trail_id: Optional[int]
+    trail_updated: bool = False
+    sections: EntityChanges = field(default_factory=EntityChanges)
+    items: EntityChanges = field(default_factory=EntityChanges)
+    forms: EntityChanges = field(default_factory=EntityChanges)
+    questions: EntityChanges = field(default_factory=EntityChanges)
+    options: EntityChanges = field(default_factory=EntityChanges)
+    # Items whose own row or form tree changed (including deleted ones).
+    affected_item_ids: set[int] = field(default_factory=set)
+    # Item set or completion requirements changed: per-user progress is stale.
+    progress_affected: bool = False
+
+    @property
+    def changed(self) -> bool:
+        return self.trail_updated or any(
+            (self.sections, self.items, self.forms, self.questions, self.options)
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "trail_updated": self.trail_updated,
+            "sections": self.sections.as_dict(),
+            "items": self.items.as_dict(),
+            "forms": self.forms.as_dict(),
+            "questions": self.questions.as_dict(),
+            "options": self.options.as_dict(),
+            "affected_item_ids": sorted(self.affected_item_ids),
+            "progress_affected": self.progress_affected,
+        }
+
+
+@dataclass
+class _Node:
+    id: Optional[int]
+    values: dict[str, Any]
+    parent: Optional["_Node"] = None
+    # Item the node belongs to, used to report affected items.
+    item: Optional["_Node"] = None
+
+
+@dataclass
+class _Level:
+    model: Any
+    parent_key: Optional[str]
+    changes: EntityChanges
+    existing: dict[int, dict[str, Any]]
+    nodes: list[_Node] = field(default_factory=list)
+    # Column with a per-parent unique constraint on ``order_index``.
+    ordered: bool = False
+
+
+def _rows(db: Session, stmt) -> dict[int, dict[str, Any]]:
+    return {row["id"]: dict(row) for row in db.execute(stmt).mappings()}
+
+
+def _claim(
+    node_id: Optional[int],
+    allowed: Iterable[int],
+    claimed: set[int],
+    label: str,
+    owner: str,
+) -> Optional[int]:
+    if node_id is None:
+        return None
+    if node_id not in allowed:
+        raise ValueError(f"{label} {node_id} não pertence a {owner}.")
+    if node_id in claimed:
+        raise ValueError(f"{label} {node_id} aparece mais de uma vez.")
+    claimed.add(node_id)
+    return node_id
+
+
+def _ensure_unique_order(nodes: list[_Node], label: str) -> None:
+    seen: set[tuple[int, Any]] = set()
+    for node in nodes:
+        scope = id(node.parent) if node.parent is not None else node.values["trail_id"]
+        key = (scope, node.values["order_index"])
+        if key in seen:
+            raise ValueError(
+                f"Ordem {node.values['order_index']} repetida entre {label}."
+            )
+        seen.add(key)
+
+
+class TrailBuilder:
+    def __init__(
+        self,
+        db: Session,
+        *,
+        item_type_map: dict[str, int],
+        question_type_map: dict[str, int],
+    ) -> None:
+        self.db = db
+        self.item_type_map = item_type_map
+        self.question_type_map = question_type_map
+        self._owners: dict[Any, dict[int, Optional[int]]] = {}
+
+    # --- loading -----------------------------------------------------------
+    def _load(self, trail_id: int) -> list[_Level]:
+        sections = _rows(
+            self.db,
+            select(
+                TrailSectionsORM.id,
+                TrailSectionsORM.title,
+                TrailSectionsORM.order_index,
+            ).where(TrailSectionsORM.trail_id == trail_id),
+        )
+        items = _rows(
+            self.db,
+            select(
+                TrailItemsORM.id,
+                TrailItemsORM.section_id,
+                TrailItemsORM.title,
+                TrailItemsORM.url,
+                TrailItemsORM.duration_seconds,
+                TrailItemsORM.order_index,
+                TrailItemsORM.item_type_id,
+                TrailItemsORM.legacy_type,
+                TrailItemsORM.requires_completion,
+            )
+            # Items without a section predate the builder; they are not part of
+            # the payload, so a save must leave them alone rather than delete them.
+            .where(
+                TrailItemsORM.trail_id == trail_id,
+                TrailItemsORM.section_id.isnot(None),
+            ),
+        )
+        forms = (
+            _rows(
+                self.db,
+                select(
+                    FormORM.id,
+                    FormORM.trail_item_id,
+                    FormORM.title,
+                    FormORM.description,
+                    FormORM.min_score_to_pass,
+                    FormORM.randomize_questions,
+                ).where(FormORM.trail_item_id.in_(list(items))),
+            )
+            if items
+            else {}
+        )
+        questions = (
+            _rows(
+                self.db,
+                select(
+                    FormQuestionORM.id,
+                    FormQuestionORM.form_id,
+                    FormQuestionORM.prompt,
+                    FormQuestionORM.question_type_id,
+                    FormQuestionORM.required,
+                    FormQuestionORM.order_index,
+                    FormQuestionORM.points,
+                ).where(FormQuestionORM.form_id.in_(list(forms))),
+            )
+            if forms
+            else {}
+        )
+        options = (
+            _rows(
+                self.db,
+                select(
+                    FormQuestionOptionORM.id,
+                    FormQuestionOptionORM.question_id,
+                    FormQuestionOptionORM.option_text,
+                    FormQuestionOptionORM.is_correct,
+                    FormQuestionOptionORM.order_index,
+                ).where(FormQuestionOptionORM.question_id.in_(list(questions))),
+            )
+            if questions
+            else {}
+        )
+        return self._levels(sections, items, forms, questions, options)
+
+    @staticmethod
+    def _levels(
+        sections: dict[int, dict[str, Any]],
+        items: dict[int, dict[str, Any]],
+        forms: dict[int, dict[str, Any]],
+        questions: dict[int, dict[str, Any]],
+        options: dict[int, dict[str, Any]],
+    ) -> list[_Level]:
+        return [
+            _Level(TrailSectionsORM, None, EntityChanges(), sections, ordered=True),
+            _Level(TrailItemsORM, "section_id", EntityChanges(), items, ordered=True),
+            _Level(FormORM, "trail_item_id", EntityChanges(), forms),
+            _Level(
+                FormQuestionORM, "form_id", EntityChanges(), questions, ordered=True
+            ),
+            _Level(FormQuestionOptionORM, "question_id", EntityChanges(), options),
+        ]
+
+    # --- planning ----------------------------------------------------------
+    def _plan(self, trail_id: int, sections: list[dict], levels: list[_Level]) -> None:
+        section_level, item_level, form_level, question_level, option_level = levels
+        forms_by_item = {
+            row["trail_item_id"]: form_id
+            for form_id, row in form_level.existing.items()
+        }
+        claimed: dict[str, set[int]] = {
+            "sections": set(),
+            "items": set(),
+            "forms": set(),
+            "questions": set(),
+            "options": set(),
+        }
+
+        for index, section_payload in enumerate(sections):
+            section_order = section_payload.get("order_index")
+            section = _Node(
+                id=_claim(
+                    section_payload.get("id"),
+                    section_level.existing,
+                    claimed["sections"],
+                    "Seção",
+                    "esta rota",
+                ),
+                values={
+                    "trail_id": trail_id,
+                    "title": section_payload["title"],
+                    "order_index": (
+                        section_order if section_order is not None else index
+                    ),
+                },
+            )
+            section_level.nodes.append(section)
+
+            for item_index, item_payload in enumerate(
+                section_payload.get("items") or []
+            ):
+                item = self._plan_item(
+                    trail_id, item_payload, item_index, item_level, claimed
+                )
+                item.parent = section
+                item_level.nodes.append(item)
+                if item.values["legacy_type"] == "FORM":
+                    self._plan_form(
+                        item,
+                        item_payload.get("form") or {},
+                        forms_by_item,
+                        levels,
+                        claimed,
+                    )
+
+        _ensure_unique_order(section_level.nodes, "as seções")
+        _ensure_unique_order(item_level.nodes, "os itens da seção")
+        _ensure_unique_order(question_level.nodes, "as perguntas do formulário")
+
+    def _plan_item(
+        self,
+        trail_id: int,
+        item_payload: dict,
+        item_index: int,
+        item_level: _Level,
+        claimed: dict[str, set[int]],
+    ) -> _Node:
+        type_code = (item_payload.get("type") or "").upper()
+        if type_code not in self.item_type_map:
+            raise ValueError(f"Tipo de item '{type_code}' não cadastrado.")
+        item_order = item_payload.get("order_index")
+        duration_value = item_payload.get("duration_seconds")
+        if isinstance(duration_value, str):
+            duration_value = duration_value.strip()
+            duration_value = int(duration_value) if duration_value else None
+        item = _Node(
+            id=_claim(
+                item_payload.get("id"),
+                item_level.existing,
+                claimed["items"],
+                "Item",
+                "esta rota",
+            ),
+            values={
+                "trail_id": trail_id,
+                "title": item_payload.get("title"),
+                "url": item_payload.get("url"),
+                "duration_seconds": duration_value,
+                "order_index": item_order if item_order is not None else item_index,
+                "item_type_id": self.item_type_map[type_code],
+                "legacy_type": type_code,
+                "requires_completion": bool(item_payload.get("requires_completion")),
+            },
+        )
+        item.item = item
+        return item
+
+    def _plan_form(
+        self,
+        item: _Node,
+        form_payload: dict,
+        forms_by_item: dict[int, int],
+        levels: list[_Level],
+        claimed: dict[str, set[int]],
+    ) -> None:
+        _, _, form_level, question_level, option_level = levels
+        if not form_payload:
+            raise ValueError(
+                "Itens do tipo formulário precisam de dados do formulário."
+            )
+
+        # Forms are 1:1 with their item, so an existing item keeps its form even
+        # when the payload omits the form id.
+        existing_form_id = forms_by_item.get(item.id) if item.id is not None else None
+        form_id = form_payload.get("id")
+        if form_id is not None and form_id != existing_form_id:
+            raise ValueError(f"Formulário {form_id} não pertence ao item.")
+        form_id = _claim(
+            existing_form_id,
+            form_level.existing,
+            claimed["forms"],
+            "Formulário",
+            "esta rota",
+        )
+
+        min_score_raw = form_payload.get("min_score_to_pass")
+        randomize_value = form_payload.get("randomize_questions")
+        form = _Node(
+            id=form_id,
+            values={
+                "title": form_payload.get("title"),
+                "description": form_payload.get("description"),
+                "min_score_to_pass": Decimal(str(min_score_raw or 70)),
+                "randomize_questions": (
+                    bool(randomize_value) if randomize_value is not None else None
+                ),
+            },
+            parent=item,
+            item=item,
+        )
+        form_level.nodes.append(form)
+
+        questions_payload = form_payload.get("questions") or []
+        if not questions_payload:
+            raise ValueError("Formulários precisam de pelo menos uma pergunta.")
+        form_questions = {
+            question_id
+            for question_id, row in question_level.existing.items()
+            if form_id is not None and row["form_id"] == form_id
+        }
+        for question_index, question_payload in enumerate(questions_payload):
+            question_type_code = (question_payload.get("type") or "").upper()
+            question_type_id = self.question_type_map.get(question_type_code)
+            if question_type_id is None:
+                raise ValueError(
+                    f"Tipo de questão '{question_type_code}' não cadastrado."
+                )
+            question_order = question_payload.get("order_index")
+            question = _Node(
+                id=_claim(
+                    question_payload.get("id"),
+                    form_questions,
+                    claimed["questions"],
+                    "Pergunta",
+                    "este formulário",
+                ),
+                values={
+                    "prompt": question_payload.get("prompt"),
+                    "question_type_id": question_type_id,
+                    "required": question_payload.get("required"),
+                    "order_index": (
+                        question_order if question_order is not None else question_index
+                    ),
+                    "points": Decimal(str(question_payload.get("points") or 0)),
+                },
+                parent=form,
+                item=item,
+            )
+            question_level.nodes.append(question)
+
+            options_payload = question_payload.get("options") or []
+            if question_type_code != "ESSAY" and not options_payload:
+                raise ValueError(
+                    "Questões objetivas precisam de alternativas cadastradas."
+                )
+            question_options = {
+                option_id
+                for option_id, row in option_level.existing.items()
+                if question.id is not None and row["question_id"] == question.id
+            }
+            for option_index, option_payload in enumerate(options_payload):
+                option_order = option_payload.get("order_index")
+                option_level.nodes.append(
+                    _Node(
+                        id=_claim(
+                            option_payload.get("id"),
+                            question_options,
+                            claimed["options"],
+                            "Alternativa",
+                            "esta pergunta",
+                        ),
+                        values={
+                            "option_text": option_payload.get("text"),
+                            "is_correct": bool(option_payload.get("is_correct")),
+                            "order_index": (
+                                option_order
+                                if option_order is not None
+                                else option_index
+                            ),
+                        },
+                        parent=question,
+                        item=item,
+                    )
+                )
+
+    # --- applying ----------------------------------------------------------
+    def _index_owners(self, levels: list[_Level]) -> None:
+        _, item_level, form_level, question_level, option_level = levels
+        form_item = {
+            form_id: row["trail_item_id"]
+            for form_id, row in form_level.existing.items()
+        }
+        question_item = {
+            question_id: form_item.get(row["form_id"])
+            for question_id, row in question_level.existing.items()
+        }
+        self._owners = {
+            TrailItemsORM: {item_id: item_id for item_id in item_level.existing},
+            FormORM: form_item,
+            FormQuestionORM: question_item,
+            FormQuestionOptionORM: {
+                option_id: question_item.get(row["question_id"])
+                for option_id, row in option_level.existing.items()
+            },
+        }
+
+    def _delete_missing(self, levels: list[_Level], changes: TrailChangeSet) -> None:
+        # Children first, so this works with or without ON DELETE CASCADE.
+        for level in reversed(levels):
+            kept = {node.id for node in level.nodes if node.id is not None}
+            missing = sorted(set(level.existing) - kept)
+            if not missing:
+                continue
+            self.db.execute(
+                delete(level.model)
+                .where(level.model.id.in_(missing))
+                .execution_options(synchronize_session=False)
+            )
+            level.changes.deleted.extend(missing)
+            owners = self._owners.get(level.model, {})
+            changes.affected_item_ids.update(
+                owners[row_id] for row_id in missing if owners.get(row_id)
+            )
+
+    def _park(self, levels: list[_Level]) -> None:
+        item_level = levels[1]
+        # URLs are globally unique: a kept item giving its URL away to another
+        # item of this trail moves to a placeholder first.
+        wanted_urls = {node.values["url"] for node in item_level.nodes}
+        for level in levels:
+            parked: list[dict[str, Any]] = []
+            for node in level.nodes:
+                if node.id is None:
+                    continue
+                current = level.existing[node.id]
+                patch: dict[str, Any] = {}
+                if level.ordered:
+                    moved = current["order_index"] != node.values["order_index"]
+                    if level.parent_key and node.parent is not None:
+                        moved = moved or current[level.parent_key] != node.parent.id
+                    if moved:
+                        patch["order_index"] = PARK_OFFSET + node.id
+                if (
+                    level is item_level
+                    and current["url"] != node.values["url"]
+                    and current["url"] in wanted_urls
+                ):
+                    patch["url"] = f"{current['url']}#moving-{node.id}"
+                if patch:
+                    parked.append({"id": node.id, **patch})
+            if parked:
+                self.db.execute(
+                    update(level.model).execution_options(synchronize_session=False),
+                    parked,
+                )
+
+    def _write_level(self, level: _Level, changes: TrailChangeSet) -> None:
+        new_nodes: list[_Node] = []
+        updates: list[dict[str, Any]] = []
+        for node in level.nodes:
+            values = dict(node.values)
+            if level.parent_key and node.parent is not None:
+                values[level.parent_key] = node.parent.id
+            if node.id is None:
+                new_nodes.append(node)
+                node.values = values
+                continue
+            current = level.existing[node.id]
+            patch = {
+                key: value
+                for key, value in values.items()
+                if key in current and current[key] != value
+            }
+            # Rows parked because they changed parent need their order written
+            # back even when the final value equals the old one.
+            if level.ordered and level.parent_key in patch:
+                patch["order_index"] = values["order_index"]
+            if patch:
+                updates.append({"id": node.id, **patch})
+                level.changes.updated.append(node.id)
+                if node.item is not None and node.item.id is not None:
+                    changes.affected_item_ids.add(node.item.id)
+                if "requires_completion" in patch:
+                    changes.progress_affected = True
+
+        if new_nodes:
+            result = self.db.execute(
+                insert(level.model).returning(
+                    level.model.id, sort_by_parameter_order=True
+                ),
+                [node.values for node in new_nodes],
+            )
+            for node, new_id in zip(new_nodes, result.scalars().all()):
+                node.id = new_id
+                level.changes.created.append(new_id)
+        if updates:
+            self.db.execute(
+                update(level.model).execution_options(synchronize_session=False),
+                updates,
+            )
+        for node in new_nodes:
+            if node.item is not None:
+                changes.affected_item_ids.add(node.item.id)
+
+    def _bump_form_versions(self, levels: list[_Level]) -> None:
+        _, _, form_level, question_level, option_level = levels
+        stale: set[int] = set(form_level.changes.updated)
+        for level, depth in ((question_level, 1), (option_level, 2)):
+            written = set(level.changes.created) | set(level.changes.updated)
+            for node in level.nodes:
+                if node.id in written:
+                    form = node.parent if depth == 1 else node.parent.parent
+                    stale.add(form.id)
+        for question_id in question_level.changes.deleted:
+            stale.add(question_level.existing[question_id]["form_id"])
+        for option_id in option_level.changes.deleted:
+            question = question_level.existing.get(
+                option_level.existing[option_id]["question_id"]
+            )
+            if question is not None:
+                stale.add(question["form_id"])
+        # New forms start at version 1 and deleted ones need no bump.
+        stale &= set(form_level.existing) - set(form_level.changes.deleted)
+        if stale:
+            self.db.execute(
+                update(FormORM)
+                .where(FormORM.id.in_(sorted(stale)))
+                .values(version=FormORM.version + 1)
+                .execution_options(synchronize_session=False)
+            )
+
+    def _write_counts(self, trail_ids: list[int]) -> None:
+        """Recompute the structure counters of every written trail, so readers
+        never count ``trail_items`` (see ``app.services.trail_counters``)."""
+        self.db.execute(
+            update(TrailsORM)
+            .where(TrailsORM.id.in_(trail_ids))
+            .values(**trail_counter_values())
+            .execution_options(synchronize_session=False)
+        )
+        self.db.execute(
+            update(TrailSectionsORM)
+            .where(TrailSectionsORM.trail_id.in_(trail_ids))
+            .values(**section_counter_values())
+            .execution_options(synchronize_session=False)
+        )
+
+    def _apply(
+        self,
+        trees: list[tuple[int, list[dict]]],
+        levels: list[_Level],
+        trail_id: Optional[int],
+    ) -> TrailChangeSet:
+        for tree_trail_id, sections in trees:
+            self._plan(tree_trail_id, sections, levels)
+
+        changes = TrailChangeSet(
+            trail_id=trail_id,
+            sections=levels[0].changes,
+            items=levels[1].changes,
+            forms=levels[2].changes,
+            questions=levels[3].changes,
+            options=levels[4].changes,
+        )
+        self._index_owners(levels)
+        self._delete_missing(levels[1:], changes)
+        self._park(levels)
+        # Sections go after their kept items were parked: ON DELETE SET NULL
+        # would otherwise move them into the legacy (trail_id, order_index) index.
+        self._delete_missing(levels[:1], changes)
+        for level in levels:
+            self._write_level(level, changes)
+        self._bump_form_versions(levels)
+        if changes.sections or changes.items:
+            self._write_counts([tree_trail_id for tree_trail_id, _ in trees])
+
+        if changes.items.created or changes.items.deleted:
+            changes.progress_affected = True
+        return changes
+
+    def save(self, trail_id: int, sections: list[dict]) -> TrailChangeSet:
+        return self._apply([(trail_id, sections)], self._load(trail_id), trail_id)
+
+    def create(self, trail_id: int, sections: list[dict]) -> TrailChangeSet:
+        """Insert the tree of a trail that has none yet: one INSERT per table."""
+        return self.create_many([(trail_id, sections)], trail_id=trail_id)
+
+    def create_many(
+        self, trees: list[tuple[int, list[dict]]], *, trail_id: Optional[int] = None
+    ) -> TrailChangeSet:
+        """Insert the trees of several new trails with one INSERT per table."""
+        return self._apply(trees, self._levels({}, {}, {}, {}, {}), trail_id)
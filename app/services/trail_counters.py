@@ -0,0 +1,96 @@
+"""The structure counters stored on ``trails`` and ``trail_sections``.
+
+``trails.item_count`` counts every ``trail_items`` row of the trail, with or
+without a section, since progress counts completions over all of them;
+``required_item_count`` is the subset that requires completion and
+``trail_sections.item_count`` counts the items of one section. Migration 0005
+backfilled them with this definition, and the trail builder and the
+``repair_trail_counters`` job write them with ``trail_counter_values`` and
+``section_counter_values``.
+
+Readers go through ``trail_item_total`` and ``section_item_total``: a trail or
+section written outside the builder keeps the column default of 0, so a stored
+0 falls back to a live count instead of reporting an empty trail.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy import and_, case, func, or_, select
+
+from app.models.trail_items import TrailItems as TrailItemsORM
+from app.models.trail_sections import TrailSections as TrailSectionsORM
+from app.models.trails import Trails as TrailsORM
+
+
+def _count(model, outer, *conditions):
+    return (
+        select(func.count(model.id))
+        .where(*conditions)
+        .correlate(outer)
+        .scalar_subquery()
+    )
+
+
+def _required():
+    return or_(
+        TrailItemsORM.requires_completion.is_(True),
+        and_(
+            TrailItemsORM.requires_completion.is_(None),
+            func.upper(TrailItemsORM.requires_completion_yn) == "S",
+        ),
+    )
+
+
+def _live_item_count():
+    return _count(TrailItemsORM, TrailsORM, TrailItemsORM.trail_id == TrailsORM.id)
+
+
+def _live_section_item_count():
+    return _count(
+        TrailItemsORM,
+        TrailSectionsORM,
+        TrailItemsORM.section_id == TrailSectionsORM.id,
+    )
+
+
+def trail_counter_values() -> dict[str, Any]:
+    """``UPDATE trails`` values recomputing the counters from the rows."""
+
+    return {
+        "section_count": _count(
+            TrailSectionsORM, TrailsORM, TrailSectionsORM.trail_id == TrailsORM.id
+        ),
+        "item_count": _live_item_count(),
+        "required_item_count": _count(
+            TrailItemsORM,
+            TrailsORM,
+            TrailItemsORM.trail_id == TrailsORM.id,
+            _required(),
+        ),
+    }
+
+
+def section_counter_values() -> dict[str, Any]:
+    """``UPDATE trail_sections`` values recomputing ``item_count``."""
+
+    return {"item_count": _live_section_item_count()}
+
+
+def trail_item_total():
+    """``trails.item_count``, counted live while it is still 0."""
+
+    return case(
+        (TrailsORM.item_count > 0, TrailsORM.item_count),
+        else_=_live_item_count(),
+    )
+
+
+def section_item_total():
+    """``trail_sections.item_count``, counted live while it is still 0."""
+
+    return case(
+        (TrailSectionsORM.item_count > 0, TrailSectionsORM.item_count),
+        else_=_live_section_item_count(),
+    )
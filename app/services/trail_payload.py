@@ -0,0 +1,173 @@
+"""Validation of the trail tree the admin builder and the archive import accept.
+
+Node ids are optional: a node with an id updates that stored row, one without
+is created (see ``app.services.trail_builder``).
+"""
+
+from __future__ import annotations
+
+from typing import List
+
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+
+class AdminFormOptionIn(BaseModel):
+    id: int | None = Field(default=None, ge=1)
+    text: str = Field(..., min_length=1)
+    is_correct: bool = False
+    order_index: int | None = Field(default=None, ge=0)
+
+    @field_validator("text")
+    @classmethod
+    def strip_text(cls, value: str) -> str:
+        cleaned = value.strip()
+        if not cleaned:
+            raise ValueError("Preencha o texto da alternativa.")
+        return cleaned
+
+
+class AdminFormQuestionIn(BaseModel):
+    id: int | None = Field(default=None, ge=1)
+    prompt: str = Field(..., min_length=1)
+    type: str = Field(..., min_length=1)
+    required: bool = True
+    points: float = Field(default=1.0, ge=0)
+    order_index: int | None = Field(default=None, ge=0)
+    options: List[AdminFormOptionIn] = Field(default_factory=list)
+
+    @field_validator("prompt")
+    @classmethod
+    def strip_prompt(cls, value: str) -> str:
+        cleaned = value.strip()
+        if not cleaned:
+            raise ValueError("Informe o enunciado da pergunta.")
+        return cleaned
+
+    @field_validator("type")
+    @classmethod
+    def normalize_question_type(cls, value: str) -> str:
+        normalized = value.strip().upper()
+        allowed = {"ESSAY", "TRUE_OR_FALSE", "SINGLE_CHOICE"}
+        if normalized not in allowed:
+            raise ValueError("Tipo de pergunta inválido.")
+        return normalized
+
+    @model_validator(mode="after")
+    def validate_options(self):
+        if self.type == "ESSAY":
+            self.options = []
+        else:
+            if not self.options:
+                raise ValueError("Adicione alternativas para perguntas objetivas.")
+            if not any(option.is_correct for option in self.options):
+                raise ValueError("Marque pelo menos uma alternativa correta.")
+            if self.type == "TRUE_OR_FALSE" and len(self.options) < 2:
+                raise ValueError(
+                    "Perguntas de verdadeiro ou falso precisam de duas alternativas."
+                )
+        return self
+
+
+class AdminFormIn(BaseModel):
+    id: int | None = Field(default=None, ge=1)
+    title: str | None = None
+    description: str | None = None
+    min_score_to_pass: float = Field(default=70, ge=0)
+    randomize_questions: bool | None = None
+    questions: List[AdminFormQuestionIn] = Field(default_factory=list)
+
+    @field_validator("title", "description")
+    @classmethod
+    def strip_optional(cls, value: str | None) -> str | None:
+        if value is None:
+            return None
+        cleaned = value.strip()
+        return cleaned or None
+
+    @model_validator(mode="after")
+    def ensure_questions(self):
+        if not self.questions:
+            raise ValueError("O formulário precisa de pelo menos uma pergunta.")
+        return self
+
+
+class AdminTrailItemIn(BaseModel):
+    id: int | None = Field(default=None, ge=1)
+    title: str = Field(..., min_length=1, max_length=255)
+    type: str = Field(..., min_length=1, max_length=32)
+    url: str = Field(..., min_length=1)
+    duration_seconds: int | None = Field(default=None, ge=0)
+    requires_completion: bool = False
+    order_index: int | None = Field(default=None, ge=0)
+    form: AdminFormIn | None = None
+
+    @field_validator("title", "type", "url")
+    @classmethod
+    def strip_text(cls, value: str) -> str:
+        cleaned = value.strip()
+        if not cleaned:
+            raise ValueError("Este campo é obrigatório.")
+        return cleaned
+
+    @field_validator("type")
+    @classmethod
+    def normalize_type(cls, value: str) -> str:
+        return value.strip().upper()
+
+    @model_validator(mode="after")
+    def validate_form(self):
+        if self.type == "FORM":
+            if self.form is None:
+                raise ValueError(
+                    "Itens do tipo Formulário precisam de dados do formulário."
+                )
+        else:
+            self.form = None
+        return self
+
+
+class AdminTrailSectionIn(BaseModel):
+    id: int | None = Field(default=None, ge=1)
+    title: str = Field(..., min_length=1, max_length=255)
+    order_index: int | None = Field(default=None, ge=0)
+    items: List[AdminTrailItemIn] = Field(default_factory=list)
+
+    @field_validator("title")
+    @classmethod
+    def strip_title(cls, value: str) -> str:
+        cleaned = value.strip()
+        if not cleaned:
+            raise ValueError("Informe um título para a seção.")
+        return cleaned
+
+
+class AdminTrailCreateIn(BaseModel):
+    name: str = Field(..., min_length=1, max_length=255)
+    thumbnail_url: str = Field(..., min_length=1)
+    description: str | None = None
+    author: str | None = None
+    sections: List[AdminTrailSectionIn] = Field(default_factory=list)
+
+    @field_validator("name", "thumbnail_url")
+    @classmethod
+    def strip_required(cls, value: str) -> str:
+        cleaned = value.strip()
+        if not cleaned:
+            raise ValueError("Este campo é obrigatório.")
+        return cleaned
+
+    @field_validator("author")
+    @classmethod
+    def normalize_optional(cls, value: str | None) -> str | None:
+        if value is None:
+            return None
+        cleaned = value.strip()
+        return cleaned or None
+
+    @field_validator("description")
+    @classmethod
+    def strip_description(cls, value: str | None) -> str | None:
+        if value is None:
+            return None
+        cleaned = value.strip()
+        return cleaned or None
@@ -15,7 +15,8 @@ type CertificatePayload = {
   certificate_hash: string;
   issued_at?: string | null;
   verification_url: string;
-  qr_code_data_uri: string;
+  qr_code_url: string;
+  qr_code_data_uri?: string | null;
 };
 
 const DESIGN_WIDTH = 900;
@@ -337,7 +338,8 @@ async function handleDownload() {
                           <footer className="sheet-footer">
                             <div className="sheet-qr">
                               <img
-                                src={data.qr_code_data_uri}
+                                src={data.qr_code_url}
+                                crossOrigin="anonymous"
                                 alt="Código QR para validar o certificado"
                               />
                               <span className="sheet-qr-caption">
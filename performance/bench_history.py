@@ -0,0 +1,365 @@
+#!/usr/bin/env python
+"""Store benchmark runs by git revision and compare them against a baseline."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import re
+import subprocess
+import sys
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from statistics import median
+from typing import Any, Iterable, Optional, Sequence
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_HISTORY_DIR = ROOT_DIR / "performance" / "history"
+
+DEFAULT_THRESHOLD = 0.10
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_RESAMPLES = 2000
+
+
+@dataclass
+class CaseComparison:
+    name: str
+    baseline_ms: float
+    candidate_ms: float
+    ratio: float
+    ci_low: float
+    ci_high: float
+    status: str
+
+
+def git_revision(cwd: Path = ROOT_DIR) -> str:
+    try:
+        rev = subprocess.run(
+            ["git", "rev-parse", "--short=12", "HEAD"],
+            cwd=cwd,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=cwd,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{rev}-dirty" if dirty else rev
+
+
+def environment_key(label: Optional[str] = None) -> str:
+    """Identify the machine/runtime so runs from different hosts are not mixed."""
+    if label:
+        raw = label
+    else:
+        raw = "-".join(
+            [
+                platform.system(),
+                platform.machine(),
+                f"py{platform.python_version()}",
+                platform.node() or "host",
+            ]
+        )
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", raw).strip("_").lower() or "default"
+
+
+def run_path(history_dir: Path, env: str, revision: str) -> Path:
+    return history_dir / env / f"{revision}.json"
+
+
+def record_run(
+    results: Sequence[dict[str, Any]],
+    *,
+    history_dir: Path = DEFAULT_HISTORY_DIR,
+    env: Optional[str] = None,
+    revision: Optional[str] = None,
+    suite: str = "db_benchmark",
+) -> Path:
+    env_key = environment_key(env)
+    rev = revision or git_revision()
+    path = run_path(history_dir, env_key, rev)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    cases: dict[str, Any] = {}
+    suites = {suite}
+    if path.exists():
+        with path.open(encoding="utf-8") as fh:
+            existing = json.load(fh)
+        cases = existing.get("cases", {})
+        suites.update(existing.get("suites", []))
+    for result in results:
+        cases[result["name"]] = result
+
+    payload = {
+        "revision": rev,
+        "environment": env_key,
+        "suites": sorted(suites),
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "cases": cases,
+    }
+    with path.open("w", encoding="utf-8") as fh:
+        json.dump(payload, fh, indent=2)
+    return path
+
+
+def load_run(path: Path) -> dict[str, Any]:
+    with path.open(encoding="utf-8") as fh:
+        data = json.load(fh)
+    if isinstance(data, list):
+        # Plain `db_benchmark.py --json` output.
+        return {"revision": path.stem, "cases": {row["name"]: row for row in data}}
+    return data
+
+
+def resolve_run(ref: str, history_dir: Path, env: str) -> Path:
+    candidate = Path(ref)
+    if candidate.suffix == ".json" and candidate.exists():
+        return candidate
+    exact = run_path(history_dir, env, ref)
+    if exact.exists():
+        return exact
+    matches = sorted((history_dir / env).glob(f"{ref}*.json"))
+    if len(matches) == 1:
+        return matches[0]
+    if not matches:
+        raise FileNotFoundError(f"No recorded run for '{ref}' in {history_dir / env}")
+    raise ValueError(
+        f"Revision prefix '{ref}' is ambiguous: {[m.stem for m in matches]}"
+    )
+
+
+def latest_run(history_dir: Path, env: str, exclude: Iterable[Path] = ()) -> Path:
+    excluded = {p.resolve() for p in exclude}
+    runs = [
+        p for p in (history_dir / env).glob("*.json") if p.resolve() not in excluded
+    ]
+    if not runs:
+        raise FileNotFoundError(f"No recorded runs in {history_dir / env}")
+    return max(runs, key=lambda p: p.stat().st_mtime)
+
+
+def bootstrap_ratio_ci(
+    baseline: Sequence[float],
+    candidate: Sequence[float],
+    *,
+    resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = DEFAULT_CONFIDENCE,
+    seed: Optional[int] = 0,
+) -> tuple[float, float, float]:
+    """Return (ratio, low, high) for median(candidate) / median(baseline)."""
+    base_median = median(baseline)
+    if base_median <= 0:
+        return float("nan"), float("nan"), float("nan")
+    point = median(candidate) / base_median
+
+    rng = random.Random(seed)
+    n_base = len(baseline)
+    n_cand = len(candidate)
+    ratios: list[float] = []
+    for _ in range(resamples):
+        base_sample = median(baseline[rng.randrange(n_base)] for _ in range(n_base))
+        cand_sample = median(candidate[rng.randrange(n_cand)] for _ in range(n_cand))
+        if base_sample > 0:
+            ratios.append(cand_sample / base_sample)
+    if not ratios:
+        return point, float("nan"), float("nan")
+    ratios.sort()
+    alpha = (1.0 - confidence) / 2.0
+    low = ratios[int(alpha * (len(ratios) - 1))]
+    high = ratios[int((1.0 - alpha) * (len(ratios) - 1))]
+    return point, low, high
+
+
+def _samples(case: dict[str, Any]) -> list[float]:
+    samples = case.get("samples_ms") or []
+    if samples:
+        return [float(value) for value in samples]
+    # Older runs only stored the mean.
+    mean_ms = case.get("mean_ms")
+    return [float(mean_ms)] if mean_ms is not None else []
+
+
+def compare_runs(
+    baseline: dict[str, Any],
+    candidate: dict[str, Any],
+    *,
+    threshold: float = DEFAULT_THRESHOLD,
+    resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = DEFAULT_CONFIDENCE,
+) -> list[CaseComparison]:
+    """Compare latency per case.
+
+    A case regresses when the median slowdown exceeds ``threshold`` and the whole
+    bootstrap interval sits above 1.0 (i.e. the slowdown is not noise).
+    """
+    comparisons: list[CaseComparison] = []
+    base_cases = baseline.get("cases", {})
+    cand_cases = candidate.get("cases", {})
+    for name in sorted(set(base_cases) | set(cand_cases)):
+        base_samples = _samples(base_cases.get(name, {}))
+        cand_samples = _samples(cand_cases.get(name, {}))
+        if not base_samples or not cand_samples:
+            comparisons.append(
+                CaseComparison(
+                    name=name,
+                    baseline_ms=median(base_samples) if base_samples else float("nan"),
+                    candidate_ms=median(cand_samples) if cand_samples else float("nan"),
+                    ratio=float("nan"),
+                    ci_low=float("nan"),
+                    ci_high=float("nan"),
+                    status="missing",
+                )
+            )
+            continue
+
+        ratio, low, high = bootstrap_ratio_ci(
+            base_samples, cand_samples, resamples=resamples, confidence=confidence
+        )
+        if ratio != ratio:  # NaN
+            status = "n/a"
+        elif ratio > 1.0 + threshold and low > 1.0:
+            status = "regressed"
+        elif ratio < 1.0 - threshold and high < 1.0:
+            status = "improved"
+        else:
+            status = "unchanged"
+        comparisons.append(
+            CaseComparison(
+                name=name,
+                baseline_ms=median(base_samples),
+                candidate_ms=median(cand_samples),
+                ratio=ratio,
+                ci_low=low,
+                ci_high=high,
+                status=status,
+            )
+        )
+    return comparisons
+
+
+def _fmt(value: float, spec: str) -> str:
+    if value != value:
+        return "n/a"
+    return format(value, spec)
+
+
+def print_report(
+    comparisons: Sequence[CaseComparison], baseline_rev: str, candidate_rev: str
+) -> None:
+    print(f"Baseline: {baseline_rev}  Candidate: {candidate_rev}")
+    header = (
+        f"{'Case':60} {'Base p50':>10} {'Cand p50':>10} {'Ratio':>8}"
+        f" {'CI':>17} {'Status':>10}"
+    )
+    print(header)
+    print("-" * len(header))
+    for item in comparisons:
+        ci = f"[{_fmt(item.ci_low, '.3f')}, {_fmt(item.ci_high, '.3f')}]"
+        print(
+            f"{item.name:60} {_fmt(item.baseline_ms, '.3f'):>10}"
+            f" {_fmt(item.candidate_ms, '.3f'):>10} {_fmt(item.ratio, '.3f'):>8}"
+            f" {ci:>17} {item.status:>10}"
+        )
+    regressed = [c for c in comparisons if c.status == "regressed"]
+    improved = [c for c in comparisons if c.status == "improved"]
+    print(
+        f"\n{len(regressed)} regressed, {len(improved)} improved,"
+        f" {len(comparisons) - len(regressed) - len(improved)} unchanged/other"
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--history-dir",
+        type=Path,
+        default=DEFAULT_HISTORY_DIR,
+        help="Directory holding recorded runs.",
+    )
+    parser.add_argument(
+        "--env",
+        default=None,
+        help="Environment label (defaults to OS/arch/python/hostname).",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    record = sub.add_parser("record", help="Store a db_benchmark JSON file.")
+    record.add_argument("results", type=Path, help="Output of db_benchmark.py --json")
+    record.add_argument("--revision", default=None, help="Override the git revision.")
+
+    compare = sub.add_parser("compare", help="Compare a run against a baseline.")
+    compare.add_argument("--baseline", required=True, help="Revision or JSON path.")
+    compare.add_argument(
+        "--candidate",
+        default=None,
+        help="Revision or JSON path (defaults to the most recent recorded run).",
+    )
+    compare.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Relative slowdown tolerated before failing (default 0.10 = 10%%).",
+    )
+    compare.add_argument("--confidence", type=float, default=DEFAULT_CONFIDENCE)
+    compare.add_argument("--resamples", type=int, default=DEFAULT_RESAMPLES)
+
+    sub.add_parser("list", help="List recorded runs for the environment.")
+
+    args = parser.parse_args(argv)
+    env = environment_key(args.env)
+
+    if args.command == "record":
+        with args.results.open(encoding="utf-8") as fh:
+            rows = json.load(fh)
+        path = record_run(
+            rows, history_dir=args.history_dir, env=env, revision=args.revision
+        )
+        print(f"Recorded {len(rows)} cases in {path}")
+        return 0
+
+    if args.command == "list":
+        runs = sorted(
+            (args.history_dir / env).glob("*.json"), key=lambda p: p.stat().st_mtime
+        )
+        for path in runs:
+            data = load_run(path)
+            print(
+                f"{path.stem:24} {data.get('recorded_at', '-'):32} {len(data.get('cases', {}))} cases"
+            )
+        return 0
+
+    baseline_path = resolve_run(args.baseline, args.history_dir, env)
+    if args.candidate:
+        candidate_path = resolve_run(args.candidate, args.history_dir, env)
+    else:
+        candidate_path = latest_run(args.history_dir, env, exclude=[baseline_path])
+    baseline = load_run(baseline_path)
+    candidate = load_run(candidate_path)
+
+    comparisons = compare_runs(
+        baseline,
+        candidate,
+        threshold=args.threshold,
+        resamples=args.resamples,
+        confidence=args.confidence,
+    )
+    print_report(
+        comparisons,
+        baseline.get("revision", baseline_path.stem),
+        candidate.get("revision", candidate_path.stem),
+    )
+    return 1 if any(c.status == "regressed" for c in comparisons) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
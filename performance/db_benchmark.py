@@ -8,13 +8,15 @@ import json
 import math
 import os
 import sys
+import uuid
+from decimal import Decimal
 from pathlib import Path
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from statistics import mean
 from time import perf_counter
 from typing import Any, Callable, Iterable, Optional
 
-from sqlalchemy import insert, select
+from sqlalchemy import delete, insert, select
 from sqlalchemy.orm import Session
 
 ROOT_DIR = Path(__file__).resolve().parents[1]
@@ -22,9 +24,11 @@ if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
 
 from app.core.db import session_scope
+from app.models.form_submissions import FormSubmission as FormSubmissionORM
 from app.models.lk_enrollment_status import LkEnrollmentStatus as LkEnrollmentStatusORM
 from app.models.lk_item_type import LkItemType as LkItemTypeORM
 from app.models.lk_progress_status import LkProgressStatus as LkProgressStatusORM
+from app.models.lk_question_type import LkQuestionType as LkQuestionTypeORM
 from app.models.lookups import LkRole, LkSex, LkColor
 from app.models.trail_items import TrailItems as TrailItemsORM
 from app.models.trail_sections import TrailSections as TrailSectionsORM
@@ -33,11 +37,14 @@ from app.models.user_item_progress import UserItemProgress as UserItemProgressOR
 from app.models.user_trails import UserTrails as UserTrailsORM
 from app.models.users import Sex, SkinColor
 from app.models.roles import RolesEnum
+from app.repositories.FormSubmissionsRepository import FormSubmissionsRepository
 from app.repositories.TrailsRepository import TrailsRepository
 from app.repositories.UserProgressRepository import UserProgressRepository
 from app.repositories.UserTrailsRepository import UserTrailsRepository
 from app.repositories.UsersRepository import UsersRepository
+from app.services.form_cache import get_compiled_form
 from app.services.security import hash_password
+from performance.bench_history import DEFAULT_HISTORY_DIR, record_run
 
 
 @dataclass
@@ -62,6 +69,7 @@ class BenchmarkResult:
     ops_per_minute: float
     rows_per_second: float
     rows_processed: float
+    samples_ms: list[float] = field(default_factory=list)
 
 
 @dataclass
@@ -70,6 +78,11 @@ class BenchmarkCase:
     func: Callable[[Session, BenchmarkContext], Any]
     requires: tuple[str, ...] = ()
     writes: bool = False
+    # Runs after the timed call (outside the measurement) with its result.
+    teardown: Optional[Callable[[Session, Any], None]] = None
+    # Run once before / after all iterations of the case, untimed.
+    setup: Optional[Callable[[Session, BenchmarkContext], None]] = None
+    cleanup: Optional[Callable[[Session], None]] = None
 
 
 LOOKUP_VALUES = {
@@ -79,8 +92,14 @@ LOOKUP_VALUES = {
     LkItemTypeORM: ("DOC", "VIDEO", "FORM"),
     LkEnrollmentStatusORM: ("ENROLLED", "IN_PROGRESS", "COMPLETED"),
     LkProgressStatusORM: ("NOT_STARTED", "IN_PROGRESS", "COMPLETED"),
+    LkQuestionTypeORM: ("ESSAY", "TRUE_OR_FALSE", "SINGLE_CHOICE"),
 }
 
+# (items, quiz items, questions per quiz) for the trail creation cases.
+TRAIL_CREATION_SIZES = ((10, 0, 0), (50, 10, 5), (200, 40, 10))
+# Questions per quiz for the form submission cases.
+FORM_SUBMISSION_SIZES = (10, 50, 200)
+
 
 def ensure_lookup_values(session: Session) -> None:
     for model, codes in LOOKUP_VALUES.items():
@@ -183,16 +202,26 @@ def run_case(
     rows_processed = 0.0
     total_iterations = iterations + warmup
 
+    if case.setup is not None:
+        with session_scope() as session:
+            case.setup(session, ctx)
+
     for index in range(total_iterations):
         with session_scope() as session:
             start = perf_counter()
             result = case.func(session, ctx)
             elapsed = perf_counter() - start
+            if case.teardown is not None:
+                case.teardown(session, result)
         if index < warmup:
             continue
         durations.append(elapsed)
         rows_processed += infer_size(result)
 
+    if case.cleanup is not None:
+        with session_scope() as session:
+            case.cleanup(session)
+
     executed = len(durations)
     total_time = sum(durations)
     mean_ms = mean(durations) * 1000 if durations else 0.0
@@ -209,6 +238,7 @@ def run_case(
         ops_per_minute=ops_per_minute,
         rows_per_second=rows_per_second,
         rows_processed=rows_processed,
+        samples_ms=[duration * 1000 for duration in durations],
     )
 
 
@@ -219,6 +249,136 @@ def requirements_met(ctx: BenchmarkContext, requirements: Iterable[str]) -> bool
     return True
 
 
+def build_trail_sections(items: int, forms: int, questions: int) -> list[dict]:
+    """Builder payload with ``items`` items (``forms`` of them quizzes) in 5 sections."""
+    run = uuid.uuid4().hex[:12]
+    sections: list[dict] = [{"title": f"Seção {n + 1}", "items": []} for n in range(5)]
+    for index in range(items):
+        item: dict = {
+            "title": f"Item {index}",
+            "type": "VIDEO",
+            "url": f"https://bench.example.com/{run}/{index}",
+            "duration_seconds": 300,
+            "requires_completion": index % 3 == 0,
+        }
+        if index < forms:
+            item["type"] = "FORM"
+            item["form"] = {
+                "title": f"Quiz {index}",
+                "questions": [
+                    {
+                        "prompt": f"Pergunta {q}",
+                        "type": "SINGLE_CHOICE",
+                        "required": True,
+                        "points": 1,
+                        "options": [
+                            {"text": f"Alternativa {o}", "is_correct": o == 0}
+                            for o in range(4)
+                        ],
+                    }
+                    for q in range(questions)
+                ],
+            }
+        sections[index % len(sections)]["items"].append(item)
+    return sections
+
+
+def create_trail_case(items: int, forms: int, questions: int) -> BenchmarkCase:
+    def _create(session: Session, ctx: BenchmarkContext):
+        sections = build_trail_sections(items, forms, questions)
+        return TrailsRepository(session).create_trail(
+            name=f"Benchmark {items} itens",
+            thumbnail_url="https://bench.example.com/thumb.png",
+            description=None,
+            author=None,
+            created_by=None,
+            sections=sections,
+        )
+
+    def _drop(session: Session, trail: TrailsORM) -> None:
+        # The tree goes with the trail through the ON DELETE CASCADE foreign keys.
+        session.execute(delete(TrailsORM).where(TrailsORM.id == trail.id))
+        session.commit()
+
+    return BenchmarkCase(
+        name=f"TrailsRepository.create_trail[items={items},forms={forms}]",
+        func=_create,
+        writes=True,
+        teardown=_drop,
+    )
+
+
+def submit_form_case(questions: int) -> BenchmarkCase:
+    state: dict[str, Any] = {}
+
+    def _setup(session: Session, ctx: BenchmarkContext) -> None:
+        trail = TrailsRepository(session).create_trail(
+            name=f"Benchmark quiz {questions} perguntas",
+            thumbnail_url="https://bench.example.com/thumb.png",
+            description=None,
+            author=None,
+            created_by=None,
+            sections=build_trail_sections(1, 1, questions),
+        )
+        item_id = session.scalars(
+            select(TrailItemsORM.id).where(TrailItemsORM.trail_id == trail.id)
+        ).one()
+        state.update(trail_id=trail.id, item_id=item_id)
+        state["form"] = get_compiled_form(session, item_id)
+
+    def _submit(session: Session, ctx: BenchmarkContext):
+        # Same writes as submit_form: submission, answers and progress, one commit.
+        form = state["form"]
+        answers = [
+            {
+                "question_id": question.id,
+                "selected_option_id": question.options[0].id,
+                "is_correct": True,
+                "points_awarded": question.points,
+            }
+            for question in form.questions
+        ]
+        submission_id = FormSubmissionsRepository(session).create_submission(
+            form_id=form.id,
+            user_id=ctx.user_id,
+            score=Decimal("100.00"),
+            passed=True,
+            duration_seconds=None,
+            answers=answers,
+        )
+        UserProgressRepository(session).upsert_item_progress(
+            ctx.user_id,
+            state["item_id"],
+            "COMPLETED",
+            last_passed_submission_id=submission_id,
+            commit=False,
+        )
+        session.commit()
+        return answers, submission_id
+
+    def _drop_submission(session: Session, result) -> None:
+        _, submission_id = result
+        session.execute(
+            delete(FormSubmissionORM).where(FormSubmissionORM.id == submission_id)
+        )
+        session.commit()
+
+    def _drop_trail(session: Session) -> None:
+        if "trail_id" in state:
+            session.execute(delete(TrailsORM).where(TrailsORM.id == state["trail_id"]))
+            session.commit()
+
+    return BenchmarkCase(
+        name=f"FormSubmissionsRepository.create_submission[questions={questions}]",
+        func=_submit,
+        requires=("user_id",),
+        writes=True,
+        teardown=_drop_submission,
+        setup=_setup,
+        cleanup=_drop_trail,
+    )
+
+
 def create_cases() -> list[BenchmarkCase]:
     cases: list[BenchmarkCase] = [
         BenchmarkCase(
@@ -369,6 +529,8 @@ def create_cases() -> list[BenchmarkCase]:
             writes=True,
         ),
     ]
+    cases.extend(create_trail_case(*size) for size in TRAIL_CREATION_SIZES)
+    cases.extend(submit_form_case(size) for size in FORM_SUBMISSION_SIZES)
 
     return cases
 
@@ -443,6 +605,22 @@ def main() -> None:
         default=os.environ.get("PERF_BENCH_PASSWORD", "PerfTest@123"),
         help="Password for the synthetic benchmark user.",
     )
+    parser.add_argument(
+        "--record-history",
+        action="store_true",
+        help="Store the run under performance/history keyed by git revision.",
+    )
+    parser.add_argument(
+        "--history-dir",
+        type=Path,
+        default=DEFAULT_HISTORY_DIR,
+        help="Directory used by --record-history.",
+    )
+    parser.add_argument(
+        "--env",
+        default=os.environ.get("PERF_BENCH_ENV"),
+        help="Environment label stored with the run (defaults to host fingerprint).",
+    )
     args = parser.parse_args()
 
     ctx = gather_sample_data(args.user_email, args.user_password)
@@ -465,6 +643,14 @@ def main() -> None:
             json.dump(payload, fh, indent=2)
         print(f"Raw results written to {args.json_path}")
 
+    if args.record_history and results:
+        path = record_run(
+            [result.__dict__ for result in results],
+            history_dir=args.history_dir,
+            env=args.env,
+        )
+        print(f"Run recorded in {path}")
+
 
 if __name__ == "__main__":
     main()
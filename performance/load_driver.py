@@ -0,0 +1,775 @@
+#!/usr/bin/env python
+"""Drive the API in-process (or through a local Uvicorn) without k6.
+
+Replays the scenarios of ``performance/k6/performance.test.js`` with a thread
+pool of virtual users and reports per-scenario throughput and latency
+percentiles.
+"""
+
+from __future__ import annotations
+
+import argparse
+import cProfile
+import http.client
+import json
+import os
+import pstats
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http.cookies import SimpleCookie
+from pathlib import Path
+from statistics import mean
+from typing import Any, Callable, Optional
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+DEFAULT_PASSWORD = "PerfTest@123"
+
+
+@dataclass
+class Dataset:
+    trail_id: Optional[int] = None
+    section_id: Optional[int] = None
+    item_id: Optional[int] = None
+    item_duration_seconds: Optional[int] = None
+    form_item_id: Optional[int] = None
+    form_questions: Optional[list[dict[str, Any]]] = None
+    forum_id: Optional[int] = None
+    topic_id: Optional[int] = None
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: Callable[[Dataset], str]
+    body: Optional[Callable[[Dataset, "VirtualUser"], Any]] = None
+    requires: tuple[str, ...] = ()
+    auth: bool = False
+    csrf: bool = False
+    writes: bool = False
+    acceptable_status: tuple[int, ...] = ()
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    requests: int
+    errors: int
+    total_time: float
+    rps: float
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    status_counts: dict[str, int]
+    samples_ms: list[float] = field(default_factory=list)
+
+
+def _lower_keys(items) -> dict[str, str]:
+    return {key.lower(): value for key, value in items}
+
+
+class WSGIClient:
+    """Flask test client; one per virtual user so cookies stay isolated."""
+
+    def __init__(self, app, forwarded_for: str):
+        self._client = app.test_client()
+        self._forwarded_for = forwarded_for
+
+    def request(
+        self, method: str, path: str, *, json_body: Any = None, headers=None
+    ) -> tuple[int, Any, dict[str, str]]:
+        merged = {"X-Forwarded-For": self._forwarded_for, **(headers or {})}
+        response = self._client.open(
+            path,
+            method=method,
+            json=json_body,
+            headers=merged,
+            base_url="https://localhost",
+        )
+        payload = response.get_json(silent=True)
+        return response.status_code, payload, _lower_keys(response.headers.items())
+
+
+class HTTPClient:
+    """Keep-alive HTTP client with a minimal cookie jar (secure flags ignored)."""
+
+    def __init__(self, host: str, port: int, forwarded_for: str):
+        self._conn = http.client.HTTPConnection(host, port, timeout=30)
+        self._cookies: dict[str, str] = {}
+        self._forwarded_for = forwarded_for
+
+    def request(
+        self, method: str, path: str, *, json_body: Any = None, headers=None
+    ) -> tuple[int, Any, dict[str, str]]:
+        merged = {
+            "Accept": "application/json",
+            "X-Forwarded-For": self._forwarded_for,
+            **(headers or {}),
+        }
+        body = None
+        if json_body is not None:
+            body = json.dumps(json_body)
+            merged["Content-Type"] = "application/json"
+        if self._cookies:
+            merged["Cookie"] = "; ".join(f"{k}={v}" for k, v in self._cookies.items())
+        try:
+            self._conn.request(method, path, body=body, headers=merged)
+            response = self._conn.getresponse()
+        except (http.client.HTTPException, OSError):
+            self._conn.close()
+            raise
+        raw = response.read()
+        for header in response.msg.get_all("Set-Cookie") or []:
+            jar = SimpleCookie()
+            jar.load(header)
+            for key, morsel in jar.items():
+                self._cookies[key] = morsel.value
+        try:
+            payload = json.loads(raw) if raw else None
+        except ValueError:
+            payload = None
+        return response.status, payload, _lower_keys(response.getheaders())
+
+
+class VirtualUser:
+    def __init__(self, client, *, email: str, username: str, password: str):
+        self.client = client
+        self.email = email
+        self.username = username
+        self.password = password
+        self.csrf_token: Optional[str] = None
+
+    def register(self) -> int:
+        status, _, headers = self.client.request(
+            "POST",
+            "/auth/register",
+            json_body={
+                "email": self.email,
+                "password": self.password,
+                "name_for_certificate": "Performance Tester",
+                "username": self.username,
+                "sex": "NotSpecified",
+                "color": "NS",
+                "role": "User",
+                "birthday": "1990-01-01",
+                "remember": True,
+            },
+        )
+        if status == 200:
+            self.csrf_token = headers.get("x-csrf-token")
+        return status
+
+    def login(self) -> int:
+        status, _, headers = self.client.request(
+            "POST",
+            "/auth/login",
+            json_body={
+                "email": self.email,
+                "password": self.password,
+                "remember": True,
+            },
+        )
+        if status == 200:
+            self.csrf_token = headers.get("x-csrf-token") or self.csrf_token
+        return status
+
+    def call(self, scenario: Scenario, dataset: Dataset) -> int:
+        headers = {}
+        if scenario.csrf and self.csrf_token:
+            headers["X-CSRF-Token"] = self.csrf_token
+        body = scenario.body(dataset, self) if scenario.body else None
+        status, _, response_headers = self.client.request(
+            scenario.method, scenario.path(dataset), json_body=body, headers=headers
+        )
+        # Login rotates the CSRF cookie; keep the header in sync with it.
+        self.csrf_token = response_headers.get("x-csrf-token") or self.csrf_token
+        return status
+
+
+def _form_answers(dataset: Dataset, _user: VirtualUser) -> dict:
+    return {
+        "duration_seconds": 30,
+        "answers": [
+            {
+                "question_id": question["id"],
+                "selected_option_id": question["first_option_id"],
+                "answer_text": (
+                    None if question["first_option_id"] else "Benchmark answer"
+                ),
+            }
+            for question in dataset.form_questions or []
+        ],
+    }
+
+
+def _progress_body(dataset: Dataset, _user: VirtualUser) -> dict:
+    # Stay inside the video skip-ahead window so the write is accepted.
+    value = 30
+    if dataset.item_duration_seconds:
+        value = min(value, dataset.item_duration_seconds)
+    return {"status": "IN_PROGRESS", "progress_value": value}
+
+
+def create_scenarios() -> list[Scenario]:
+    return [
+        Scenario("GET /trails/showcase", "GET", lambda d: "/trails/showcase"),
+        Scenario("GET /trails", "GET", lambda d: "/trails/"),
+        Scenario(
+            "GET /trails/:id",
+            "GET",
+            lambda d: f"/trails/{d.trail_id}",
+            requires=("trail_id",),
+        ),
+        Scenario(
+            "GET /trails/:id/sections-with-items",
+            "GET",
+            lambda d: f"/trails/{d.trail_id}/sections-with-items",
+            requires=("trail_id",),
+        ),
+        Scenario(
+            "GET /trails/:id/items/:itemId",
+            "GET",
+            lambda d: f"/trails/{d.trail_id}/items/{d.item_id}",
+            requires=("trail_id", "item_id"),
+            auth=True,
+        ),
+        Scenario(
+            "POST /auth/login",
+            "POST",
+            lambda d: "/auth/login",
+            body=lambda d, user: {
+                "email": user.email,
+                "password": user.password,
+                "remember": True,
+            },
+            acceptable_status=(429,),
+        ),
+        Scenario(
+            "POST /user-trails/:trailId/enroll",
+            "POST",
+            lambda d: f"/user-trails/{d.trail_id}/enroll",
+            requires=("trail_id",),
+            auth=True,
+            csrf=True,
+            writes=True,
+        ),
+        Scenario(
+            "GET /user-trails/:trailId/progress",
+            "GET",
+            lambda d: f"/user-trails/{d.trail_id}/progress",
+            requires=("trail_id",),
+            auth=True,
+        ),
+        Scenario(
+            "GET /user-trails/:trailId/items-progress",
+            "GET",
+            lambda d: f"/user-trails/{d.trail_id}/items-progress",
+            requires=("trail_id",),
+            auth=True,
+        ),
+        Scenario(
+            "GET /user-trails/:trailId/sections-progress",
+            "GET",
+            lambda d: f"/user-trails/{d.trail_id}/sections-progress",
+            requires=("trail_id",),
+            auth=True,
+        ),
+        Scenario("GET /me", "GET", lambda d: "/me", auth=True),
+        Scenario(
+            "PUT /trails/:id/items/:itemId/progress",
+            "PUT",
+            lambda d: f"/trails/{d.trail_id}/items/{d.item_id}/progress",
+            body=_progress_body,
+            requires=("trail_id", "item_id"),
+            auth=True,
+            csrf=True,
+            writes=True,
+        ),
+        Scenario(
+            "POST /trails/:id/items/:itemId/form-submissions",
+            "POST",
+            lambda d: f"/trails/{d.trail_id}/items/{d.form_item_id}/form-submissions",
+            body=_form_answers,
+            requires=("trail_id", "form_item_id", "form_questions"),
+            auth=True,
+            csrf=True,
+            writes=True,
+        ),
+        Scenario("GET /forums", "GET", lambda d: "/forums/"),
+        Scenario(
+            "GET /forums/:id/topics",
+            "GET",
+            lambda d: f"/forums/{d.forum_id}/topics",
+            requires=("forum_id",),
+        ),
+        Scenario(
+            "GET /forums/topics/:id/posts",
+            "GET",
+            lambda d: f"/forums/topics/{d.topic_id}/posts",
+            requires=("topic_id",),
+        ),
+    ]
+
+
+def seed_database(admin_email: str) -> None:
+    """Create schema (SQLite only), lookups and a small demo trail + topic."""
+    from sqlalchemy import select
+
+    from app.core.db import engine, session_scope
+    from app.models.base import Base
+    from app.models.lk_question_type import LkQuestionType as LkQuestionTypeORM
+    from app.models.trails import Trails as TrailsORM
+    from app.repositories.ForumsRepository import ForumsRepository
+    from app.repositories.TrailsRepository import TrailsRepository
+    from performance.db_benchmark import ensure_benchmark_user, ensure_lookup_values
+
+    if engine.dialect.name == "sqlite":
+        Base.metadata.create_all(bind=engine)
+
+    with session_scope() as session:
+        ensure_lookup_values(session)
+        existing = set(session.execute(select(LkQuestionTypeORM.code)).scalars())
+        for code in ("ESSAY", "TRUE_OR_FALSE", "SINGLE_CHOICE"):
+            if code not in existing:
+                session.add(LkQuestionTypeORM(code=code))
+        session.commit()
+
+        author = ensure_benchmark_user(session, admin_email, DEFAULT_PASSWORD)
+        if session.scalars(select(TrailsORM.id).limit(1)).first() is None:
+            stamp = uuid.uuid4().hex[:8]
+            TrailsRepository(session).create_trail(
+                name="Trilha de carga",
+                thumbnail_url="https://example.com/thumb.png",
+                description="Dados sintéticos do load driver.",
+                author="Performance",
+                created_by=author.user_id,
+                sections=[
+                    {
+                        "title": "Seção 1",
+                        "items": [
+                            {
+                                "title": "Vídeo",
+                                "type": "VIDEO",
+                                "url": f"https://example.com/video-{stamp}",
+                                "duration_seconds": 300,
+                            },
+                            {
+                                "title": "Quiz",
+                                "type": "FORM",
+                                "url": f"https://example.com/form-{stamp}",
+                                "form": {
+                                    "title": "Quiz",
+                                    "questions": [
+                                        {
+                                            "prompt": f"Pergunta {index + 1}",
+                                            "type": "SINGLE_CHOICE",
+                                            "required": True,
+                                            "points": 1,
+                                            "options": [
+                                                {"text": "A", "is_correct": True},
+                                                {"text": "B", "is_correct": False},
+                                            ],
+                                        }
+                                        for index in range(5)
+                                    ],
+                                },
+                            },
+                        ],
+                    }
+                ],
+            )
+
+        forums = ForumsRepository(session)
+        general = forums.ensure_bootstrap()
+        if not forums.list_topics(general.id, offset=0, limit=1)[0]:
+            forums.create_topic(
+                forum_id=general.id,
+                title="Tópico de carga",
+                content="<p>Conteúdo sintético.</p>",
+                author_id=author.user_id,
+            )
+        session.commit()
+
+
+def hydrate_dataset(user: VirtualUser) -> Dataset:
+    dataset = Dataset()
+    client = user.client
+
+    status, trails, _ = client.request("GET", "/trails/")
+    if status < 400 and trails and trails.get("trails"):
+        dataset.trail_id = trails["trails"][0]["id"]
+
+    if dataset.trail_id:
+        status, sections, _ = client.request(
+            "GET", f"/trails/{dataset.trail_id}/sections-with-items"
+        )
+        if status < 400 and isinstance(sections, list) and sections:
+            dataset.section_id = sections[0].get("id")
+            first_items = sections[0].get("items") or []
+            if first_items:
+                dataset.item_id = first_items[0]["id"]
+                dataset.item_duration_seconds = first_items[0].get("duration_seconds")
+            for section in sections:
+                form_item = next(
+                    (i for i in section.get("items") or [] if i.get("type") == "FORM"),
+                    None,
+                )
+                if form_item:
+                    dataset.form_item_id = form_item["id"]
+                    break
+
+    if dataset.trail_id and dataset.form_item_id:
+        status, detail, _ = client.request(
+            "GET", f"/trails/{dataset.trail_id}/items/{dataset.form_item_id}"
+        )
+        questions = ((detail or {}).get("form") or {}).get("questions") or []
+        if status < 400 and questions:
+            dataset.form_questions = [
+                {
+                    "id": question["id"],
+                    "first_option_id": (
+                        question["options"][0]["id"]
+                        if question.get("options")
+                        else None
+                    ),
+                }
+                for question in questions
+            ]
+
+    status, forums, _ = client.request("GET", "/forums/")
+    if status < 400 and forums and forums.get("forums"):
+        dataset.forum_id = forums["forums"][0]["id"]
+        status, topics, _ = client.request("GET", f"/forums/{dataset.forum_id}/topics")
+        if status < 400 and topics and topics.get("topics"):
+            dataset.topic_id = topics["topics"][0]["id"]
+
+    return dataset
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_scenario(
+    scenario: Scenario,
+    users: list[VirtualUser],
+    dataset: Dataset,
+    *,
+    requests_per_user: int,
+    duration: Optional[float],
+    profilers: Optional[list[cProfile.Profile]] = None,
+) -> ScenarioResult:
+    lock = threading.Lock()
+    samples: list[float] = []
+    statuses: dict[str, int] = {}
+    errors = 0
+
+    def worker(user: VirtualUser) -> None:
+        nonlocal errors
+        # Only one thread is profiled: cProfile cannot run in several threads at
+        # once on Python 3.12+ (sys.monitoring allows a single profiler tool).
+        profiled = profilers is not None and user is users[0]
+        profiler = cProfile.Profile() if profiled else None
+        local_samples: list[float] = []
+        local_statuses: dict[str, int] = {}
+        local_errors = 0
+        deadline = time.perf_counter() + duration if duration else None
+        count = 0
+        if profiler:
+            profiler.enable()
+        try:
+            while True:
+                if deadline is not None:
+                    if time.perf_counter() >= deadline:
+                        break
+                elif count >= requests_per_user:
+                    break
+                count += 1
+                start = time.perf_counter()
+                try:
+                    status = user.call(scenario, dataset)
+                except Exception:  # noqa: BLE001 - count transport failures
+                    status = 0
+                local_samples.append((time.perf_counter() - start) * 1000)
+                key = str(status)
+                local_statuses[key] = local_statuses.get(key, 0) + 1
+                if (
+                    status == 0 or status >= 400
+                ) and status not in scenario.acceptable_status:
+                    local_errors += 1
+        finally:
+            if profiler:
+                profiler.disable()
+        with lock:
+            samples.extend(local_samples)
+            for key, value in local_statuses.items():
+                statuses[key] = statuses.get(key, 0) + value
+            errors += local_errors
+            if profiler:
+                profilers.append(profiler)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(users)) as pool:
+        list(pool.map(worker, users))
+    elapsed = time.perf_counter() - started
+
+    ordered = sorted(samples)
+    return ScenarioResult(
+        name=scenario.name,
+        requests=len(samples),
+        errors=errors,
+        total_time=elapsed,
+        rps=len(samples) / elapsed if elapsed > 0 else 0.0,
+        mean_ms=mean(samples) if samples else 0.0,
+        p50_ms=_percentile(ordered, 0.50),
+        p95_ms=_percentile(ordered, 0.95),
+        p99_ms=_percentile(ordered, 0.99),
+        status_counts=statuses,
+        samples_ms=samples,
+    )
+
+
+def print_results(results: list[ScenarioResult]) -> None:
+    if not results:
+        print("No scenarios executed.")
+        return
+    header = (
+        f"{'Scenario':50} {'Reqs':>7} {'Err':>5} {'RPS':>9} {'Mean':>8}"
+        f" {'p50':>8} {'p95':>8} {'p99':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r.name:50} {r.requests:>7} {r.errors:>5} {r.rps:>9.1f} {r.mean_ms:>8.2f}"
+            f" {r.p50_ms:>8.2f} {r.p95_ms:>8.2f} {r.p99_ms:>8.2f}"
+        )
+    total = sum(r.requests for r in results)
+    elapsed = sum(r.total_time for r in results)
+    print(
+        f"\nTotal: {total} requests in {elapsed:.2f}s"
+        f" ({total / elapsed if elapsed else 0:.1f} req/s), latencies in ms"
+    )
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_uvicorn(port: int, workers_hint: int):
+    import uvicorn
+
+    config = uvicorn.Config(
+        "app.asgi:app",
+        host="127.0.0.1",
+        port=port,
+        log_level="warning",
+        limit_concurrency=max(64, workers_hint * 4),
+    )
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.time() + 30
+    while not server.started:
+        if time.time() > deadline or not thread.is_alive():
+            raise RuntimeError("Uvicorn did not start")
+        time.sleep(0.05)
+    return server, thread
+
+
+def start_py_spy(output: str) -> Optional[subprocess.Popen]:
+    binary = shutil.which("py-spy")
+    if not binary:
+        print("py-spy not found in PATH; skipping --py-spy.")
+        return None
+    return subprocess.Popen(
+        [
+            binary,
+            "record",
+            "--pid",
+            str(os.getpid()),
+            "--output",
+            output,
+            "--rate",
+            "200",
+        ]
+    )
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--mode",
+        choices=("wsgi", "uvicorn"),
+        default="wsgi",
+        help="wsgi: Flask test client in-process; uvicorn: local server on loopback.",
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--requests", type=int, default=50, help="Requests per virtual user."
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=None,
+        help="Seconds per scenario (overrides --requests).",
+    )
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        default=[],
+        help="Substring filter on scenario names (repeatable).",
+    )
+    parser.add_argument(
+        "--include-writes",
+        action="store_true",
+        help="Include enroll, progress writes and form submissions.",
+    )
+    parser.add_argument(
+        "--seed",
+        action="store_true",
+        help="Create schema (SQLite), lookups and a demo trail/topic before running.",
+    )
+    parser.add_argument("--json", dest="json_path", help="Write results to JSON.")
+    parser.add_argument(
+        "--record-history",
+        action="store_true",
+        help="Store the run with performance/bench_history.py.",
+    )
+    parser.add_argument("--env", default=os.environ.get("PERF_BENCH_ENV"))
+    parser.add_argument(
+        "--profile",
+        help="Write cProfile stats of the first virtual user's thread to this path.",
+    )
+    parser.add_argument("--py-spy", dest="py_spy", help="Record a py-spy flamegraph.")
+    args = parser.parse_args(argv)
+
+    stamp = f"{int(time.time())}{uuid.uuid4().hex[:4]}"
+    if args.seed:
+        seed_database(f"perf-load-admin-{stamp}@example.com")
+
+    server = None
+    if args.mode == "uvicorn":
+        port = _free_port()
+        server, _ = start_uvicorn(port, args.concurrency)
+
+        def make_client(index: int):
+            return HTTPClient("127.0.0.1", port, _forwarded_for(index))
+
+    else:
+        from app.main import create_app
+
+        flask_app = create_app()
+
+        def make_client(index: int):
+            return WSGIClient(flask_app, _forwarded_for(index))
+
+    users: list[VirtualUser] = []
+    for index in range(max(1, args.concurrency)):
+        user = VirtualUser(
+            make_client(index),
+            email=f"perf-load-{stamp}-{index}@example.com",
+            username=f"perf_load_{stamp}_{index}",
+            password=DEFAULT_PASSWORD,
+        )
+        status = user.register()
+        if status != 200:
+            print(f"Unable to register virtual user {index} ({status}); aborting.")
+            return 1
+        users.append(user)
+
+    dataset = hydrate_dataset(users[0])
+    if dataset.trail_id:
+        for user in users:
+            user.client.request(
+                "POST",
+                f"/user-trails/{dataset.trail_id}/enroll",
+                headers={"X-CSRF-Token": user.csrf_token or ""},
+            )
+
+    scenarios = [
+        scenario
+        for scenario in create_scenarios()
+        if (args.include_writes or not scenario.writes)
+        and (
+            not args.scenario
+            or any(token.lower() in scenario.name.lower() for token in args.scenario)
+        )
+    ]
+
+    profilers: Optional[list[cProfile.Profile]] = [] if args.profile else None
+    spy = start_py_spy(args.py_spy) if args.py_spy else None
+
+    results: list[ScenarioResult] = []
+    try:
+        for scenario in scenarios:
+            missing = [
+                key for key in scenario.requires if getattr(dataset, key) is None
+            ]
+            if missing:
+                print(f"Skipping {scenario.name} (missing: {', '.join(missing)})")
+                continue
+            results.append(
+                run_scenario(
+                    scenario,
+                    users,
+                    dataset,
+                    requests_per_user=args.requests,
+                    duration=args.duration,
+                    profilers=profilers,
+                )
+            )
+    finally:
+        if spy:
+            spy.terminate()
+            spy.wait(timeout=30)
+        if server:
+            server.should_exit = True
+
+    print_results(results)
+
+    if profilers:
+        stats = pstats.Stats(profilers[0])
+        for profiler in profilers[1:]:
+            stats.add(profiler)
+        stats.dump_stats(args.profile)
+        print(f"cProfile stats written to {args.profile}")
+
+    rows = [result.__dict__ for result in results]
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as fh:
+            json.dump(rows, fh, indent=2)
+        print(f"Raw results written to {args.json_path}")
+
+    if args.record_history and rows:
+        from performance.bench_history import record_run
+
+        path = record_run(rows, env=args.env, suite="load_driver")
+        print(f"Run recorded in {path}")
+
+    return 0
+
+
+def _forwarded_for(index: int) -> str:
+    # Distinct client IPs so the auth rate limiter buckets users like real traffic.
+    return f"10.77.{index // 250}.{index % 250 + 1}"
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""Benchmark the in-memory auth rate limiter under thread contention."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import threading
+import tracemalloc
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.services.rate_limiter import GcraRateLimiter
+
+
+def run_case(
+    *,
+    threads: int,
+    checks_per_thread: int,
+    distinct_keys: int,
+    shards: int,
+    max_keys: int,
+) -> dict[str, Any]:
+    limiter = GcraRateLimiter(
+        max_attempts=10, window_seconds=60, max_keys=max_keys, shards=shards
+    )
+    # Pre-generated keys so the timed loop only measures the limiter.
+    key_sets = [
+        [
+            f"login:user{random.randrange(distinct_keys)}@example.com:10.0.0.1"
+            for _ in range(checks_per_thread)
+        ]
+        for _ in range(threads)
+    ]
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(keys: list[str]) -> None:
+        barrier.wait()
+        for key in keys:
+            limiter.register_attempt(key)
+
+    workers = [threading.Thread(target=worker, args=(keys,)) for keys in key_sets]
+    for thread in workers:
+        thread.start()
+    tracemalloc.start()
+    barrier.wait()
+    started = perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total = threads * checks_per_thread
+    return {
+        "threads": threads,
+        "shards": shards,
+        "distinct_keys": distinct_keys,
+        "checks": total,
+        "seconds": elapsed,
+        "checks_per_sec": total / elapsed if elapsed else 0.0,
+        "tracked_keys": len(limiter),
+        "evicted": limiter.evicted,
+        "peak_kib": peak / 1024,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 16])
+    parser.add_argument("--checks", type=int, default=50_000, help="Per thread.")
+    parser.add_argument("--distinct-keys", type=int, default=1_000_000)
+    parser.add_argument("--max-keys", type=int, default=100_000)
+    parser.add_argument(
+        "--json", dest="json_path", help="Write raw results to the given JSON file"
+    )
+    args = parser.parse_args()
+
+    results = []
+    print(
+        f"{'threads':>7} {'shards':>6} {'checks/s':>12} {'keys':>8} "
+        f"{'evicted':>8} {'peak KiB':>9}"
+    )
+    for threads in args.threads:
+        for shards in args.shards:
+            result = run_case(
+                threads=threads,
+                checks_per_thread=args.checks,
+                distinct_keys=args.distinct_keys,
+                shards=shards,
+                max_keys=args.max_keys,
+            )
+            results.append(result)
+            print(
+                f"{threads:>7} {shards:>6} {result['checks_per_sec']:>12,.0f} "
+                f"{result['tracked_keys']:>8} {result['evicted']:>8} "
+                f"{result['peak_kib']:>9,.0f}"
+            )
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
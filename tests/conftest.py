@@ -3,6 +3,9 @@ import os
 
 os.environ.setdefault("JWT_SECRET", "test-secret-change-me-123")
 os.environ.setdefault("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+# Keep rendered QR codes and certificates in memory, not in the repo's cache/.
+os.environ.setdefault("QR_CACHE_DIR", "")
+os.environ.setdefault("CERTIFICATE_CACHE_DIR", "")
 
 import pytest
 from sqlalchemy import create_engine, event, insert, select
@@ -19,7 +22,14 @@ from app.core.db import (
 )
 from app.core.settings import settings
 from app.models.base import Base
+from app.models.lk_item_type import LkItemType
+from app.models.lk_question_type import LkQuestionType
 from app.models.lookups import LkRole, LkSex, LkColor
+from app.repositories.TrailsRepository import TrailsRepository
+from app.services import certificate_documents
+from app.services.form_cache import form_cache
+from app.services.request_limits import reset_api_limiter
+from app.services.trail_payload import AdminTrailSectionIn
 
 
 app.config.update({"TESTING": True})
@@ -66,7 +76,7 @@ def db_connection(engine):
 
 
 @pytest.fixture(scope="function")
-def db_session(db_connection):
+def db_session(db_connection, monkeypatch):
     SessionLocal = sessionmaker(
         bind=db_connection,
         autoflush=False,
@@ -78,13 +88,22 @@ def db_session(db_connection):
 
     def restart_savepoint(sess, trans_):
         nonlocal nested
-        if trans_.nested and not trans_.connection.closed:
+        # Session-level savepoints end here too; only reopen the outer one.
+        if trans_.nested and not db_connection.closed and not nested.is_active:
             nested = db_connection.begin_nested()
 
     event.listen(session, "after_transaction_end", restart_savepoint)
 
     set_session_factory(SessionLocal)
     set_db_session_override(session)
+    # Ids restart with every test database, so compiled forms must not leak.
+    form_cache.clear()
+    reset_api_limiter()
+    # Pre-rendering after commit runs on a worker thread, which here would share
+    # the test connection (and its savepoints) with the test; run it inline.
+    monkeypatch.setattr(
+        certificate_documents, "submit_background", lambda fn, *args: fn(*args)
+    )
 
     try:
         yield session
@@ -99,3 +118,89 @@ def db_session(db_connection):
 def client():
     with app.test_client() as client:
         yield client
+
+
+def _sample_quiz() -> dict:
+    return {
+        "title": "Quiz",
+        "min_score_to_pass": 70,
+        "randomize_questions": False,
+        "questions": [
+            {
+                "prompt": "Pergunta 1",
+                "type": "SINGLE_CHOICE",
+                "required": True,
+                "points": 1,
+                "options": [
+                    {"text": "A", "is_correct": True},
+                    {"text": "B", "is_correct": False},
+                ],
+            },
+            {"prompt": "Pergunta 2", "type": "ESSAY", "required": False},
+        ],
+    }
+
+
+@pytest.fixture(scope="function")
+def trail_repo(db_session):
+    """A ``TrailsRepository`` with the item and question types the builder uses."""
+    db_session.add_all([LkItemType(code="VIDEO"), LkItemType(code="FORM")])
+    db_session.add_all(
+        [LkQuestionType(code="SINGLE_CHOICE"), LkQuestionType(code="ESSAY")]
+    )
+    db_session.commit()
+    return TrailsRepository(db_session)
+
+
+@pytest.fixture(scope="function")
+def create_trail(trail_repo):
+    """Create the sample trail: V1, V2 and a quiz in "Seção 1", empty "Seção 2"."""
+
+    def create():
+        return trail_repo.create_trail(
+            name="Trilha",
+            thumbnail_url="https://example.com/t.png",
+            description=None,
+            author=None,
+            created_by=None,
+            sections=[
+                {
+                    "title": "Seção 1",
+                    "items": [
+                        {"title": "V1", "type": "VIDEO", "url": "https://v/1"},
+                        {"title": "V2", "type": "VIDEO", "url": "https://v/2"},
+                        {
+                            "title": "Q",
+                            "type": "FORM",
+                            "url": "https://f/1",
+                            "form": _sample_quiz(),
+                        },
+                    ],
+                },
+                {"title": "Seção 2", "items": []},
+            ],
+        )
+
+    return create
+
+
+@pytest.fixture(scope="function")
+def update_trail(trail_repo):
+    """Save ``sections`` over a trail the way the admin builder endpoint does."""
+
+    def update(trail_id: int, sections: list[dict]):
+        # Go through the route's validation so the payload is normalized as in a save.
+        sections = [
+            AdminTrailSectionIn.model_validate(section).model_dump(mode="python")
+            for section in sections
+        ]
+        return trail_repo.update_trail(
+            trail_id,
+            name="Trilha",
+            thumbnail_url="https://example.com/t.png",
+            description=None,
+            author=None,
+            sections=sections,
+        )
+
+    return update
@@ -0,0 +1,61 @@
+import json
+
+from performance import bench_history
+
+
+def _run(name, samples):
+    return {"cases": {name: {"name": name, "samples_ms": samples}}}
+
+
+def test_compare_flags_significant_regression():
+    baseline = _run("case", [10.0 + (i % 5) * 0.1 for i in range(50)])
+    candidate = _run("case", [13.0 + (i % 5) * 0.1 for i in range(50)])
+
+    [comparison] = bench_history.compare_runs(
+        baseline, candidate, threshold=0.1, resamples=200
+    )
+
+    assert comparison.status == "regressed"
+    assert comparison.ci_low > 1.0
+
+
+def test_compare_ignores_noise_within_threshold():
+    baseline = _run("case", [10.0 + (i % 7) * 0.5 for i in range(50)])
+    candidate = _run("case", [10.2 + (i % 7) * 0.5 for i in range(50)])
+
+    [comparison] = bench_history.compare_runs(
+        baseline, candidate, threshold=0.1, resamples=200
+    )
+
+    assert comparison.status == "unchanged"
+
+
+def test_record_and_compare_cli_exit_code(tmp_path):
+    history = tmp_path / "history"
+    bench_history.record_run(
+        [{"name": "q", "samples_ms": [1.0] * 20}],
+        history_dir=history,
+        env="ci",
+        revision="aaa111",
+    )
+    bench_history.record_run(
+        [{"name": "q", "samples_ms": [2.0] * 20}],
+        history_dir=history,
+        env="ci",
+        revision="bbb222",
+    )
+
+    stored = json.loads((history / "ci" / "aaa111.json").read_text())
+    assert stored["cases"]["q"]["samples_ms"] == [1.0] * 20
+
+    argv = [
+        "--history-dir",
+        str(history),
+        "--env",
+        "ci",
+        "compare",
+        "--resamples",
+        "50",
+    ]
+    assert bench_history.main(argv + ["--baseline", "aaa", "--candidate", "bbb"]) == 1
+    assert bench_history.main(argv + ["--baseline", "bbb", "--candidate", "aaa"]) == 0
@@ -0,0 +1,99 @@
+import uuid
+
+from app.core.settings import settings
+from app.models.trails import Trails
+from app.repositories.CertificatesRepository import CertificatesRepository
+from app.services import certificate_documents
+from app.services.certificate_qr import QrCache
+from app.services.render_cache import RenderCache
+
+BASE_URL = "https://rota.example.com"
+
+
+def _issue_certificate(client, db_session) -> str:
+    register_resp = client.post(
+        "/auth/register",
+        json={
+            "email": f"doc_{uuid.uuid4().hex[:8]}@example.com",
+            "password": "StrongPass!123",
+            "name_for_certificate": "Ana <Souza>",
+            "sex": "NotSpecified",
+            "color": "NS",
+            "birthday": "1990-01-01",
+            "username": f"user_{uuid.uuid4().hex[:6]}",
+            "social_name": "Ana",
+            "role": "User",
+        },
+    )
+    assert register_resp.status_code == 200, register_resp.get_data(as_text=True)
+    user_id = register_resp.get_json()["user"]["user_id"]
+    trail = Trails(name="Trilha & Cia", thumbnail_url="https://example.com/t.jpg")
+    db_session.add(trail)
+    db_session.flush()
+    cert = CertificatesRepository(db_session).ensure_certificate(user_id, trail.id)
+    db_session.commit()
+    return cert.certificate_hash
+
+
+def _fresh_caches(monkeypatch):
+    documents = RenderCache(max_size=8)
+    qr = QrCache(max_size=8)
+    monkeypatch.setattr(certificate_documents, "document_cache", documents)
+    monkeypatch.setattr(certificate_documents, "qr_cache", qr)
+    return documents, qr
+
+
+def test_document_endpoint_renders_once_and_revalidates(
+    client, db_session, monkeypatch
+):
+    monkeypatch.setattr(settings, "app_base_url", None)
+    documents, _ = _fresh_caches(monkeypatch)
+    cert_hash = _issue_certificate(client, db_session)
+
+    resp = client.get(f"/certificates/{cert_hash}/document.svg?download=1")
+    assert resp.status_code == 200
+    assert resp.mimetype == "image/svg+xml"
+    assert resp.headers["Content-Disposition"].startswith("attachment;")
+    body = resp.get_data(as_text=True)
+    assert body.startswith("<svg")
+    assert "Ana &lt;Souza&gt;" in body
+    assert "Trilha &amp; Cia" in body
+    assert int(resp.headers["Content-Length"]) == len(resp.data)
+
+    again = client.get(f"/certificates/{cert_hash}/document.svg")
+    assert again.data == resp.data
+    assert (documents.renders, documents.hits) == (1, 1)
+
+    cached = client.get(
+        f"/certificates/{cert_hash}/document.svg",
+        headers={"If-None-Match": resp.headers["ETag"]},
+    )
+    assert cached.status_code == 304
+    assert documents.hits == 1
+    assert client.get("/certificates/0000000000000000/document.svg").status_code == 404
+
+
+def test_issued_certificates_are_prerendered_after_commit(
+    client, db_session, monkeypatch
+):
+    monkeypatch.setattr(settings, "app_base_url", BASE_URL)
+    documents, qr = _fresh_caches(monkeypatch)
+    scheduled = []
+    monkeypatch.setattr(
+        certificate_documents,
+        "submit_background",
+        lambda fn, hashes: scheduled.append(set(hashes)),
+    )
+
+    cert_hash = _issue_certificate(client, db_session)
+    assert scheduled == [{cert_hash}]
+
+    assert certificate_documents.prerender(scheduled[0]) == 1
+    assert (documents.renders, qr.renders) == (1, 1)
+
+    resp = client.get(f"/certificates/{cert_hash}/document.svg")
+    assert resp.status_code == 200
+    assert f"{BASE_URL}/certificados/?cert_hash={cert_hash}" in resp.get_data(
+        as_text=True
+    )
+    assert (documents.renders, documents.hits) == (1, 1)
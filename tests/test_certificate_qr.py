@@ -0,0 +1,125 @@
+import os
+import time
+from datetime import datetime, timezone
+
+from app.core.settings import settings
+from app.models.trail_certificates import TrailCertificates
+from app.services.certificate_qr import QrCache, qr_cache_key, render_qr_png
+from app.services.render_cache import DiskStore
+from tests.test_certificate_documents import _issue_certificate
+
+PAYLOAD = "https://rota.example.com/certificados/?cert_hash=abcdef0123456789"
+
+
+class _BrokenStore:
+    def get(self, key):
+        raise OSError("disk gone")
+
+    def put(self, key, png):
+        raise OSError("disk gone")
+
+
+def test_qr_cache_reuses_the_shared_store_across_processes(tmp_path):
+    store = DiskStore(tmp_path)
+    first = QrCache(max_size=8, store=store)
+    png = first.get_png(PAYLOAD)
+    assert png == render_qr_png(PAYLOAD)
+    assert first.renders == 1
+    assert first.get_png(PAYLOAD) is png
+    assert first.hits == 1
+
+    key = qr_cache_key(PAYLOAD)
+    assert (tmp_path / key[:2] / key).read_bytes() == png
+
+    # A fresh worker (empty LRU) reads the stored image instead of rendering.
+    second = QrCache(max_size=8, store=store)
+    assert second.get_png(PAYLOAD) == png
+    assert (second.renders, second.store_hits) == (0, 1)
+    assert second.data_uri(PAYLOAD).startswith("data:image/png;base64,")
+
+
+def test_qr_cache_renders_when_the_store_fails():
+    cache = QrCache(max_size=0, store=_BrokenStore())
+    assert cache.get_png(PAYLOAD) == render_qr_png(PAYLOAD)
+    assert cache.renders == 1
+
+
+def test_qr_endpoint_serves_cacheable_images(client, db_session, monkeypatch):
+    monkeypatch.setattr(settings, "app_base_url", "https://rota.example.com")
+    now = datetime.now(timezone.utc)
+    db_session.add(
+        TrailCertificates(
+            id=1,
+            user_id=1,
+            trail_id=1,
+            certificate_hash="abcdef0123456789",
+            credential_id="abcdef0123456789",
+            issued_at=now,
+            issued_at_utc=now.replace(tzinfo=None),
+        )
+    )
+    db_session.commit()
+
+    version = qr_cache_key(PAYLOAD)[:16]
+    resp = client.get(f"/certificates/abcdef0123456789/qr.png?v={version}")
+    assert resp.status_code == 200
+    assert resp.mimetype == "image/png"
+    assert resp.data == render_qr_png(PAYLOAD)
+    assert "immutable" in resp.headers["Cache-Control"]
+    assert "Origin" in resp.headers["Vary"]
+    etag = resp.headers["ETag"]
+
+    # Without the current content key the image may still change.
+    for stale in ("", "?v=0000000000000000"):
+        unversioned = client.get(f"/certificates/abcdef0123456789/qr.png{stale}")
+        assert unversioned.data == resp.data
+        assert "immutable" not in unversioned.headers["Cache-Control"]
+
+    cached = client.get(
+        "/certificates/abcdef0123456789/qr.png", headers={"If-None-Match": etag}
+    )
+    assert cached.status_code == 304
+    assert cached.data == b""
+
+    svg = client.get("/certificates/abcdef0123456789/qr.svg")
+    assert svg.mimetype == "image/svg+xml"
+    assert svg.data.startswith(b"<svg")
+    assert client.get("/certificates/0000000000000000/qr.png").status_code == 404
+
+
+def test_disk_store_drops_expired_and_oldest_files(tmp_path):
+    store = DiskStore(tmp_path, ttl_seconds=3600, max_files=2, prune_every=100)
+    for index, key in enumerate(["aa01", "bb02", "cc03"]):
+        store.put(key, key.encode())
+        # Distinct, increasing mtimes without sleeping.
+        stamp = time.time() - 100 + index
+        os.utime(tmp_path / key[:2] / key, (stamp, stamp))
+    assert store.prune() == 1
+    assert store.get("aa01") is None
+    assert store.get("cc03") == b"cc03"
+
+    stale = time.time() - 7200
+    os.utime(tmp_path / "bb" / "bb02", (stale, stale))
+    assert store.get("bb02") is None
+    assert not (tmp_path / "bb" / "bb02").exists()
+
+
+def test_unknown_verify_base_is_ignored(client, db_session, monkeypatch):
+    monkeypatch.setattr(settings, "app_base_url", "https://rota.example.com")
+    cert_hash = _issue_certificate(client, db_session)
+    own = f"https://rota.example.com/certificados/?cert_hash={cert_hash}"
+
+    body = client.get(
+        f"/certificates/{cert_hash}?verify_base=https://evil.example"
+    ).get_json()
+    assert body["verification_url"] == own
+    assert "evil" not in body["qr_code_url"]
+    assert body["qr_code_url"].endswith(f"?v={qr_cache_key(own)[:16]}")
+    qr = client.get(
+        f"/certificates/{cert_hash}/qr.png?verify_base=https://evil.example"
+    )
+    assert qr.data == render_qr_png(own)
+
+    origin = settings.cors_allowed_origins_list()[0].rstrip("/")
+    body = client.get(f"/certificates/{cert_hash}?verify_base={origin}").get_json()
+    assert body["verification_url"] == f"{origin}/certificados/?cert_hash={cert_hash}"
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
+import re
 import uuid
+from urllib.parse import urlsplit
 
 from sqlalchemy import event, text
 
@@ -14,6 +16,7 @@ from app.models.trail_certificates import TrailCertificates
 from app.models.lk_enrollment_status import LkEnrollmentStatus
 from app.models.lk_progress_status import LkProgressStatus
 from app.models.lk_item_type import LkItemType
+from app.repositories.CertificatesRepository import CertificatesRepository
 
 
 @event.listens_for(TrailCertificates, "before_insert")
@@ -129,6 +132,11 @@ def test_certificate_endpoint_commits_generated_certificate(client, db_session):
 
     resp = client.get(f"/certificates/me/trails/{trail.id}")
     assert resp.status_code == 200, resp.get_data(as_text=True)
+    body = resp.get_json()
+    qr_url = urlsplit(body["qr_code_url"])
+    assert qr_url.path == f"/certificates/{body['certificate_hash']}/qr.png"
+    assert re.fullmatch(r"v=[0-9a-f]{16}", qr_url.query)
+    assert body["qr_code_data_uri"] is None
 
     db_session.rollback()
 
@@ -139,3 +147,15 @@ def test_certificate_endpoint_commits_generated_certificate(client, db_session):
     )
     assert cert is not None
 
+
+def test_issue_many_is_idempotent_and_skips_existing(db_session):
+    repo = CertificatesRepository(db_session)
+    existing = repo.ensure_certificate(7, 3)
+
+    issued = repo.issue_many([(7, 3), (8, 3), (8, 3), (9, 4)])
+    assert len(issued) == 2
+    assert all(re.fullmatch(r"[0-9a-f]{32}", token) for token in issued)
+    assert repo.issue_many([(7, 3), (8, 3), (9, 4)]) == []
+
+    assert repo.ensure_certificate(7, 3).certificate_hash == existing.certificate_hash
+    assert db_session.query(TrailCertificates).count() == 3
@@ -0,0 +1,56 @@
+from flask import g
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from app.core import db as db_module
+from app.core.replicas import AUTOCOMMIT, RoutingSession
+from app.main import app
+
+
+def _use_factory(monkeypatch, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'session.db'}", poolclass=QueuePool)
+    monkeypatch.setattr(db_module, "_session_override", None)
+    monkeypatch.setattr(
+        db_module,
+        "_session_factory",
+        sessionmaker(bind=engine, class_=RoutingSession, expire_on_commit=False),
+    )
+    return engine
+
+
+def test_release_db_returns_the_connection_and_reopens_lazily(monkeypatch, tmp_path):
+    engine = _use_factory(monkeypatch, tmp_path)
+    with app.test_request_context("/"):
+        db = db_module.get_db()
+        db.execute(text("SELECT 1"))
+        assert engine.pool.checkedout() == 1
+
+        db_module.release_db()
+        assert engine.pool.checkedout() == 0
+        assert db_module.get_db() is db
+        assert db.execute(text("SELECT 2")).scalar() == 2
+        db_module.close_db()
+    assert engine.pool.checkedout() == 0
+
+
+def test_read_only_session_reads_in_autocommit_and_releases(monkeypatch, tmp_path):
+    engine = _use_factory(monkeypatch, tmp_path)
+    seen = {}
+
+    @db_module.read_only_session
+    def view():
+        db = db_module.get_db()
+        db.execute(text("SELECT 1"))
+        seen["options"] = db.get_bind().get_execution_options()
+        seen["checked_out"] = engine.pool.checkedout()
+        return "ok"
+
+    with app.test_request_context("/"):
+        db_module.get_db().execute(text("SELECT 1"))
+        assert view() == "ok"
+        assert g.db_session.info[AUTOCOMMIT] is True
+        assert engine.pool.checkedout() == 0
+        db_module.close_db()
+
+    assert seen == {"options": {"isolation_level": "AUTOCOMMIT"}, "checked_out": 1}
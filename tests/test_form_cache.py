@@ -0,0 +1,91 @@
+from app.models.form_answers import FormAnswer
+from app.repositories.TrailsRepository import TrailsRepository
+from app.services.form_cache import form_cache, get_compiled_form
+from tests.test_me import register_and_login
+
+
+def _quiz_item(repo: TrailsRepository, trail_id: int) -> tuple[dict, dict]:
+    payload = repo.get_trail_builder_payload(trail_id)
+    return payload, payload["sections"][0]["items"][2]
+
+
+def test_compiled_form_is_cached_per_version(
+    db_session, trail_repo, create_trail, update_trail
+):
+    trail = create_trail()
+    payload, quiz = _quiz_item(trail_repo, trail.id)
+
+    compiled = get_compiled_form(db_session, quiz["id"])
+    assert compiled.version == 1
+    assert [q.type for q in compiled.questions] == ["SINGLE_CHOICE", "ESSAY"]
+    choice = compiled.questions[0]
+    assert {o.text: o.correct for o in choice.option_map.values()} == {
+        "A": True,
+        "B": False,
+    }
+    assert compiled.total_points == choice.points
+    assert get_compiled_form(db_session, quiz["id"]) is compiled
+
+    # Renaming an item leaves the form alone; editing an option bumps it.
+    payload["sections"][0]["items"][0]["title"] = "V1 renomeado"
+    update_trail(trail.id, payload["sections"])
+    assert get_compiled_form(db_session, quiz["id"]) is compiled
+
+    quiz["form"]["questions"][0]["options"][1]["is_correct"] = True
+    update_trail(trail.id, payload["sections"])
+    recompiled = get_compiled_form(db_session, quiz["id"])
+    assert recompiled.version == 2
+    assert all(o.correct for o in recompiled.questions[0].options)
+
+
+def test_submission_is_graded_from_compiled_form(
+    client, db_session, trail_repo, create_trail
+):
+    trail = create_trail()
+    _, quiz = _quiz_item(trail_repo, trail.id)
+    login = register_and_login(client, db_session)
+    headers = {"X-CSRF-Token": login.headers["X-CSRF-Token"]}
+    choice, essay = quiz["form"]["questions"]
+    right = next(o["id"] for o in choice["options"] if o["is_correct"])
+    url = f"/trails/{trail.id}/items/{quiz['id']}"
+
+    detail = client.get(url)
+    assert detail.status_code == 200, detail.get_data(as_text=True)
+    form = detail.get_json()["form"]
+    assert [q["id"] for q in form["questions"]] == [choice["id"], essay["id"]]
+
+    invalid = client.post(
+        f"{url}/form-submissions",
+        json={"answers": [{"question_id": choice["id"], "selected_option_id": 0}]},
+        headers=headers,
+    )
+    assert invalid.status_code == 422
+    assert invalid.get_json()["question_id"] == choice["id"]
+
+    misses = form_cache.misses
+    resp = client.post(
+        f"{url}/form-submissions",
+        json={
+            "answers": [
+                {"question_id": choice["id"], "selected_option_id": right},
+                {"question_id": essay["id"], "answer_text": "Resposta"},
+            ]
+        },
+        headers=headers,
+    )
+    assert resp.status_code == 200, resp.get_data(as_text=True)
+    body = resp.get_json()
+    assert body["score"] == 100.0 and body["max_points"] == 1.0
+    assert body["requires_manual_review"] is True and body["passed"] is None
+    assert form_cache.misses == misses
+
+    answers = (
+        db_session.query(FormAnswer)
+        .filter(FormAnswer.submission_id == body["submission_id"])
+        .order_by(FormAnswer.question_id)
+        .all()
+    )
+    assert [(a.question_id, a.selected_option_id, a.answer_text) for a in answers] == [
+        (choice["id"], right, None),
+        (essay["id"], None, "Resposta"),
+    ]
@@ -0,0 +1,130 @@
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+from app.core.settings import settings
+from app.models.form_submissions import FormSubmission
+from app.models.forms import Form
+from app.services.form_submissions import process_queue_batch
+from tests.test_me import register_and_login
+
+
+def test_queued_submission_is_graded_by_the_worker(
+    client, db_session, monkeypatch, trail_repo, create_trail
+):
+    monkeypatch.setattr(settings, "form_submission_queue_enabled", True)
+    trail = create_trail()
+    quiz = trail_repo.get_trail_builder_payload(trail.id)["sections"][0]["items"][2]
+    choice, essay = quiz["form"]["questions"]
+    wrong = next(o["id"] for o in choice["options"] if not o["is_correct"])
+    login = register_and_login(client, db_session)
+    headers = {"X-CSRF-Token": login.headers["X-CSRF-Token"]}
+    url = f"/trails/{trail.id}/items/{quiz['id']}/form-submissions"
+
+    # Validation still happens up front.
+    rejected = client.post(
+        url,
+        json={"answers": [{"question_id": choice["id"], "selected_option_id": 0}]},
+        headers=headers,
+    )
+    assert rejected.status_code == 422
+
+    accepted = client.post(
+        url,
+        json={
+            "answers": [
+                {"question_id": choice["id"], "selected_option_id": wrong},
+                {"question_id": essay["id"], "answer_text": "Resposta"},
+            ]
+        },
+        headers=headers,
+    )
+    assert accepted.status_code == 202, accepted.get_data(as_text=True)
+    poll_url = accepted.get_json()["poll_url"]
+    assert client.get(poll_url).status_code == 202
+
+    assert process_queue_batch(db_session, batch_size=10) == 1
+    assert process_queue_batch(db_session, batch_size=10) == 0
+
+    result = client.get(f"{poll_url}?wait=1")
+    assert result.status_code == 200, result.get_data(as_text=True)
+    body = result.get_json()
+    assert body["submission_id"] and body["score"] == 0.0
+    assert body["requires_manual_review"] is True
+    assert [a["is_correct"] for a in body["answers"]] == [False, None]
+    assert client.get(f"{url}/{'0' * 32}").status_code == 404
+
+
+def test_long_poll_sees_a_result_committed_by_another_session(
+    client, db_session, db_connection, monkeypatch, trail_repo, create_trail
+):
+    monkeypatch.setattr(settings, "form_submission_queue_enabled", True)
+    trail = create_trail()
+    quiz = trail_repo.get_trail_builder_payload(trail.id)["sections"][0]["items"][2]
+    choice, essay = quiz["form"]["questions"]
+    login = register_and_login(client, db_session)
+    accepted = client.post(
+        f"/trails/{trail.id}/items/{quiz['id']}/form-submissions",
+        json={
+            "answers": [
+                {
+                    "question_id": choice["id"],
+                    "selected_option_id": choice["options"][0]["id"],
+                },
+                {"question_id": essay["id"], "answer_text": "Resposta"},
+            ]
+        },
+        headers={"X-CSRF-Token": login.headers["X-CSRF-Token"]},
+    )
+    assert accepted.status_code == 202, accepted.get_data(as_text=True)
+
+    # The worker runs in its own session while the poll sleeps.
+    worker = sessionmaker(bind=db_connection, expire_on_commit=False)()
+    sleeps = []
+
+    def run_worker(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 1:
+            assert process_queue_batch(worker, batch_size=10) == 1
+
+    monkeypatch.setattr(time, "sleep", run_worker)
+    try:
+        result = client.get(f"{accepted.get_json()['poll_url']}?wait=5")
+    finally:
+        worker.close()
+    assert result.status_code == 200, result.get_data(as_text=True)
+    assert result.get_json()["submission_id"]
+    assert len(sleeps) == 1
+
+
+def test_form_edited_after_enqueue_fails_the_ticket(
+    client, db_session, monkeypatch, trail_repo, create_trail
+):
+    monkeypatch.setattr(settings, "form_submission_queue_enabled", True)
+    trail = create_trail()
+    quiz = trail_repo.get_trail_builder_payload(trail.id)["sections"][0]["items"][2]
+    choice, essay = quiz["form"]["questions"]
+    login = register_and_login(client, db_session)
+    accepted = client.post(
+        f"/trails/{trail.id}/items/{quiz['id']}/form-submissions",
+        json={
+            "answers": [
+                {
+                    "question_id": choice["id"],
+                    "selected_option_id": choice["options"][0]["id"],
+                },
+                {"question_id": essay["id"], "answer_text": "Resposta"},
+            ]
+        },
+        headers={"X-CSRF-Token": login.headers["X-CSRF-Token"]},
+    )
+    assert accepted.status_code == 202, accepted.get_data(as_text=True)
+
+    form = db_session.get(Form, quiz["form"]["id"])
+    form.version += 1
+    db_session.commit()
+
+    assert process_queue_batch(db_session, batch_size=10) == 1
+    result = client.get(accepted.get_json()["poll_url"])
+    assert result.status_code == 409
+    assert db_session.query(FormSubmission).count() == 0
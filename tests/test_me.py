@@ -31,6 +31,26 @@ def register_and_login(
     return login_resp
 
 
+def register_admin(client, db_session):  # noqa: ARG001 - fixture triggers DB seeding
+    """Register an Admin; the client keeps its session cookie."""
+    _ = db_session
+    register_resp = client.post(
+        "/auth/register",
+        json={
+            "email": unique_email("admin"),
+            "password": "TestPass!123",
+            "name_for_certificate": "Admin",
+            "sex": "NotSpecified",
+            "color": "NS",
+            "birthday": "1990-01-01",
+            "username": f"admin_{uuid.uuid4().hex[:6]}",
+            "role": "Admin",
+        },
+    )
+    assert register_resp.status_code == 200, register_resp.get_data(as_text=True)
+    return register_resp
+
+
 def test_me_requires_authentication(client):
     resp = client.get("/me")
     assert resp.status_code == 401
@@ -0,0 +1,101 @@
+import json
+
+from sqlalchemy import create_engine, inspect
+
+from app.core.migrations import discover, migrate, split_statements, status
+from app.scripts.index_advisor import (
+    existing_indexes_from_sql,
+    load_slow_query_log,
+    suggest_indexes,
+)
+
+
+def test_migrations_apply_in_order_and_are_recorded_once(tmp_path):
+    (tmp_path / "0001_create.sql").write_text(
+        "CREATE TABLE sample (id INTEGER PRIMARY KEY, label TEXT DEFAULT 'a;b');\n"
+        "-- trailing comment; ignored\n"
+    )
+    (tmp_path / "0002_index.sql").write_text(
+        "-- migrate:no-transaction\nCREATE INDEX IF NOT EXISTS ix_sample_label"
+        " ON sample (label);\n"
+    )
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+
+    assert [m.version for m in migrate(engine, directory=tmp_path, target="0001")] == [
+        "0001"
+    ]
+    applied = migrate(engine, directory=tmp_path, log=lambda _: None)
+    assert [m.version for m in applied] == ["0002"]
+    assert migrate(engine, directory=tmp_path) == []
+    assert "ix_sample_label" in {
+        ix["name"] for ix in inspect(engine).get_indexes("sample")
+    }
+
+    (tmp_path / "0001_create.sql").write_text("CREATE TABLE changed (id INTEGER);")
+    mismatched = [
+        s.migration.version for s in status(engine, tmp_path) if s.checksum_mismatch
+    ]
+    assert mismatched == ["0001"]
+
+
+def test_splitter_keeps_quoted_and_dollar_bodies():
+    sql = "SELECT 'x;y';\nDO $$ BEGIN PERFORM 1; END $$;\nSELECT 2 -- done;\n"
+    assert split_statements(sql) == [
+        "SELECT 'x;y'",
+        "DO $$ BEGIN PERFORM 1; END $$",
+        "SELECT 2",
+    ]
+
+
+def test_splitter_drops_block_comments():
+    sql = "/* header; not a statement */\nSELECT/* a; /* nested; */ b; */1;\nSELECT 2;"
+    assert split_statements(sql) == ["SELECT 1", "SELECT 2"]
+
+
+def test_shipped_migrations_are_concurrent_index_builds():
+    migrations = discover()
+    assert migrations and migrations[0].version == "0001"
+    assert not migrations[0].transactional
+    for statement in split_statements(migrations[0].sql):
+        assert statement.startswith("CREATE INDEX CONCURRENTLY IF NOT EXISTS")
+
+
+def test_index_advisor_suggests_uncovered_filters(tmp_path):
+    log = tmp_path / "slow.jsonl"
+    statement = (
+        "SELECT form_submissions.id FROM form_submissions"
+        " WHERE form_submissions.form_id = %(form_id_1)s"
+        " AND form_submissions.user_id = %(user_id_1)s"
+        " ORDER BY form_submissions.submitted_at DESC"
+    )
+    plan = [{"Plan": {"Node Type": "Seq Scan", "Relation Name": "form_submissions"}}]
+    log.write_text(
+        "\n".join(
+            json.dumps(
+                {
+                    "fingerprint": "abc",
+                    "statement": statement,
+                    "duration_ms": duration,
+                    "origin": "FormsRepository.latest",
+                    "explain": plan,
+                }
+            )
+            for duration in (120.0, 80.0)
+        )
+    )
+    groups = load_slow_query_log([log])
+    assert groups[0].calls == 2 and groups[0].total_ms == 200.0
+
+    existing = existing_indexes_from_sql(
+        "CREATE INDEX idx_fs_form ON public.form_submissions (form_id);"
+    )
+    [suggestion] = suggest_indexes(groups, existing)
+    assert suggestion.columns == ("form_id", "user_id", "submitted_at")
+    assert suggestion.seq_scan
+    assert suggestion.origins == {"FormsRepository.latest"}
+
+    covered = existing_indexes_from_sql(
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_fs ON public.form_submissions"
+        " (user_id, form_id, submitted_at DESC);"
+    )
+    assert suggest_indexes(groups, covered) == []
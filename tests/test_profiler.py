@@ -0,0 +1,88 @@
+import time
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, text
+
+from app.services import profiler
+from app.services.profiler import ProfileCapture, ProfileStore
+from tests.test_me import register_admin
+
+
+@pytest.fixture(autouse=True)
+def _clear_store():
+    profiler.store.clear()
+    yield
+    profiler.store.clear()
+
+
+def _capture(endpoint: str, duration_ms: float) -> ProfileCapture:
+    return ProfileCapture(
+        id=uuid.uuid4().hex,
+        endpoint=endpoint,
+        method="GET",
+        path="/x",
+        trigger="sampled",
+        started_at=datetime.now(timezone.utc),
+        duration_ms=duration_ms,
+    )
+
+
+def test_store_is_bounded_per_endpoint_and_sorted_by_duration():
+    store = ProfileStore(max_per_endpoint=2)
+    first = _capture("GET /a", 10)
+    store.add(first)
+    store.add(_capture("GET /a", 30))
+    store.add(_capture("GET /a", 20))
+    store.add(_capture("GET /b", 5))
+
+    assert store.get(first.id) is None
+    assert [c.duration_ms for c in store.slowest()] == [30, 20, 5]
+    assert [c.duration_ms for c in store.slowest(endpoint="GET /b")] == [5]
+
+
+def test_sampled_request_records_stacks_and_sql():
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    app = Flask(__name__)
+    profiler.init_profiler(app, enabled=True, sample_rate=1.0)
+
+    def slow_helper():
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            pass
+
+    @app.get("/slow/<int:value>")
+    def slow(value: int):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT :value"), {"value": value}).scalar()
+        slow_helper()
+        return {"ok": True}
+
+    response = app.test_client().get("/slow/7")
+    assert response.status_code == 200
+
+    [capture] = profiler.store.slowest()
+    assert capture.endpoint == "GET /slow/<int:value>"
+    assert capture.status_code == 200
+    assert capture.samples > 0
+    assert any("slow_helper" in stack for stack in capture.stacks)
+    assert any("SELECT ?" in item.statement for item in capture.sql)
+
+
+def test_admin_profiles_endpoints(client, db_session):
+    register_admin(client, db_session)
+
+    capture = _capture("GET /trails/", 42.0)
+    capture.stacks["app/main.py:handler;app/x.py:query"] = 3
+    profiler.store.add(capture)
+
+    listing = client.get("/admin/profiles")
+    assert listing.status_code == 200
+    assert [p["id"] for p in listing.get_json()["profiles"]] == [capture.id]
+
+    collapsed = client.get(f"/admin/profiles/{capture.id}?format=collapsed")
+    assert collapsed.get_data(as_text=True) == "app/main.py:handler;app/x.py:query 3"
+
+    assert client.get("/admin/profiles/missing").status_code == 404
@@ -0,0 +1,83 @@
+from datetime import datetime, timezone
+
+from app.models.lk_enrollment_status import LkEnrollmentStatus
+from app.models.lk_progress_status import LkProgressStatus
+from app.models.trail_certificates import TrailCertificates
+from app.models.user_item_progress import UserItemProgress
+from app.models.user_trails import UserTrails
+from app.services.progress_recompute import recompute_trail
+
+
+def test_recompute_trail_updates_in_chunks_and_resumes(
+    db_session, trail_repo, create_trail
+):
+    db_session.add_all(
+        [
+            LkEnrollmentStatus(code=code)
+            for code in ("ENROLLED", "IN_PROGRESS", "COMPLETED")
+        ]
+    )
+    db_session.add(LkProgressStatus(code="COMPLETED"))
+    db_session.commit()
+    statuses = {row.code: row.id for row in db_session.query(LkEnrollmentStatus)}
+    item_completed = db_session.query(LkProgressStatus.id).scalar()
+
+    trail = create_trail()
+    item_ids = [
+        item["id"]
+        for item in trail_repo.get_trail_builder_payload(trail.id)["sections"][0][
+            "items"
+        ]
+    ]
+    # User 1 finished every item, user 2 one of them, user 3 none.
+    for user_id, done in ((1, 3), (2, 1), (3, 0)):
+        db_session.add(
+            UserTrails(
+                user_id=user_id,
+                trail_id=trail.id,
+                status_id=statuses["ENROLLED"],
+                progress_percent=0,
+                started_at=datetime.now(timezone.utc),
+            )
+        )
+        db_session.add_all(
+            [
+                UserItemProgress(
+                    user_id=user_id, trail_item_id=item_id, status_id=item_completed
+                )
+                for item_id in item_ids[:done]
+            ]
+        )
+    db_session.commit()
+    enrollment_ids = [row.id for row in db_session.query(UserTrails.id).order_by("id")]
+
+    checkpoints: list[int] = []
+    stats = recompute_trail(
+        db_session,
+        trail.id,
+        chunk_size=1,
+        on_chunk=lambda last_id, _: checkpoints.append(last_id),
+    )
+    assert checkpoints == enrollment_ids
+    assert stats.as_dict() == {
+        "enrollments": 3,
+        "updated": 2,
+        "completed": 1,
+        "certificates": 1,
+    }
+    db_session.expire_all()
+    rows = {row.user_id: row for row in db_session.query(UserTrails)}
+    assert rows[1].status_id == statuses["COMPLETED"]
+    assert float(rows[1].progress_percent) == 100.0
+    assert rows[1].completed_at is not None
+    assert rows[2].status_id == statuses["IN_PROGRESS"]
+    assert float(rows[2].progress_percent) == 33.33
+    assert rows[3].status_id == statuses["ENROLLED"]
+    [certificate] = db_session.query(TrailCertificates).all()
+    assert certificate.user_id == 1
+
+    # Resuming after the first enrollment skips it; a full rerun is a no-op.
+    resumed = recompute_trail(db_session, trail.id, after_id=enrollment_ids[0])
+    assert resumed.enrollments == 2 and resumed.updated == 0
+    again = recompute_trail(db_session, trail.id)
+    assert (again.updated, again.certificates) == (0, 0)
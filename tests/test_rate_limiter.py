@@ -25,3 +25,77 @@ def test_fixed_window_rate_limiter_blocks_after_threshold(monkeypatch):
     allowed, retry_after = limiter.register_attempt("user")
     assert allowed is True
     assert retry_after is None
+
+
+def test_gcra_limiter_drops_idle_keys_and_caps_memory(monkeypatch):
+    current_time = {"value": 1000.0}
+    monkeypatch.setattr(
+        rate_limiter_module.time, "monotonic", lambda: current_time["value"]
+    )
+
+    limiter = rate_limiter_module.GcraRateLimiter(
+        max_attempts=2, window_seconds=60, max_keys=4, shards=1
+    )
+    for index in range(10):
+        assert limiter.register_attempt(f"ip-{index}")[0] is True
+    assert len(limiter) == 4
+    assert limiter.evicted == 6
+
+    # Once a key's allowance is fully restored it carries no state.
+    current_time["value"] += 31
+    assert limiter.register_attempt("fresh")[0] is True
+    assert len(limiter) == 1
+
+
+def test_redis_gcra_checks_all_scopes_in_one_call():
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeRedis()
+    limiter = rate_limiter_module.RedisGcraRateLimiter(
+        client, max_attempts=2, window_seconds=60
+    )
+    RateLimit = rate_limiter_module.RateLimit
+
+    def attempt(account: str):
+        return limiter.register_attempts(
+            [RateLimit(f"login:{account}", 2, 60), RateLimit("login:ip", 3, 60)]
+        )[0]
+
+    assert attempt("a") is True
+    assert attempt("a") is True
+    # Denied by the account scope: the shared IP scope is not consumed.
+    assert attempt("a") is False
+    assert attempt("b") is True
+    assert attempt("c") is False
+
+    # Fixed-size state: one string with a TTL per scope.
+    assert client.type("rl:auth:login:ip") == b"string"
+    assert 0 < client.pttl("rl:auth:login:ip") <= 60_000
+
+
+def test_fallback_limiter_opens_breaker_on_redis_timeouts():
+    from redis.exceptions import TimeoutError as RedisTimeoutError
+
+    calls = {"redis": 0}
+
+    class _SlowRedis:
+        def register_script(self, _script):
+            def _run(**_kwargs):
+                calls["redis"] += 1
+                raise RedisTimeoutError("timed out")
+
+            return _run
+
+    limiter = rate_limiter_module.FallbackRateLimiter(
+        rate_limiter_module.RedisGcraRateLimiter(
+            _SlowRedis(), max_attempts=2, window_seconds=60
+        ),
+        rate_limiter_module.GcraRateLimiter(max_attempts=2, window_seconds=60),
+        rate_limiter_module.CircuitBreaker(failure_threshold=2, reset_seconds=30),
+    )
+
+    assert limiter.register_attempt("user")[0] is True
+    assert limiter.register_attempt("user")[0] is True
+    assert limiter.breaker.is_open
+    # While open, Redis is skipped and the local limiter still enforces limits.
+    assert limiter.register_attempt("user")[0] is False
+    assert calls["redis"] == 2
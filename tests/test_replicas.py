@@ -0,0 +1,84 @@
+import time
+
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, insert, select
+from sqlalchemy.pool import StaticPool
+
+from app.core import db as db_module
+from app.core.replicas import (
+    REPLICA_ALLOWED,
+    ReplicaSet,
+    RoutingSession,
+    use_replica,
+)
+from app.main import app
+
+metadata = MetaData()
+marker = Table("replica_marker", metadata, Column("value", Integer))
+
+
+def _engine(value: int):
+    eng = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    metadata.create_all(eng)
+    with eng.begin() as conn:
+        conn.execute(insert(marker).values(value=value))
+    return eng
+
+
+class _FakeReplicaSet(ReplicaSet):
+    def __init__(self, engines, lags):
+        super().__init__(engines, max_lag_seconds=5.0, check_interval_seconds=60.0)
+        self.lags = dict(zip(engines, lags))
+
+    def measure_lag(self, replica):
+        lag = self.lags[replica.engine]
+        if isinstance(lag, Exception):
+            raise lag
+        return lag
+
+
+def _read(session) -> int:
+    return session.execute(select(marker.c.value)).scalar()
+
+
+def test_reads_marked_read_only_go_to_a_replica_until_the_session_writes():
+    primary, replica = _engine(1), _engine(2)
+    session = RoutingSession(bind=primary, replicas=ReplicaSet([replica]))
+    session.info[REPLICA_ALLOWED] = True
+
+    assert _read(session) == 1
+    with use_replica(session):
+        assert _read(session) == 2
+
+    session.execute(insert(marker).values(value=3))
+    with use_replica(session):
+        assert _read(session) == 1
+    session.close()
+
+    sticky = RoutingSession(bind=primary, replicas=ReplicaSet([replica]))
+    sticky.info[REPLICA_ALLOWED] = False
+    with use_replica(sticky):
+        assert _read(sticky) == 1
+    sticky.close()
+
+
+def test_replica_set_round_robins_and_skips_lagging_or_failing_replicas():
+    a, b, c = _engine(1), _engine(2), _engine(3)
+    replicas = _FakeReplicaSet([a, b, c], [0.0, 30.0, 0.5])
+    assert [replicas.pick() for _ in range(4)] == [a, c, a, c]
+
+    down = _FakeReplicaSet([a], [ConnectionError("down")])
+    assert down.pick() is None
+    assert down.replicas[0].healthy is False
+
+
+def test_recent_writers_stay_on_the_primary(monkeypatch):
+    monkeypatch.setattr(db_module, "replicas", ReplicaSet([_engine(2)]))
+    cookie = f"{db_module.PRIMARY_UNTIL_COOKIE}={time.time() + 30:.0f}"
+    with app.test_request_context("/", headers={"Cookie": cookie}):
+        assert db_module._replicas_allowed() is False
+    with app.test_request_context("/"):
+        assert db_module._replicas_allowed() is True
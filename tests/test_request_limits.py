@@ -0,0 +1,75 @@
+import pytest
+
+from app.core import db as db_module
+from app.core.settings import settings
+from app.services.request_limits import shed_probability
+from tests.test_me import register_and_login
+
+
+def test_read_route_is_limited_per_user(client, db_session, monkeypatch):
+    monkeypatch.setattr(settings, "api_rate_limit_read_max_attempts", 2)
+    register_and_login(client, db_session)
+
+    for _ in range(2):
+        assert client.get("/user-trails/me/overview").status_code == 200
+    limited = client.get("/user-trails/me/overview")
+    assert limited.status_code == 429
+    assert int(limited.headers["Retry-After"]) >= 1
+
+    # A different user has a budget of their own.
+    client.delete_cookie(settings.COOKIE_NAME)
+    register_and_login(client, db_session)
+    assert client.get("/user-trails/me/overview").status_code == 200
+
+
+def test_anonymous_callers_are_limited_by_ip(client, db_session, monkeypatch):
+    monkeypatch.setattr(settings, "api_rate_limit_read_max_attempts", 1)
+
+    first = client.get(
+        "/user-trails/me/overview", headers={"X-Forwarded-For": "203.0.113.7"}
+    )
+    assert first.status_code == 401
+    second = client.get(
+        "/user-trails/me/overview", headers={"X-Forwarded-For": "203.0.113.7"}
+    )
+    assert second.status_code == 429
+    other = client.get(
+        "/user-trails/me/overview", headers={"X-Forwarded-For": "203.0.113.8"}
+    )
+    assert other.status_code == 401
+
+
+def test_shed_probability_grows_with_the_excess():
+    assert shed_probability(50.0, 100.0) == 0.0
+    assert shed_probability(150.0, 100.0) == pytest.approx(0.5)
+    assert shed_probability(400.0, 100.0) == 1.0
+
+
+def test_load_shedding_returns_503_while_pool_wait_is_high(
+    client, db_session, monkeypatch
+):
+    monkeypatch.setattr(settings, "load_shed_pool_wait_ms", 100.0)
+    monitor = db_module.PoolWaitMonitor(half_life=60.0, alpha=1.0)
+    monkeypatch.setattr("app.services.request_limits.pool_wait", monitor)
+
+    assert client.get("/user-trails/me/overview").status_code == 401
+
+    monitor.record(0.5)
+    shed = client.get("/user-trails/me/overview")
+    assert shed.status_code == 503
+    assert shed.headers["Retry-After"] == "60"
+    assert client.get("/healthz").status_code == 200
+
+    monitor.reset()
+    assert client.get("/user-trails/me/overview").status_code == 401
+
+
+def test_pool_wait_monitor_decays_between_samples(monkeypatch):
+    now = {"value": 1000.0}
+    monkeypatch.setattr(db_module.time, "monotonic", lambda: now["value"])
+    monitor = db_module.PoolWaitMonitor(half_life=2.0, alpha=0.5)
+
+    monitor.record(0.4)
+    assert monitor.wait_ms == pytest.approx(200.0)
+    now["value"] += 2.0
+    assert monitor.wait_ms == pytest.approx(100.0)
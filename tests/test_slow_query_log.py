@@ -0,0 +1,105 @@
+import json
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app import main as main_module
+from app.core.replicas import ReplicaSet
+from app.core.settings import settings
+from app.services.slow_query_log import (
+    fingerprint,
+    install_slow_query_log,
+    uninstall_slow_query_log,
+)
+
+
+class ProbeRepository:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def fetch(self, value: int):
+        return self.conn.execute(text("SELECT :value"), {"value": value}).scalar()
+
+
+def test_slow_queries_are_logged_with_origin(tmp_path):
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    log_path = tmp_path / "slow.jsonl"
+    recorder = install_slow_query_log(
+        engine, threshold_ms=0, log_path=str(log_path), explain=True
+    )
+    try:
+        assert recorder is not None
+        # EXPLAIN capture is Postgres-only.
+        assert recorder.explain is False
+        with engine.connect() as conn:
+            assert ProbeRepository(conn).fetch(3) == 3
+    finally:
+        uninstall_slow_query_log(engine)
+
+    records = [json.loads(line) for line in log_path.read_text().splitlines()]
+    probe = next(r for r in records if r["statement"] == "SELECT ?")
+    assert probe["origin"] == "ProbeRepository.fetch"
+    assert probe["params"] == "(3,)"
+    assert "explain" not in probe
+
+
+def test_threshold_filters_fast_queries(tmp_path):
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    log_path = tmp_path / "slow.jsonl"
+    install_slow_query_log(engine, threshold_ms=10_000, log_path=str(log_path))
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    finally:
+        uninstall_slow_query_log(engine)
+    assert log_path.read_text() == ""
+
+
+def test_failed_statements_leave_no_timing_state(tmp_path):
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    log_path = tmp_path / "slow.jsonl"
+    install_slow_query_log(engine, threshold_ms=0, log_path=str(log_path))
+    try:
+        with engine.connect() as conn:
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    conn.execute(text("SELECT * FROM missing_table"))
+            conn.execute(text("SELECT 42"))
+            leftovers = [key for key in conn.info if "start" in key]
+    finally:
+        uninstall_slow_query_log(engine)
+
+    assert leftovers == []
+    statements = [
+        json.loads(line)["statement"] for line in log_path.read_text().splitlines()
+    ]
+    assert "SELECT 42" in statements
+    assert "SELECT * FROM missing_table" not in statements
+
+
+def test_fingerprint_ignores_whitespace_and_in_list_size():
+    first = fingerprint("SELECT * FROM t WHERE id IN (%(id_1)s, %(id_2)s)")
+    second = fingerprint(
+        "SELECT *\n  FROM t WHERE id IN (%(id_1)s, %(id_2)s, %(id_3)s)"
+    )
+    assert first == second
+
+
+def test_replica_engines_get_the_slow_query_log(tmp_path, monkeypatch):
+    replica = create_engine("sqlite+pysqlite:///:memory:")
+    log_path = tmp_path / "slow.jsonl"
+    monkeypatch.setattr(main_module, "engine", create_engine("sqlite://"))
+    monkeypatch.setattr(main_module, "replicas", ReplicaSet([replica]))
+    monkeypatch.setattr(settings, "slow_query_threshold_ms", 0)
+    monkeypatch.setattr(settings, "slow_query_log_path", str(log_path))
+    main_module.install_slow_query_logs()
+    try:
+        with replica.connect() as conn:
+            conn.execute(text("SELECT 42"))
+    finally:
+        uninstall_slow_query_log(replica)
+        uninstall_slow_query_log(main_module.engine)
+
+    records = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert any(r["statement"] == "SELECT 42" for r in records)
@@ -0,0 +1,120 @@
+import json
+
+from app.models.trail_items import TrailItems
+from app.services.trail_archive import (
+    UNSECTIONED_TITLE,
+    TrailImporter,
+    archive_trail_payload,
+    iter_export,
+)
+
+
+def _strip_ids(payload: dict) -> dict:
+    if isinstance(payload, dict):
+        return {k: _strip_ids(v) for k, v in payload.items() if k != "id"}
+    if isinstance(payload, list):
+        return [_strip_ids(v) for v in payload]
+    return payload
+
+
+def test_export_then_import_round_trips_the_tree(db_session, trail_repo, create_trail):
+    source = create_trail()
+
+    lines = list(iter_export(db_session, page_size=1))
+    header, record = (json.loads(line) for line in lines)
+    assert header["format"] == "rota-trails"
+    assert record["source_id"] == source.id
+
+    # Item URLs are globally unique, so import the copy with fresh ones.
+    for section in record["sections"]:
+        for item in section["items"]:
+            item["url"] += "?copy"
+    importer = TrailImporter(db_session, validate=archive_trail_payload)
+    report = importer.run([lines[0], json.dumps(record)])
+
+    assert report.imported == 1 and report.failed == 0
+    [copy_id] = report.trail_ids
+    original = trail_repo.get_trail_builder_payload(source.id)
+    copied = trail_repo.get_trail_builder_payload(copy_id)
+    for section in copied["sections"]:
+        for item in section["items"]:
+            item["url"] = item["url"].removesuffix("?copy")
+    assert _strip_ids(copied["sections"]) == _strip_ids(original["sections"])
+
+
+def test_import_reports_bad_lines_and_keeps_the_rest(db_session, trail_repo):
+    good = {
+        "name": "Nova",
+        "thumbnail_url": "https://example.com/n.png",
+        "sections": [
+            {"title": "S", "items": [{"title": "V", "type": "VIDEO", "url": "u/1"}]}
+        ],
+    }
+    clashing_order = dict(
+        good,
+        name="Ordem",
+        sections=[
+            {"title": "A", "order_index": 0, "items": []},
+            {"title": "B", "order_index": 0, "items": []},
+        ],
+    )
+    unknown_type = {
+        "name": "Tipo",
+        "thumbnail_url": "https://example.com/t.png",
+        "sections": [
+            {"title": "S", "items": [{"title": "X", "type": "AUDIO", "url": "u/2"}]}
+        ],
+    }
+    lines = [
+        json.dumps(good),
+        "{not json",
+        json.dumps({"name": "", "thumbnail_url": "x"}),
+        json.dumps(clashing_order),
+        json.dumps(unknown_type),
+    ]
+
+    report = TrailImporter(
+        db_session, validate=archive_trail_payload, batch_size=10
+    ).run(lines)
+
+    assert report.imported == 1
+    assert [error.line for error in report.errors] == [2, 3, 4, 5]
+    assert trail_repo.get_trail(report.trail_ids[0]).name == "Nova"
+
+
+def test_export_keeps_items_without_a_section(db_session, trail_repo, create_trail):
+    source = create_trail()
+    db_session.add(
+        TrailItems(
+            trail_id=source.id,
+            title="Antigo",
+            url="https://v/0",
+            order_index=7,
+            legacy_type="VIDEO",
+        )
+    )
+    db_session.commit()
+
+    header, line = iter_export(db_session, trail_ids=[source.id])
+    record = json.loads(line)
+    assert [section["title"] for section in record["sections"]] == [
+        "Seção 1",
+        "Seção 2",
+        UNSECTIONED_TITLE,
+    ]
+    assert record["sections"][-1]["order_index"] == 2
+    assert [item["title"] for item in record["sections"][-1]["items"]] == ["Antigo"]
+
+    for section in record["sections"]:
+        for item in section["items"]:
+            item["url"] += "?copy"
+    report = TrailImporter(db_session, validate=archive_trail_payload).run(
+        [header, json.dumps(record)]
+    )
+    assert report.imported == 1, report.as_dict()
+    copied = trail_repo.get_trail_builder_payload(report.trail_ids[0])
+    last = copied["sections"][-1]
+    assert last["title"] == UNSECTIONED_TITLE
+    assert [(item["title"], item["url"]) for item in last["items"]] == [
+        ("Antigo", "https://v/0?copy")
+    ]
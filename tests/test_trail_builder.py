@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import pytest
+
+from app.models.trail_items import TrailItems
+from app.models.trail_sections import TrailSections
+from app.models.trails import Trails
+from app.repositories.UserTrailsRepository import UserTrailsRepository
+from tests.test_me import register_admin
+
+
+def test_update_keeps_ids_and_reports_only_changes(
+    trail_repo, create_trail, update_trail
+):
+    trail = create_trail()
+    payload = trail_repo.get_trail_builder_payload(trail.id)
+    first, second = payload["sections"]
+    v1, v2, quiz = first["items"]
+
+    # Swap the sections, swap V1/V2 (and their URLs), move the quiz to the other
+    # section, drop the essay question and add a new video.
+    first["order_index"], second["order_index"] = 1, 0
+    v1["order_index"], v2["order_index"] = 1, 0
+    v1["url"], v2["url"] = v2["url"], v1["url"]
+    quiz["order_index"] = 0
+    quiz["form"]["questions"] = quiz["form"]["questions"][:1]
+    quiz["form"]["questions"][0]["options"].append(
+        {"text": "C", "is_correct": False, "order_index": 2}
+    )
+    first["items"] = [v1, v2, {"title": "V3", "type": "VIDEO", "url": "https://v/3"}]
+    first["items"][2]["order_index"] = 2
+    second["items"] = [quiz]
+
+    trail, changes = update_trail(trail.id, payload["sections"])
+
+    assert changes.trail_updated is False
+    assert sorted(changes.sections.updated) == sorted([first["id"], second["id"]])
+    assert not changes.sections.created and not changes.sections.deleted
+    assert sorted(changes.items.updated) == sorted([v1["id"], v2["id"], quiz["id"]])
+    assert len(changes.items.created) == 1
+    assert changes.forms.updated == [] and changes.forms.deleted == []
+    assert len(changes.questions.deleted) == 1
+    assert len(changes.options.created) == 1
+    assert changes.progress_affected is True
+
+    stored = trail_repo.get_trail_builder_payload(trail.id)
+    assert [s["id"] for s in stored["sections"]] == [second["id"], first["id"]]
+    assert [i["id"] for i in stored["sections"][0]["items"]] == [quiz["id"]]
+    items = stored["sections"][1]["items"]
+    assert [i["id"] for i in items] == [v2["id"], v1["id"], changes.items.created[0]]
+    assert [i["url"] for i in items] == ["https://v/1", "https://v/2", "https://v/3"]
+    form = stored["sections"][0]["items"][0]["form"]
+    assert form["id"] == quiz["form"]["id"]
+    assert [o["text"] for o in form["questions"][0]["options"]] == ["A", "B", "C"]
+
+
+def test_unchanged_payload_writes_nothing(trail_repo, create_trail, update_trail):
+    trail = create_trail()
+    payload = trail_repo.get_trail_builder_payload(trail.id)
+
+    _, changes = update_trail(trail.id, payload["sections"])
+
+    assert not changes.changed
+    assert changes.affected_item_ids == set()
+
+
+def _counts(session, trail_id: int):
+    session.expire_all()
+    trail = session.get(Trails, trail_id)
+    sections = (
+        session.query(TrailSections.item_count)
+        .filter(TrailSections.trail_id == trail_id)
+        .order_by(TrailSections.order_index)
+        .all()
+    )
+    return (
+        trail.section_count,
+        trail.item_count,
+        trail.required_item_count,
+        [count for (count,) in sections],
+    )
+
+
+def test_builder_maintains_item_counts(
+    db_session, trail_repo, create_trail, update_trail
+):
+    trail = create_trail()
+    assert _counts(db_session, trail.id) == (2, 3, 0, [3, 0])
+
+    payload = trail_repo.get_trail_builder_payload(trail.id)
+    first, second = payload["sections"]
+    v1, _, quiz = first["items"]
+    v1["requires_completion"] = True
+    first["items"] = [v1]
+    second["items"] = [quiz]
+    update_trail(trail.id, payload["sections"])
+    assert _counts(db_session, trail.id) == (2, 2, 1, [1, 1])
+
+    update_trail(trail.id, [])
+    assert _counts(db_session, trail.id) == (0, 0, 0, [])
+
+
+def test_save_keeps_legacy_items_without_a_section(
+    db_session, trail_repo, create_trail, update_trail
+):
+    trail = create_trail()
+    legacy = TrailItems(
+        trail_id=trail.id, title="Antigo", url="https://v/0", legacy_type="VIDEO"
+    )
+    db_session.add(legacy)
+    db_session.commit()
+    payload = trail_repo.get_trail_builder_payload(trail.id)
+    payload["sections"][0]["items"][0]["title"] = "V1 editado"
+
+    _, changes = update_trail(trail.id, payload["sections"])
+
+    assert legacy.id not in changes.items.deleted
+    db_session.expire_all()
+    assert db_session.get(TrailItems, legacy.id) is not None
+    assert _counts(db_session, trail.id) == (2, 4, 0, [3, 0])
+
+
+def test_unmaintained_counters_fall_back_to_a_live_count(db_session):
+    trail = Trails(name="Manual", thumbnail_url="https://example.com/t.png")
+    db_session.add(trail)
+    db_session.flush()
+    section = TrailSections(trail_id=trail.id, title="Seção", order_index=0)
+    db_session.add(section)
+    db_session.flush()
+    db_session.add_all(
+        [
+            TrailItems(
+                trail_id=trail.id,
+                section_id=section.id,
+                url=f"https://v/{index}",
+                order_index=index,
+                legacy_type="VIDEO",
+            )
+            for index in range(2)
+        ]
+    )
+    db_session.commit()
+
+    repo = UserTrailsRepository(db_session)
+    assert _counts(db_session, trail.id) == (0, 0, 0, [0])
+    assert repo.count_items_in_trail(trail.id) == 2
+    assert repo._count_items_for_trails([trail.id]) == {trail.id: 2}
+    assert [s["total"] for s in repo.get_sections_progress(1, trail.id)] == [2]
+
+
+def test_foreign_ids_are_rejected(trail_repo, create_trail, update_trail):
+    trail = create_trail()
+    payload = trail_repo.get_trail_builder_payload(trail.id)
+    payload["sections"][0]["items"][0]["id"] = 999_999
+
+    with pytest.raises(ValueError):
+        update_trail(trail.id, payload["sections"])
+
+
+def _client_save_payload(trail: dict) -> dict:
+    """The body AdminPanel.tsx sends on save, built from what it loaded."""
+    return {
+        "name": trail["name"],
+        "thumbnail_url": trail["thumbnail_url"],
+        "author": trail["author"],
+        "description": trail["description"],
+        "sections": [
+            {
+                "id": section["id"],
+                "title": section["title"],
+                "order_index": section_index,
+                "items": [
+                    {
+                        "id": item["id"],
+                        "title": item["title"],
+                        "type": item["type"],
+                        "url": item["url"],
+                        "duration_seconds": item["duration_seconds"],
+                        "requires_completion": item["requires_completion"],
+                        "order_index": item_index,
+                        "form": item.get("form")
+                        and {
+                            "id": item["form"]["id"],
+                            "title": item["form"]["title"],
+                            "description": item["form"]["description"],
+                            "min_score_to_pass": item["form"]["min_score_to_pass"],
+                            "randomize_questions": item["form"]["randomize_questions"],
+                            "questions": [
+                                {
+                                    "id": question["id"],
+                                    "prompt": question["prompt"],
+                                    "type": question["type"],
+                                    "required": question["required"],
+                                    "points": question["points"],
+                                    "order_index": question_index,
+                                    "options": [
+                                        {
+                                            "id": option["id"],
+                                            "text": option["text"],
+                                            "is_correct": option["is_correct"],
+                                            "order_index": option_index,
+                                        }
+                                        for option_index, option in enumerate(
+                                            question["options"]
+                                        )
+                                    ],
+                                }
+                                for question_index, question in enumerate(
+                                    item["form"]["questions"]
+                                )
+                            ],
+                        },
+                    }
+                    for item_index, item in enumerate(section["items"])
+                ],
+            }
+            for section_index, section in enumerate(trail["sections"])
+        ],
+    }
+
+
+def test_admin_panel_save_round_trips_ids(client, db_session, trail_repo, create_trail):
+    trail = create_trail()
+    register = register_admin(client, db_session)
+    headers = {"X-CSRF-Token": register.headers["X-CSRF-Token"]}
+
+    loaded = client.get(f"/admin/trails/{trail.id}").get_json()["trail"]
+    body = _client_save_payload(loaded)
+    body["sections"][0]["items"][0]["title"] = "V1 editado"
+    saved = client.put(f"/admin/trails/{trail.id}", json=body, headers=headers)
+    assert saved.status_code == 200, saved.get_data(as_text=True)
+
+    changes = saved.get_json()["changes"]
+    assert changes["items"]["updated"] == [loaded["sections"][0]["items"][0]["id"]]
+    for kind in ("sections", "items", "forms", "questions", "options"):
+        assert changes[kind]["created"] == changes[kind]["deleted"] == []
+    assert _item_ids(trail_repo.get_trail_builder_payload(trail.id)) == _item_ids(
+        loaded
+    )
+
+
+def _item_ids(payload: dict) -> list[int]:
+    return [item["id"] for section in payload["sections"] for item in section["items"]]
@@ -0,0 +1,41 @@
+from app.models.lk_enrollment_status import LkEnrollmentStatus
+from app.models.user_overview_snapshots import UserOverviewSnapshot
+from tests.test_me import register_and_login
+
+
+def test_overview_is_served_from_snapshot_until_invalidated(
+    client, db_session, trail_repo, create_trail, update_trail
+):
+    db_session.add_all(
+        [LkEnrollmentStatus(code=code) for code in ("ENROLLED", "IN_PROGRESS")]
+    )
+    db_session.commit()
+    trail = create_trail()
+    login = register_and_login(client, db_session)
+    headers = {"X-CSRF-Token": login.headers["X-CSRF-Token"]}
+
+    first = client.get("/user-trails/me/overview")
+    assert first.status_code == 200, first.get_data(as_text=True)
+    assert first.get_json()["summary"]["enrolled"] == 0
+    [snapshot] = db_session.query(UserOverviewSnapshot).all()
+    assert snapshot.payload is not None
+
+    # Enrolling clears the snapshot; the next read rebuilds and stores it.
+    enroll = client.post(f"/user-trails/{trail.id}/enroll", headers=headers)
+    assert enroll.status_code == 200, enroll.get_data(as_text=True)
+    db_session.refresh(snapshot)
+    assert snapshot.payload is None
+    overview = client.get("/user-trails/me/overview").get_json()
+    assert [t["name"] for t in overview["trails"]] == ["Trilha"]
+    assert overview["trails"][0]["progress"]["total"] == 3
+    db_session.refresh(snapshot)
+    assert snapshot.payload == overview
+
+    # Removing an item changes the totals of every enrolled user.
+    payload = trail_repo.get_trail_builder_payload(trail.id)
+    del payload["sections"][0]["items"][1]
+    update_trail(trail.id, payload["sections"])
+    db_session.refresh(snapshot)
+    assert snapshot.payload is None
+    overview = client.get("/user-trails/me/overview").get_json()
+    assert overview["trails"][0]["progress"]["total"] == 2